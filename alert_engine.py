@@ -0,0 +1,278 @@
+"""
+Alert evaluation across every unit × category (or unit) in one sweep per cycle.
+
+Each cycle scores the latest day of every group with latest_group_signals and
+runs two rules through a per-group state machine:
+
+* status: WITHIN / MARGINAL VARIANCE / OUTSIDE TOLERANCE from the z-score,
+  with the thresholds of get_strategic_status;
+* momentum: RISING while the trend acceleration is above a threshold.
+
+A state only changes after the new value has held for `debounce` consecutive
+cycles, and a raised state is only released once the signal falls below
+its threshold minus a hysteresis band, so borderline groups do not flap.
+Only transitions are emitted and written to the sink (SQLite or JSON lines).
+
+    python alert_engine.py --replay --sink alerts.db
+    python alert_engine.py --interval 60 --sink alerts.jsonl --by Unit
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from daily_index import DailyIndex
+from data_store import CSV_PATH, STORE_PATH, aggregate_csv_chunks
+from diagnostics import instrumented
+from risk_engine import GROUPINGS, latest_group_signals
+from shared_arrays import load_arrays
+
+STATUS_LABELS = ('WITHIN TOLERANCE', 'MARGINAL VARIANCE', 'OUTSIDE TOLERANCE')
+MOMENTUM_LABELS = ('STEADY', 'RISING')
+EVENT_COLUMNS = ['cycle', 'Date', 'unit', 'category', 'rule', 'previous', 'state',
+                 'z_score', 'acceleration', 'weighted_score', 'ucl']
+
+
+class _Rule:
+    """
+    Debounced state per group: current state, the candidate being confirmed
+    and for how many consecutive cycles it has held. -1 means not yet seen.
+    """
+
+    def __init__(self, n):
+        self.state = np.full(n, -1, dtype=np.int8)
+        self.pending = np.full(n, -1, dtype=np.int8)
+        self.streak = np.zeros(n, dtype=np.int32)
+
+    def reindex(self, positions):
+        # positions[i] is the old slot of group i, or -1 for a new group
+        for name in ('state', 'pending', 'streak'):
+            old = getattr(self, name)
+            new = np.where(positions >= 0, old[np.maximum(positions, 0)], -1 if name != 'streak' else 0)
+            setattr(self, name, new.astype(old.dtype))
+
+    def step(self, candidate, debounce):
+        """
+        Advances every group by one cycle; returns (changed mask, previous states).
+        Unseen groups take their first state immediately.
+        """
+        previous = self.state.copy()
+        differs = candidate != self.state
+        self.streak = np.where(differs & (candidate == self.pending), self.streak + 1, np.where(differs, 1, 0))
+        self.pending = np.where(differs, candidate, self.state).astype(np.int8)
+        changed = differs & ((self.streak >= debounce) | (self.state < 0))
+        self.state = np.where(changed, candidate, self.state).astype(np.int8)
+        self.streak[changed] = 0
+        return changed, previous
+
+
+class AlertEngine:
+    """
+    Holds rule state between cycles for every group of `by` (['Unit',
+    'Category'], 'Unit' or None for hospital-wide).
+    """
+
+    def __init__(self, window=7, sigma_val=2, by=('Unit', 'Category'), smoother='mean',
+                 band=0.25, debounce=2, accel_threshold=0.01, accel_band=0.01, sink=None):
+        self.window, self.sigma_val, self.smoother = window, sigma_val, smoother
+        if isinstance(by, str):
+            by = [by]
+        self.by = list(by) if by else None
+        self.band, self.debounce = band, debounce
+        self.accel_threshold, self.accel_band = accel_threshold, accel_band
+        self.sink = sink
+        self.groups = None
+        self.cycles = 0
+
+    def _align(self, groups):
+        if self.groups is None:
+            self.status, self.momentum = _Rule(len(groups)), _Rule(len(groups))
+        elif not groups.equals(self.groups):
+            # New units or categories appeared in the data
+            positions = self.groups.get_indexer(groups)
+            self.status.reindex(positions)
+            self.momentum.reindex(positions)
+        self.groups = groups
+
+    def _status_candidate(self, z):
+        """
+        Level each group should move to: raised by the entry thresholds of
+        get_strategic_status, kept until z drops `band`·sigma below them.
+        """
+        sigma = self.sigma_val
+        z = np.nan_to_num(z, nan=-np.inf)
+        entry = np.select([z > sigma, z > 0.7 * sigma], [2, 1], 0)
+        hold = np.select([z > sigma - self.band * sigma, z > 0.7 * sigma - self.band * sigma], [2, 1], 0)
+        current = np.maximum(self.status.state, 0)
+        return np.maximum(entry, np.minimum(current, hold)).astype(np.int8)
+
+    def _momentum_candidate(self, accel):
+        accel = np.nan_to_num(accel, nan=-np.inf)
+        rising = self.momentum.state == 1
+        threshold = np.where(rising, self.accel_threshold - self.accel_band, self.accel_threshold)
+        return (accel > threshold).astype(np.int8)
+
+    @instrumented('alert_cycle')
+    def evaluate(self, index, end=None, start=None):
+        """
+        One cycle over the latest day up to `end`. Returns the transitions as
+        a frame (EVENT_COLUMNS) and writes them to the sink.
+        """
+        signals = latest_group_signals(index, self.by, self.window, self.sigma_val, start, end, self.smoother)
+        self._align(signals.index)
+        self.cycles += 1
+
+        z, accel = signals['z_score'].to_numpy(), signals['acceleration'].to_numpy()
+        events = []
+        for rule, labels, candidate in (
+            ('status', STATUS_LABELS, self._status_candidate(z)),
+            ('momentum', MOMENTUM_LABELS, self._momentum_candidate(accel)),
+        ):
+            changed, previous = getattr(self, rule).step(candidate, self.debounce)
+            # First sight of a group only reports it if it starts raised
+            changed &= (previous >= 0) | (candidate > 0)
+            if changed.any():
+                events.append(self._events(signals, changed, rule, labels, previous, getattr(self, rule).state))
+
+        events = pd.concat(events, ignore_index=True) if events else pd.DataFrame(columns=EVENT_COLUMNS)
+        if self.sink is not None and len(events):
+            self.sink.write(events)
+        return events
+
+    def _events(self, signals, changed, rule, labels, previous, state):
+        picked = signals[changed]
+        keys = picked.index
+        label = np.array(labels + ('NEW',), dtype=object)
+        return pd.DataFrame({
+            'cycle': self.cycles, 'Date': picked['Date'].to_numpy(),
+            'unit': keys.get_level_values('Unit') if self.by else None,
+            'category': keys.get_level_values('Category') if self.by and 'Category' in self.by else None,
+            'rule': rule, 'previous': label[previous[changed]], 'state': label[state[changed]],
+            'z_score': picked['z_score'].to_numpy(), 'acceleration': picked['acceleration'].to_numpy(),
+            'weighted_score': picked['weighted_score'].to_numpy(), 'ucl': picked['ucl'].to_numpy(),
+        })
+
+    def active(self):
+        """
+        Current status and momentum of every group, raised ones first.
+        """
+        frame = pd.DataFrame({
+            'status': np.array(STATUS_LABELS, dtype=object)[np.maximum(self.status.state, 0)],
+            'momentum': np.array(MOMENTUM_LABELS, dtype=object)[np.maximum(self.momentum.state, 0)],
+            'level': self.status.state,
+        }, index=self.groups)
+        return frame.sort_values('level', ascending=False).drop(columns='level')
+
+
+# --- Sinks ---
+class SqliteSink:
+    """
+    Appends transitions to an `alerts` table in a local SQLite file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with sqlite3.connect(path) as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS alerts (emitted_at TEXT, cycle INTEGER, date TEXT, unit TEXT, "
+                "category TEXT, rule TEXT, previous TEXT, state TEXT, z_score REAL, acceleration REAL, "
+                "weighted_score REAL, ucl REAL)"
+            )
+
+    def write(self, events):
+        emitted = pd.Timestamp.now(tz='UTC').isoformat(timespec='seconds')
+        rows = [
+            (emitted, int(e.cycle), None if pd.isna(e.Date) else e.Date.date().isoformat(), e.unit, e.category,
+             e.rule, e.previous, e.state, _real(e.z_score), _real(e.acceleration), _real(e.weighted_score), _real(e.ucl))
+            for e in events.itertuples(index=False)
+        ]
+        with sqlite3.connect(self.path) as db:
+            db.executemany("INSERT INTO alerts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+
+class JsonlSink:
+    """
+    Appends transitions to a JSON lines file, one event per line.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, events):
+        emitted = pd.Timestamp.now(tz='UTC').isoformat(timespec='seconds')
+        with open(self.path, 'a') as fh:
+            for e in events.to_dict('records'):
+                e['Date'] = None if pd.isna(e['Date']) else e['Date'].date().isoformat()
+                for col in ('z_score', 'acceleration', 'weighted_score', 'ucl'):
+                    e[col] = _real(e[col])
+                fh.write(json.dumps({'emitted_at': emitted, **e}) + '\n')
+
+
+def _real(value):
+    return None if value is None or not np.isfinite(value) else float(value)
+
+
+def open_sink(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.db', '.sqlite', '.sqlite3'):
+        return SqliteSink(path)
+    if ext in ('.jsonl', '.ndjson'):
+        return JsonlSink(path)
+    raise ValueError(f"Unsupported sink '{ext}' (use .db/.sqlite or .jsonl).")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--csv', default=CSV_PATH)
+    parser.add_argument('--store', default=STORE_PATH)
+    parser.add_argument('--sink', default='alerts.db', help='.db/.sqlite (SQLite) or .jsonl')
+    parser.add_argument('--by', nargs='*', default=['Unit', 'Category'], help="grouping ('Unit', 'Unit Category', or none)")
+    parser.add_argument('--window', type=int, default=7)
+    parser.add_argument('--sigma', type=float, default=2.0)
+    parser.add_argument('--smoother', default='mean')
+    parser.add_argument('--debounce', type=int, default=2, help='cycles a new state must hold before it is emitted')
+    parser.add_argument('--band', type=float, default=0.25, help='hysteresis band, in sigmas')
+    parser.add_argument('--accel-threshold', type=float, default=0.01, help='acceleration that raises RISING momentum')
+    parser.add_argument('--replay', action='store_true', help='evaluate every day of the history as one cycle')
+    parser.add_argument('--interval', type=float, help='re-evaluate every N seconds, reloading when the CSV changes')
+    parser.add_argument('--chunked', action='store_true', help='stream the CSV into daily aggregates (out-of-core)')
+    args = parser.parse_args(argv)
+    if tuple(args.by) not in GROUPINGS:
+        parser.error("--by must be 'Unit', 'Unit Category' or nothing (the whole hospital).")
+
+    def load():
+        if args.chunked:
+            return DailyIndex.from_aggregates(aggregate_csv_chunks(args.csv))
+        return DailyIndex.from_arrays(load_arrays(args.csv, args.store))
+
+    sigma_val = int(args.sigma) if args.sigma.is_integer() else args.sigma
+    engine = AlertEngine(args.window, sigma_val, args.by or None, args.smoother, args.band, args.debounce,
+                         args.accel_threshold, sink=open_sink(args.sink))
+    index = load()
+
+    if args.replay:
+        t0 = time.perf_counter()
+        emitted = sum(len(engine.evaluate(index, end=day)) for day in index.dates)
+        elapsed = time.perf_counter() - t0
+        print(f"Replayed {engine.cycles} cycles × {len(engine.groups)} groups in {elapsed:.2f}s "
+              f"({elapsed / engine.cycles * 1000:.1f} ms/cycle); {emitted} transitions -> {args.sink}")
+    else:
+        source = os.stat(args.csv).st_mtime_ns
+        while True:
+            t0 = time.perf_counter()
+            events = engine.evaluate(index)
+            print(f"cycle {engine.cycles}: {len(events)} transitions in {(time.perf_counter() - t0) * 1000:.1f} ms")
+            if not args.interval:
+                break
+            time.sleep(args.interval)
+            if os.stat(args.csv).st_mtime_ns != source:
+                source, index = os.stat(args.csv).st_mtime_ns, load()
+    print(engine.active().head(10).to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -1,42 +1,136 @@
+import os
+import time
+
+# Start of this rerun; the diagnostics panel reports time to the first KPI card from here
+RUN_STARTED = time.perf_counter()
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 
 # 1. IMPORT YOUR CUSTOM MODULES
-from risk_engine import calculate_risk_kinetics, get_strategic_status
+# Plotly, federation and bootstrap are imported where they are first needed,
+# so a cold start reaches the KPI cards without paying for them
+from data_store import HOURLY_AGGREGATE_KEYS, aggregate_csv_chunks
+from daily_index import DailyIndex, HourlyIndex
+from diagnostics import finish_profile, stage, start_profile
+from chart_data import CHART_CACHE, acceleration_series, cached_chart, trend_series
+from risk_engine import KINETICS_CACHE, cached_kinetics, kinetics_key
+from shared_arrays import load_arrays
 from ui_styles import apply_executive_css, HARM_LABELS
 
 # --- 2. CONFIGURATION & STYLING ---
 st.set_page_config(page_title="Risk Intelligence Portal", layout="wide")
 apply_executive_css()
 
+# RISK_KINETICS_STORE=<dir> serves full-history daily views from a store written by
+# kinetics_store.py when it is in sync with the data; otherwise they are recomputed
+KINETICS_STORE = os.environ.get('RISK_KINETICS_STORE')
+
+# Per-stage instrumentation for this rerun; off unless the sidebar toggle is set
+profile = start_profile(st.session_state.get("diagnostics", False))
+
 # --- 3. DATA PERSISTENCE ---
-@st.cache_data
+@st.cache_resource
 def load_data():
-    # hospital_risk_data.csv must be in the same directory
-    df = pd.read_csv('hospital_risk_data.csv', parse_dates=['Date'])
-    # Quantizing categorical data as described in your Strategic Hybrid profile
-    harm_weights = {chr(65+i): (i+1)**2 for i in range(9)}
-    df['weighted_score'] = df['Harm_Level'].map(harm_weights)
-    df['raw_level'] = df['Harm_Level'].map({chr(65+i): i+1 for i in range(9)})
-    return df
+    # hospital_risk_data.csv must be in the same directory; it is converted once
+    # into the quantized columnar store (risk_store/), re-ingested on change and
+    # memory-mapped read-only, so sessions and processes share one copy
+    return load_arrays()
+
+@st.cache_resource
+def load_index():
+    # Dense date × unit × category calendar shared by every session and view.
+    # RISK_INGEST_MODE=chunked streams the CSV straight into daily aggregates
+    # so multi-year archives never have to fit in worker RAM as incidents.
+    if os.environ.get('RISK_INGEST_MODE') == 'chunked':
+        return DailyIndex.from_aggregates(aggregate_csv_chunks())
+    return DailyIndex.from_arrays(load_data())
+
+@st.cache_resource
+def load_hourly_index():
+    # Hour × unit plane for hourly / per-shift surveillance, built on first use
+    if os.environ.get('RISK_INGEST_MODE') == 'chunked':
+        return HourlyIndex.from_aggregates(aggregate_csv_chunks(keys=HOURLY_AGGREGATE_KEYS))
+    return HourlyIndex.from_arrays(load_data())
+
+@st.cache_resource
+def load_feed():
+    # RISK_INGEST_SOURCE=tail:<path>,socket:<host>:<port> runs ingest_service.py in
+    # this process: new incidents go into the store and into a new version of the
+    # index, which every rerun picks up
+    from ingest_service import IngestService, open_source
+    service = IngestService(load_index())
+    service.start([open_source(spec) for spec in os.environ['RISK_INGEST_SOURCE'].split(',')])
+    return service
+
+@st.cache_resource(max_entries=8)
+def load_hotspots(version, _index, _arrays=None):
+    # Maintained top-K driver rankings, one per dataset version and scheme.
+    # Built from the shared arrays when they are loaded (adds subcategories),
+    # otherwise from the index's score plane.
+    from hotspots import HotspotIndex
+    if _arrays is not None:
+        return HotspotIndex.from_arrays(_arrays, _index.scheme)
+    return HotspotIndex.from_index(_index)
+
+@st.cache_resource(max_entries=8)
+def load_tree(version, _index, _arrays=None):
+    # Hospital → unit → category (→ subcategory from the shared arrays) kinetics,
+    # aggregated bottom-up once per dataset version and scheme
+    from kinetics_tree import KineticsTree
+    if _arrays is not None:
+        return KineticsTree.from_arrays(_arrays, _index.scheme)
+    return KineticsTree.from_index(_index)
 
-df = load_data()
+@st.cache_resource
+def load_network():
+    # RISK_SITES=<directory or glob> federates one export per site (federation.py);
+    # each site is ingested into its own store on a process pool
+    from federation import discover_sites, load_sites
+    return load_sites(discover_sites(os.environ['RISK_SITES']))
+
+with stage("load_index") as s:
+    network = load_network() if os.environ.get('RISK_SITES') else None
+    feed = load_feed() if network is None and os.environ.get('RISK_INGEST_SOURCE') else None
+    if network is not None:
+        index = network.by_unit_type()
+    else:
+        index = load_index() if feed is None else feed.index
+    s.rows = len(index.dates)
 
 # --- 4. SIDEBAR (Executive Controls) ---
 with st.sidebar:
     st.markdown("### 🎛️ Surveillance Engine")
+    site = None
+    if network is not None:
+        site = st.selectbox("Site", ["All Sites"] + list(network.sites), help="All Sites rolls each unit type up across the network.")
+        index = index if site == "All Sites" else network.site(site)
     scope = st.radio("Analysis Scope", ["Whole Hospital", "Single Unit"])
-    selected_unit = st.selectbox("Unit Select", sorted(df["Unit"].unique())) if scope == "Single Unit" else None
+    selected_unit = st.selectbox("Unit Select", sorted(index.units)) if scope == "Single Unit" else None
     
     # Date Range Selection
-    min_date = df['Date'].min().to_pydatetime()
-    max_date = df['Date'].max().to_pydatetime()
+    min_date = index.dates[0].to_pydatetime()
+    max_date = index.dates[-1].to_pydatetime()
     selected_dates = st.date_input("Analysis Period", value=(min_date, max_date), min_value=min_date, max_value=max_date)
     
     # Kinetic Parameters
-    window = st.select_slider("Kinetic Window (Smoothing)", options=[3, 7, 15], value=7)
+    # Live appends and federation only maintain the daily index
+    resolution_map = {"Daily": 24, "Per Shift (8h)": 8, "Hourly": 1} if network is None and feed is None else {"Daily": 24}
+    resolution = st.radio("Time Resolution", list(resolution_map), horizontal=True, help="Shifts start at 07:00, 15:00 and 23:00.")
+    bucket_hours = resolution_map[resolution]
+    window = st.select_slider("Kinetic Window (Smoothing)", options=[3, 7, 15], value=7, help="Counted in days, shifts or hours depending on the time resolution.")
+    smoother_map = {"Mean": "mean", "Median": "median", "MAD-clipped Mean": "mad_mean", "EWMA": "ewma"}
+    smoother = smoother_map[st.selectbox(
+        "Trend Smoother", list(smoother_map),
+        help="Median and MAD-clipped mean keep a single sentinel event from dragging the trend; EWMA reacts without look-ahead."
+    )]
+    scheme_map = {"Quadratic (A=1 … I=81)": "quadratic", "Linear (A=1 … I=9)": "linear",
+                  "Exponential (A=1 … I=256)": "exponential", "NCC MERP Bands": "ncc_merp"}
+    scheme = scheme_map[st.selectbox(
+        "Harm Weighting", list(scheme_map),
+        help="How each harm level A-I is weighted into the RPN. Switching re-scores the loaded counts; nothing is reloaded."
+    )]
+    # Re-scored views are built once per scheme and shared across sessions
+    index = index.with_scheme(scheme)
     
     st.markdown("---")
     # Risk Appetite Mapping
@@ -53,33 +147,42 @@ with st.sidebar:
     )
     sigma_val = sigma_map[selected_sigma_label]
 
-# --- 5. DATA FILTERING ---
-if len(selected_dates) == 2:
-    start_date, end_date = selected_dates
-    df_f = df[(df['Date'].dt.date >= start_date) & (df['Date'].dt.date <= end_date)].copy()
-else:
-    df_f = df.copy()
+    st.toggle("Diagnostics", key="diagnostics", help="Record per-stage timings for each rerun.")
+    if feed is not None:
+        ingested = feed.stats()
+        st.caption(f"Live feed: {ingested['accepted']:,} incidents ingested, {ingested['rejected']:,} rejected. Rerun to refresh.")
 
-if scope == "Single Unit":
-    df_f = df_f[df_f["Unit"] == selected_unit]
+# --- 5. DATA SLICING ---
+# Every view below is a date/unit slice of the dense daily index
+start_date, end_date = selected_dates if len(selected_dates) == 2 else (None, None)
 
 # --- 6. CORE ANALYTICS (Module Calls) ---
-# Calling the calculation logic from risk_engine.py
-daily, mean_val, std_val, ucl_value = calculate_risk_kinetics(df_f, window, sigma_val)
-
-# Calling the executive directive logic from risk_engine.py
-z_score, status, color, action_prompt, conf_pct = get_strategic_status(daily, mean_val, std_val, sigma_val)
+# Calling the calculation and executive directive logic from risk_engine.py,
+# memoized across sessions on (unit, date range, window, sigma, smoother, dataset version)
+with stage("kinetics") as s:
+    series_index = index if bucket_hours == 24 else load_hourly_index().with_scheme(scheme)
+    bucket = dict(hours=bucket_hours, offset=7 if bucket_hours == 8 else 0, smoother=smoother)
+    stored = None
+    if KINETICS_STORE and bucket_hours == 24:
+        from kinetics_store import stored_kinetics
+        stored = stored_kinetics(index, selected_unit, start_date, end_date, window, sigma_val, smoother, KINETICS_STORE)
+    (daily, mean_val, std_val, ucl_value), strategic = stored or cached_kinetics(
+        series_index, selected_unit, start_date, end_date, window, sigma_val, **bucket)
+    # Everything charted below is derived from this view and cached on its key
+    view_key = kinetics_key(series_index, selected_unit, start_date, end_date, window, sigma_val, **bucket)
+    days = index.day_slice(start_date, end_date)
+    range_key = (index.view_version(selected_unit, days), selected_unit, days.start, days.stop)
+    s.rows = len(daily)
+z_score, status, color, action_prompt, conf_pct = strategic
 
 # Identify the primary driver (Hotspot)
-if not df_f.empty:
-    hotspot = df_f.groupby(["Unit", "Category"])["weighted_score"].sum().idxmax()
-else:
-    hotspot = ("N/A", "N/A")
+with stage("hotspot"):
+    hotspot = index.hotspot(selected_unit, start_date, end_date)
 
 # --- 7. HEADER & STRATEGIC BRIEF ---
 st.markdown(f"""
 <div class="dashboard-header">
-    <h1 style="margin:0; font-size: 2.2rem;">{scope if scope == 'Whole Hospital' else selected_unit} Risk Intelligence</h1>
+    <h1 style="margin:0; font-size: 2.2rem;">{'' if site is None else site + ' · '}{scope if scope == 'Whole Hospital' else selected_unit} Risk Intelligence</h1>
     <div style="display: flex; gap: 20px; margin-top: 15px; font-size: 0.85rem; color: #86868B;">
         <span>🛡️ <b>Tolerance Mode:</b> {selected_sigma_label}</span>
         <span>📈 <b>Alert Trigger:</b> Outliers beyond {conf_pct} probability</span>
@@ -115,47 +218,203 @@ with k3:
     st.markdown(f"""<div class="metric-box"><div class="m-label">Resource Priority</div><div class="m-value" style="font-size:1.6rem;">{hotspot[0]}</div>
     <div class="m-context">Primary Threat: <b>{hotspot[1]}</b></div></div>""", unsafe_allow_html=True)
 
+# The KPI cards are on screen from here on; everything below streams in after them
+kpi_ms = (time.perf_counter() - RUN_STARTED) * 1000
+
 # --- 9. VISUAL INTELLIGENCE ---
-col_l, col_r = st.columns([1.8, 1.2], gap="large")
+# Figures are built from pre-aggregated, downsampled series and cached on
+# their inputs, so a rerun that changes nothing they depend on reuses them.
+# Plotly is imported on the first draw rather than at startup.
+def band_traces(fig, frame, name, color):
+    # Shaded region between the <name>_lo and <name>_hi bootstrap quantiles
+    import plotly.graph_objects as go
+    if f"{name}_lo" not in frame:
+        return
+    x = frame[frame.columns[0]]
+    fig.add_trace(go.Scatter(x=x, y=frame[f"{name}_hi"], line=dict(width=0), hoverinfo="skip", showlegend=False))
+    fig.add_trace(go.Scatter(x=x, y=frame[f"{name}_lo"], line=dict(width=0), fill="tonexty", fillcolor=color,
+                             hoverinfo="skip", showlegend=False))
 
-with col_l:
+def spc_figure(trend, ucl_value, sigma_val, resolution):
+    import plotly.graph_objects as go
+    time_col = trend.columns[0]
+    fig = go.Figure()
+    band_traces(fig, trend, "smooth", "rgba(29, 29, 31, 0.12)")
+    fig.add_trace(go.Scatter(x=trend[time_col], y=trend["weighted_score"], name=resolution, line=dict(color="#E5E5E7")))
+    fig.add_trace(go.Scatter(x=trend[time_col], y=trend["smooth"], name="Trend", line=dict(color="#1D1D1F", width=3)))
+    fig.add_hline(y=ucl_value, line_dash="dot", line_color="#FF3B30", annotation_text=f"Tolerance ({sigma_val}σ)")
+    fig.update_layout(title="<b>STATISTICAL CONTROL (SPC)</b>", height=280, template="plotly_white", margin=dict(t=40, b=20, l=40, r=20), showlegend=False)
+    return fig
+
+def acceleration_figure(accel):
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Scatter(x=accel[accel.columns[0]], y=accel["acceleration"], fill="tozeroy",
+                               line=dict(color="#FF3B30"), fillcolor="rgba(255, 59, 48, 0.1)"))
+    band_traces(fig, accel, "acceleration", "rgba(255, 59, 48, 0.15)")
+    fig.update_layout(title="<b>TREND ACCELERATION</b>", height=200, template="plotly_white", margin=dict(t=40, b=20, l=40, r=20), showlegend=False)
+    return fig
+
+def harm_figure(cat_sum):
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Bar(
+        x=cat_sum.values, y=cat_sum.index, orientation='h',
+        marker=dict(color="#1D1D1F", cornerradius=10),
+        text=[f"<b>{cat}</b> | {val:,.0f} RPN" for cat, val in zip(cat_sum.index, cat_sum.values)],
+        textposition='inside', insidetextanchor='end', textfont=dict(size=14, color="white"),
+    ))
+    fig.update_layout(
+        title="<b>HARM DISTRIBUTION</b>", height=530, bargap=0.2,
+        template="plotly_white", showlegend=False, xaxis=dict(visible=False), yaxis=dict(visible=False),
+        margin=dict(t=60, b=20, l=10, r=10), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
+
+def weekly_figure(heat_data):
+    import plotly.express as px
+    fig = px.imshow(heat_data, color_continuous_scale="YlOrRd")
+    fig.update_layout(height=300, xaxis_title = "", yaxis_title="", coloraxis_showscale=False, margin=dict(t=10, b=10))
+    return fig
+
+# Sections are fragments: their own widgets rerun only that section, not the
+# kinetics, header and KPI cards above
+@st.fragment
+def trend_section(daily, view_key, band_key, ucl_value, sigma_val, resolution, window, smoother):
     # SPC Chart
     with st.container(border=True):
-        fig_m = go.Figure()
-        fig_m.add_trace(go.Scatter(x=daily["Date"], y=daily["weighted_score"], name="Daily", line=dict(color="#E5E5E7")))
-        fig_m.add_trace(go.Scatter(x=daily["Date"], y=daily["smooth"], name="Trend", line=dict(color="#1D1D1F", width=3)))
-        fig_m.add_hline(y=ucl_value, line_dash="dot", line_color="#FF3B30", annotation_text=f"Tolerance ({sigma_val}σ)")
-        fig_m.update_layout(title="<b>STATISTICAL CONTROL (SPC)</b>", height=280, template="plotly_white", margin=dict(t=40, b=20, l=40, r=20), showlegend=False)
-        st.plotly_chart(fig_m, use_container_width=True, config={'displayModeBar': False})
+        show_bands = st.toggle("Confidence Bands", value=True, key="show_bands",
+                               help="90% block-bootstrap bands on the trend and its acceleration.")
+        bands = None
+        if show_bands:
+            # Bootstrap bands depend on the scope and window, not on sigma
+            with stage("bands") as s:
+                from bootstrap import cached_bands
+                bands = cached_bands(band_key, daily, window, smoother)
+                s.rows = len(bands)
+        with stage("figure.spc"):
+            fig_m = cached_chart(("spc", resolution, show_bands) + view_key,
+                                 lambda: spc_figure(trend_series(daily, bands=bands), ucl_value, sigma_val, resolution))
+            st.plotly_chart(fig_m, use_container_width=True, config={'displayModeBar': False})
 
     # Momentum Chart
     with st.container(border=True):
-        fig_a = px.area(daily, x="Date", y="acceleration")
-        fig_a.update_traces(line_color="#FF3B30", fillcolor="rgba(255, 59, 48, 0.1)")
-        fig_a.update_layout(title="<b>TREND ACCELERATION</b>", height=200, template="plotly_white", margin=dict(t=40, b=20, l=40, r=20), xaxis_title="", yaxis_title="")
-        st.plotly_chart(fig_a, use_container_width=True, config={'displayModeBar': False})
+        with stage("figure.acceleration"):
+            fig_a = cached_chart(("acceleration", show_bands) + view_key,
+                                 lambda: acceleration_figure(acceleration_series(daily, bands=bands)))
+            st.plotly_chart(fig_a, use_container_width=True, config={'displayModeBar': False})
+
+@st.fragment
+def weekly_section(index, range_key, selected_unit, start_date, end_date):
+    # Below the fold: the matrix is only computed once the expander is opened
+    weekly = st.expander("Weekly Intensity Matrix", key="show_weekly", on_change="rerun")
+    if weekly.open:
+        with weekly, stage("figure.weekly_matrix"):
+            fig_h = cached_chart(("weekly_matrix",) + range_key, lambda: weekly_figure(index.weekly_matrix(selected_unit, start_date, end_date)))
+            st.plotly_chart(fig_h, use_container_width=True, config={'displayModeBar': False})
+
+@st.fragment
+def drivers_section(index, arrays, feed, selected_unit, start_date, end_date, window, smoother):
+    # Ranked drivers straight from the hotspot index; no aggregation per rerun.
+    # A live feed keeps its own index current batch by batch instead of a rebuild per version.
+    with st.container(border=True):
+        st.markdown("**TOP DRIVERS**")
+        hotspots = load_hotspots(index.version, index, arrays) if feed is None else feed.hotspot_index(index.scheme)
+        levels = [lvl for lvl in ("Unit", "Category", "Subcategory") if lvl in hotspots.levels]
+        if selected_unit is not None:
+            # Within one unit, rank its categories / subcategories
+            levels = [lvl for lvl in levels if f"Unit × {lvl}" in hotspots.levels]
+        level = st.radio("Level", levels, horizontal=True, key="driver_level")
+        rank_map = {"Cumulative RPN": "rpn", "Velocity": "velocity", "Acceleration": "acceleration"}
+        by = rank_map[st.radio("Rank By", list(rank_map), horizontal=True, key="driver_rank")]
+        with stage("top_drivers") as s:
+            scoped = level if selected_unit is None else f"Unit × {level}"
+            ranked = hotspots.top(scoped, 5, by, start_date, end_date, selected_unit, window, smoother)
+            if selected_unit is not None:
+                ranked = ranked.droplevel("Unit")
+            s.rows = len(ranked)
+        ranked.index = [" / ".join(map(str, key)) if isinstance(key, tuple) else key for key in ranked.index]
+        st.dataframe(ranked.rename(columns={"rpn": "RPN", "velocity": "Velocity", "acceleration": "Acceleration"}),
+                     use_container_width=True, column_config={"RPN": st.column_config.NumberColumn(format="%.0f"),
+                                                             "Velocity": st.column_config.NumberColumn(format="%.2f"),
+                                                             "Acceleration": st.column_config.NumberColumn(format="%.2f")})
+
+@st.fragment
+def drill_section(index, arrays, selected_unit, start_date, end_date, window, smoother):
+    # Below the fold: the tree is built once per dataset version; every drill
+    # step is a lookup of a node's precomputed series
+    drill = st.expander("Root-Cause Drill-Down", key="show_drill", on_change="rerun")
+    if not drill.open:
+        return
+    with drill:
+        tree = load_tree(index.version, index, arrays)
+        scope = () if selected_unit is None else (selected_unit,)
+        path = st.session_state.get("drill_path", scope)
+        if path[:len(scope)] != scope:
+            path = scope
+        if len(path) > len(scope) and st.button("Up one level", key="drill_up"):
+            path = path[:-1]
+        st.session_state["drill_path"] = path
+
+        with stage("drill_down") as s:
+            node = tree.series(path, window, smoother, start_date, end_date)
+            children = tree.breakdown(path, window, smoother, start_date, end_date) if len(path) < tree.depth else None
+            s.rows = len(node)
+        latest = node.iloc[-1] if len(node) else None
+        st.markdown(f"**{' › '.join(('Hospital',) + path)}**")
+        if latest is not None:
+            st.caption(f"RPN {node['weighted_score'].sum():,.0f} · velocity {latest['velocity']:+.2f} · acceleration {latest['acceleration']:+.2f} on {latest['Date']:%Y-%m-%d}")
+        fig_d = cached_chart(("drill_acceleration", index.version, path, window, smoother, start_date, end_date),
+                             lambda: acceleration_figure(acceleration_series(node)))
+        st.plotly_chart(fig_d, use_container_width=True, config={'displayModeBar': False})
+
+        if children is not None:
+            # Selecting a row drills into that child
+            st.caption(f"Select a {tree.names[len(path)].lower()} to drill down.")
+            event = st.dataframe(
+                children.rename(columns={"rpn": "RPN", "incidents": "Incidents", "velocity": "Velocity", "acceleration": "Acceleration"}),
+                use_container_width=True, on_select="rerun", selection_mode="single-row", key="drill_rows:" + "/".join(path),
+                column_config={"RPN": st.column_config.NumberColumn(format="%.0f"),
+                               "Velocity": st.column_config.NumberColumn(format="%.2f"),
+                               "Acceleration": st.column_config.NumberColumn(format="%.2f")})
+            if event.selection.rows:
+                st.session_state["drill_path"] = path + (children.index[event.selection.rows[0]],)
+                st.rerun(scope="fragment")
+
+col_l, col_r = st.columns([1.8, 1.2], gap="large")
+
+with col_l:
+    band_key = ("bands",) + kinetics_key(series_index, selected_unit, start_date, end_date, window, None, **bucket)
+    trend_section(daily, view_key, band_key, ucl_value, sigma_val, resolution, window, smoother)
 
 with col_r:
     # Harm Distribution
     with st.container(border=True):
-        cat_sum = df_f.groupby("Category")["weighted_score"].sum().sort_values()
-        fig_b = go.Figure(go.Bar(
-            x=cat_sum.values, y=cat_sum.index, orientation='h',
-            marker=dict(color="#1D1D1F", cornerradius=10),
-            text=[f"<b>{cat}</b> | {val:,.0f} RPN" for cat, val in zip(cat_sum.index, cat_sum.values)],
-            textposition='inside', insidetextanchor='end', textfont=dict(size=14, color="white"),
-        ))
-        fig_b.update_layout(
-            title="<b>HARM DISTRIBUTION</b>", height=530, bargap=0.2,
-            template="plotly_white", showlegend=False, xaxis=dict(visible=False), yaxis=dict(visible=False),
-            margin=dict(t=60, b=20, l=10, r=10), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)'
-        )
-        st.plotly_chart(fig_b, use_container_width=True, config={'displayModeBar': False})
+        with stage("figure.harm_distribution"):
+            fig_b = cached_chart(("harm_distribution",) + range_key, lambda: harm_figure(index.category_totals(selected_unit, start_date, end_date)))
+            st.plotly_chart(fig_b, use_container_width=True, config={'displayModeBar': False})
+    arrays = load_data() if network is None and feed is None and os.environ.get('RISK_INGEST_MODE') != 'chunked' else None
+    drivers_section(index, arrays, feed, selected_unit, start_date, end_date, window, smoother)
 
 # --- 10. MATRIX ---
-st.markdown("### Weekly Intensity Matrix")
-pivot = df_f.groupby(['Date', 'Unit'])['weighted_score'].sum().unstack().fillna(0)
-heat_data = pivot.resample('W').sum().T
-fig_h = px.imshow(heat_data, color_continuous_scale="YlOrRd")
-fig_h.update_layout(height=300, xaxis_title = "", yaxis_title="", coloraxis_showscale=False, margin=dict(t=10, b=10))
-st.plotly_chart(fig_h, use_container_width=True, config={'displayModeBar': False})
\ No newline at end of file
+weekly_section(index, range_key, selected_unit, start_date, end_date)
+
+# --- 11. DRILL-DOWN ---
+drill_section(index, arrays, selected_unit, start_date, end_date, window, smoother)
+
+# --- 12. DIAGNOSTICS ---
+finish_profile(profile)
+if profile is not None:
+    from bootstrap import BAND_CACHE
+    with st.sidebar.expander("Diagnostics", expanded=True):
+        st.caption(f"Rerun {profile.run_id}: {profile.total_seconds() * 1000:.1f} ms across top-level stages; first KPI card at {kpi_ms:.0f} ms")
+        st.dataframe(
+            [{"stage": "  " * r["depth"] + r["stage"], "ms": round(r["seconds"] * 1000, 2), "rows": r["rows"],
+              "alloc KB": None if r["alloc_kb"] is None else round(r["alloc_kb"], 1)} for r in profile.ordered()],
+            hide_index=True, use_container_width=True,
+        )
+        cache = KINETICS_CACHE.stats()
+        st.caption(f"Kinetics cache: {cache['hits']} hits / {cache['misses']} misses, {cache['entries']} entries, {cache['bytes'] / 2**20:.1f} MB")
+        charts = CHART_CACHE.stats()
+        st.caption(f"Chart cache: {charts['hits']} hits / {charts['misses']} misses, {charts['entries']} entries, {charts['bytes'] / 2**20:.1f} MB")
+        band_stats = BAND_CACHE.stats()
+        st.caption(f"Band cache: {band_stats['hits']} hits / {band_stats['misses']} misses, {band_stats['entries']} entries, {band_stats['bytes'] / 2**20:.1f} MB")
+        st.download_button("Export JSON lines", profile.to_jsonl(), file_name=f"diagnostics-{profile.run_id}.jsonl", mime="application/x-ndjson")
\ No newline at end of file
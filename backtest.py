@@ -0,0 +1,268 @@
+"""
+Historical backtest of window/sigma alert policies.
+
+Replays the history as if each past day were "today": on day t a policy
+only sees days up to t, exactly as calculate_risk_kinetics(start, end=t)
+followed by get_strategic_status would, with `start` the replay's first day
+(--start, or the dataset's first day). Every group shares that calendar;
+without an explicit start the dashboard begins a scope at its own first
+incident instead, so its statistics only match for scopes with an incident
+on that day, or when the same start is given. Every policy fires on the days its rule holds
+and is scored on how far ahead of severe (G-I) events its alerts come
+(lead time, share of events anticipated) and how many alert onsets are not
+followed by one (false-alert rate).
+
+A naive replay is O(days² × policies). Here every day is scored in one
+vectorized pass per window:
+
+* the z-score of day t against days start..t comes from expanding sums;
+* the smooth at t-w and t-2w never reaches past t, so it is the
+  full-history smooth, and only the smooth at t (whose centered window
+  is cut off at t) is recomputed on the trailing days;
+* every sigma reuses the window's derivatives, and windows run on a
+  process pool.
+
+    python backtest.py --out policies.csv
+    python backtest.py --windows 3 7 15 --sigmas 1 2 3 --horizon 14 --rule rising --by Unit Category
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from daily_index import DailyIndex
+from data_store import CSV_PATH, STORE_PATH, aggregate_csv_chunks, write_results
+from diagnostics import instrumented
+from quantization import DEFAULT_SCHEME, HARM_LEVELS, SCHEMES
+from risk_engine import GROUPINGS, group_keys, group_planes
+from shared_arrays import load_arrays
+from smoothing import smooth
+
+# Harm levels whose incidents are the events a policy should anticipate
+SEVERE_LEVELS = ('G', 'H', 'I')
+
+# outside: OUTSIDE TOLERANCE (z > sigma); marginal: MARGINAL VARIANCE or
+# worse (z > 0.7·sigma); rising: marginal or worse while the trend
+# acceleration is above a threshold (the dashboard's "Increasing")
+RULES = ('outside', 'marginal', 'rising')
+
+_PLANES = None
+
+
+def _init_worker(planes):
+    # Each worker receives the (score, severe, z) planes once
+    global _PLANES
+    _PLANES = planes
+
+
+def expanding_z(score):
+    """
+    z-score of every day of a day × group plane against the mean and std
+    (ddof=1) of all days up to and including it: the get_strategic_status
+    z-score of a replay ending that day.
+    """
+    n = np.arange(1, score.shape[0] + 1, dtype=float).reshape((-1,) + (1,) * (score.ndim - 1))
+    total = np.cumsum(score, axis=0)
+    squares = np.cumsum(score * score, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # n·Σx² - (Σx)² stays exact for integer weights
+        std = np.sqrt(np.maximum(n * squares - total * total, 0) / (n * (n - 1)))
+        return (score - total / n) / std
+
+
+def asof_acceleration(score, window, smoother='mean'):
+    """
+    Trend acceleration of every day as seen on that day, for a day × group
+    plane. NaN until 2·window days have passed, like calculate_daily_kinetics.
+    """
+    n_days = score.shape[0]
+    accel = np.full(score.shape, np.nan)
+    if n_days <= 2 * window:
+        return accel
+    full = smooth(score, window, smoother)
+    t = np.arange(2 * window, n_days)
+    if smoother == 'ewma':
+        # Causal, so the full-history value at t already ignores later days
+        head = full[t]
+    else:
+        # The centered window at t, cut off at t, covers the k trailing days;
+        # smoothing each k-day tail on its own gives its value at the last day
+        k = window - (window - 1) // 2
+        tails = sliding_window_view(score[2 * window - k + 1:], k, axis=0)
+        head = smooth(np.moveaxis(tails, -1, 0).reshape(k, -1), window, smoother)[-1].reshape(tails.shape[:-1])
+    velocity = (head - full[t - window]) / window
+    previous = (full[t - window] - full[t - 2 * window]) / window
+    accel[t] = (velocity - previous) / window
+    return accel
+
+
+def policy_alerts(z, accel, sigma_val, rule='outside', accel_threshold=0.01):
+    """
+    Days on which a policy alerts; days before the window has settled
+    (NaN acceleration, "NO DATA") never alert.
+    """
+    with np.errstate(invalid='ignore'):
+        if rule == 'outside':
+            fired = z > sigma_val
+        elif rule == 'marginal':
+            fired = z > 0.7 * sigma_val
+        elif rule == 'rising':
+            fired = (z > 0.7 * sigma_val) & (accel > accel_threshold)
+        else:
+            raise ValueError(f"Unknown rule '{rule}' (expected one of {', '.join(RULES)}).")
+    return fired & ~np.isnan(accel)
+
+
+def score_alerts(alerts, severe, begin, horizon):
+    """
+    Per-group counts for a day × group alert plane against severe-event
+    days, from day `begin` on. An event is anticipated when an alert was
+    active on one of the `horizon` days before it; its lead time runs from
+    the onset of that alert run. An onset is false when no severe event
+    follows within `horizon` days; onsets too recent to judge are skipped.
+    Returns (per-group dict of counts, lead times of anticipated events).
+    """
+    n_days, n_groups = alerts.shape
+    days = np.arange(n_days).reshape(-1, 1)
+    onset = alerts & ~np.vstack([np.zeros((1, n_groups), dtype=bool), alerts[:-1]])
+    last_alert = np.maximum.accumulate(np.where(alerts, days, -1), axis=0)
+    run_start = np.maximum.accumulate(np.where(onset, days, -1), axis=0)
+    # First severe day at or after each day (n_days when there is none)
+    next_severe = np.minimum.accumulate(np.where(severe, days, n_days)[::-1], axis=0)[::-1]
+
+    # 1. Severe events and the alerts ahead of them
+    t, g = np.nonzero(severe[begin:])
+    t += begin
+    previous = last_alert[t - 1, g]
+    anticipated = (previous >= 0) & (previous >= t - horizon)
+    lead = (t - run_start[t - 1, g])[anticipated]
+
+    # 2. Alert onsets and whether a severe event followed
+    o, og = np.nonzero(onset[begin:n_days - horizon])
+    o += begin
+    true = next_severe[o + 1, og] <= o + horizon
+
+    counts = {
+        'days': np.full(n_groups, n_days - begin),
+        'alert_days': alerts[begin:].sum(axis=0),
+        'onsets': np.bincount(og, minlength=n_groups),
+        'false_onsets': np.bincount(og[~true], minlength=n_groups),
+        'events': np.bincount(g, minlength=n_groups),
+        'anticipated': np.bincount(g[anticipated], minlength=n_groups),
+        'lead_days': np.bincount(g[anticipated], weights=lead, minlength=n_groups),
+    }
+    return counts, lead
+
+
+def _score_window(window, smoother, sigmas, rule, horizon, accel_threshold, begin, planes=None):
+    score, severe, z = _PLANES if planes is None else planes
+    accel = asof_acceleration(score, window, smoother)
+    return [(window, sigma_val, score_alerts(policy_alerts(z, accel, sigma_val, rule, accel_threshold), severe, begin, horizon))
+            for sigma_val in sigmas]
+
+
+@instrumented('backtest')
+def backtest(index, windows=(3, 7, 15), sigmas=(1, 2, 3), by='Unit', smoother='mean', start=None, end=None,
+             horizon=14, rule='outside', accel_threshold=0.01, workers=None):
+    """
+    Replays every (window, sigma) policy over [start, end] for every group
+    of `by` (None, 'Unit' or ['Unit', 'Category']) on the index calendar
+    from `start` (see the module docstring). All policies are scored
+    from the first day on which the longest window has settled. Returns
+    (policy comparison table, per-group table).
+    """
+    keys = group_keys(by)
+    rows = index.day_slice(start, end)
+    severe = index.counts[..., [HARM_LEVELS.index(level) for level in SEVERE_LEVELS]].sum(axis=-1)
+    groups, (score, incidents, severe) = group_planes(index, keys, rows, index.score, index.incidents, severe)
+    observed = incidents.sum(axis=0) > 0
+    score, severe = score[:, observed], severe[:, observed] > 0
+    groups = groups[observed] if keys else pd.Index(['Hospital'], name='Scope')
+
+    begin = 2 * max(windows)
+    if score.shape[0] <= begin + horizon:
+        raise ValueError(f"Need more than {begin + horizon} days to backtest windows up to {max(windows)} "
+                         f"with a {horizon}-day horizon.")
+    planes = (score, severe, expanding_z(score))
+    jobs = [(window, smoother, list(sigmas), rule, horizon, accel_threshold, begin) for window in windows]
+    if workers == 1 or len(jobs) == 1:
+        results = [_score_window(*job, planes=planes) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(planes,)) as pool:
+            results = list(pool.map(_score_window, *zip(*jobs)))
+
+    policies, detail = [], []
+    for window, sigma_val, (counts, lead) in (policy for window_results in results for policy in window_results):
+        group_frame = pd.DataFrame(counts, index=groups).reset_index()
+        group_frame.insert(0, 'sigma', sigma_val)
+        group_frame.insert(0, 'window', window)
+        detail.append(group_frame)
+        totals = {name: int(values.sum()) for name, values in counts.items() if name != 'lead_days'}
+        policies.append({
+            'window': window, 'sigma': sigma_val, **totals,
+            'alert_rate': totals['alert_days'] / totals['days'],
+            'sensitivity': totals['anticipated'] / totals['events'] if totals['events'] else np.nan,
+            'median_lead_days': float(np.median(lead)) if len(lead) else np.nan,
+            'mean_lead_days': float(np.mean(lead)) if len(lead) else np.nan,
+            'false_alert_rate': totals['false_onsets'] / totals['onsets'] if totals['onsets'] else np.nan,
+            # Per group-year, so policies compare across scopes of any size
+            'false_alerts_per_year': totals['false_onsets'] / (totals['days'] / 365.25),
+        })
+    table = pd.DataFrame(policies).drop(columns='days')
+    detail = pd.concat(detail, ignore_index=True)
+    detail['lead_days'] = detail['lead_days'] / detail['anticipated'].where(detail['anticipated'] > 0)
+    return table, detail
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--csv', default=CSV_PATH)
+    parser.add_argument('--store', default=STORE_PATH)
+    parser.add_argument('--windows', type=int, nargs='+', default=[3, 7, 15])
+    parser.add_argument('--sigmas', type=int, nargs='+', default=[1, 2, 3])
+    parser.add_argument('--by', nargs='*', default=['Unit'], help="grouping ('Unit', 'Unit Category', or none)")
+    parser.add_argument('--smoother', default='mean')
+    parser.add_argument('--scheme', choices=list(SCHEMES), default=DEFAULT_SCHEME, help='harm weighting scheme')
+    parser.add_argument('--rule', choices=RULES, default='outside', help='what counts as an alert')
+    parser.add_argument('--accel-threshold', type=float, default=0.01, help="acceleration above which 'rising' fires")
+    parser.add_argument('--horizon', type=int, default=14, help='days ahead an alert may anticipate a severe event')
+    parser.add_argument('--start', help='first day of the replay (YYYY-MM-DD)')
+    parser.add_argument('--end', help='last day of the replay (YYYY-MM-DD)')
+    parser.add_argument('--workers', type=int, default=None, help='process pool size (default: all cores; 1 runs inline)')
+    parser.add_argument('--chunked', action='store_true', help='stream the CSV into daily aggregates (out-of-core)')
+    parser.add_argument('--out', help='write the policy comparison (.parquet, .csv or .json)')
+    parser.add_argument('--detail', help='write the per-group results (.parquet, .csv or .json)')
+    args = parser.parse_args(argv)
+    if tuple(args.by) not in GROUPINGS:
+        parser.error("--by must be 'Unit', 'Unit Category' or nothing (the whole hospital).")
+
+    t0 = time.perf_counter()
+    if args.chunked:
+        index = DailyIndex.from_aggregates(aggregate_csv_chunks(args.csv))
+    else:
+        index = DailyIndex.from_arrays(load_arrays(args.csv, args.store))
+    index = index.with_scheme(args.scheme)
+    load_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    table, detail = backtest(index, args.windows, args.sigmas, args.by or None, args.smoother, args.start, args.end,
+                             args.horizon, args.rule, args.accel_threshold, args.workers)
+    replay_s = time.perf_counter() - t0
+
+    print(f"Loaded {len(index.dates)} days × {len(index.units)} units in {load_s:.2f}s")
+    print(f"Replayed {len(table)} policies × {detail.groupby(['window', 'sigma']).size().iloc[0]} groups "
+          f"in {replay_s:.2f}s (rule '{args.rule}', {args.horizon}-day horizon)")
+    print(table.to_string(index=False, float_format=lambda v: f"{v:,.3f}"))
+    if args.out:
+        write_results(table, args.out)
+        print(f"Wrote {args.out}")
+    if args.detail:
+        write_results(detail, args.detail)
+        print(f"Wrote {args.detail}")
+
+
+if __name__ == '__main__':
+    main()
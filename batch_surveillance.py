@@ -0,0 +1,138 @@
+"""
+Headless batch surveillance: scores every scope without Streamlit.
+
+Loads the incident store once, then runs the kinetics and strategic status
+for the whole hospital, every unit, every category and every unit × category
+under each window/sigma combination, spreading scopes over a process pool.
+
+    python batch_surveillance.py --out board_pack.parquet
+    python batch_surveillance.py --out board_pack.csv --windows 7 --sigmas 2 3 --workers 4
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from daily_index import DailyIndex
+from diagnostics import finish_profile, stage, start_profile
+from data_store import CSV_PATH, STORE_PATH, aggregate_csv_chunks, write_results
+from risk_engine import calculate_daily_kinetics, get_strategic_status
+from shared_arrays import load_arrays
+
+_INDEX = None
+
+
+def _init_worker(index):
+    # Each worker receives the dense index once instead of once per scope
+    global _INDEX
+    _INDEX = index
+
+
+def list_scopes(index):
+    """
+    (scope, unit, category) for the hospital, units, categories and unit × category pairs.
+    """
+    scopes = [('Whole Hospital', None, None)]
+    scopes += [('Unit', unit, None) for unit in index.units]
+    scopes += [('Category', None, category) for category in index.categories]
+    observed = index.cube.range_counts(0, len(index.dates)).sum(axis=-1) > 0
+    scopes += [
+        ('Unit × Category', index.units[u], index.categories[c])
+        for u, c in zip(*np.nonzero(observed))
+    ]
+    return scopes
+
+
+def score_scope(scope, windows, sigmas, start=None, end=None, index=None):
+    """
+    Result rows for one scope across every window/sigma combination.
+    """
+    index = _INDEX if index is None else index
+    t0 = time.perf_counter()
+    name, unit, category = scope
+    daily = index.daily(unit, start, end, category=category)
+
+    rows = []
+    for window in windows:
+        # Derivatives depend only on the window; sigma only moves the UCL
+        kinetics, mean_val, std_val, _ = calculate_daily_kinetics(daily, window, sigmas[0])
+        settled = kinetics.dropna()
+        latest = settled.iloc[-1] if not settled.empty else None
+        for sigma_val in sigmas:
+            z_score, status, _, _, conf_pct = get_strategic_status(kinetics, mean_val, std_val, sigma_val)
+            rows.append({
+                'scope': name, 'unit': unit, 'category': category,
+                'window': window, 'sigma': sigma_val, 'days': len(kinetics),
+                'total_rpn': float(daily['weighted_score'].sum()),
+                'latest_date': None if latest is None else latest['Date'],
+                'latest_rpn': np.nan if latest is None else latest['weighted_score'],
+                'velocity': np.nan if latest is None else latest['velocity'],
+                'acceleration': np.nan if latest is None else latest['acceleration'],
+                'mean': mean_val, 'std': std_val, 'ucl': mean_val + sigma_val * std_val,
+                'z_score': z_score, 'status': status, 'confidence': conf_pct,
+            })
+    elapsed = time.perf_counter() - t0
+    for row in rows:
+        row['scope_seconds'] = elapsed
+    return rows
+
+
+def run(index, windows, sigmas, start=None, end=None, workers=None):
+    scopes = list_scopes(index)
+    if workers == 1:
+        results = [score_scope(scope, windows, sigmas, start, end, index) for scope in scopes]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(index,)) as pool:
+            futures = [pool.submit(score_scope, scope, windows, sigmas, start, end) for scope in scopes]
+            results = [future.result() for future in futures]
+    return pd.DataFrame([row for rows in results for row in rows])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--csv', default=CSV_PATH)
+    parser.add_argument('--store', default=STORE_PATH)
+    parser.add_argument('--out', default='surveillance_results.parquet', help='.parquet, .csv or .json')
+    parser.add_argument('--windows', type=int, nargs='+', default=[3, 7, 15])
+    parser.add_argument('--sigmas', type=int, nargs='+', default=[1, 2, 3])
+    parser.add_argument('--start', help='first day of the analysis period (YYYY-MM-DD)')
+    parser.add_argument('--end', help='last day of the analysis period (YYYY-MM-DD)')
+    parser.add_argument('--chunked', action='store_true', help='stream the CSV into daily aggregates (out-of-core)')
+    parser.add_argument('--profile', help='append per-stage timings of this run to a JSON lines file')
+    parser.add_argument('--workers', type=int, default=None, help='process pool size (default: all cores; 1 runs inline)')
+    args = parser.parse_args(argv)
+
+    profile = start_profile(bool(args.profile))
+    t0 = time.perf_counter()
+    with stage('load') as s:
+        if args.chunked:
+            index = DailyIndex.from_aggregates(aggregate_csv_chunks(args.csv))
+        else:
+            index = DailyIndex.from_arrays(load_arrays(args.csv, args.store))
+        s.rows = len(index.dates)
+    load_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with stage('score') as s:
+        table = run(index, args.windows, args.sigmas, args.start, args.end, args.workers)
+        s.rows = len(table)
+    score_s = time.perf_counter() - t0
+    with stage('write'):
+        write_results(table, args.out)
+    finish_profile(profile)
+    if profile is not None:
+        profile.write_jsonl(args.profile)
+
+    per_scope = table.groupby(['scope', 'unit', 'category'], dropna=False)['scope_seconds'].first()
+    print(f"Loaded {len(index.dates)} days × {len(index.units)} units in {load_s:.2f}s")
+    print(f"Scored {len(per_scope)} scopes ({len(table)} rows) in {score_s:.2f}s "
+          f"-> {len(per_scope) / score_s:.1f} scopes/s, {len(table) / score_s:.1f} rows/s")
+    print(f"Per scope: median {per_scope.median() * 1000:.1f} ms, max {per_scope.max() * 1000:.1f} ms")
+    print(f"Wrote {args.out}")
+    print(table['status'].value_counts().to_string())
+
+
+if __name__ == '__main__':
+    main()
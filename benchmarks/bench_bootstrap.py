@@ -0,0 +1,92 @@
+"""
+Bootstrap band benchmark: replicate throughput and dashboard latency.
+
+Times bootstrap.kinetics_bands (a batch of replicates per vectorized pass)
+against a per-replicate loop that runs calculate_daily_kinetics once per
+resampled series, for each smoother, then across process-pool sizes (the
+bands are identical for every pool size), and finally a cold versus cached
+cached_bands lookup as the dashboard does it.
+
+    python benchmarks/bench_bootstrap.py --days 90 1095 --replicates 400 --workers 1 2 4
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bootstrap import BAND_CACHE, block_rows, cached_bands, kinetics_bands  # noqa: E402
+from risk_engine import calculate_daily_kinetics  # noqa: E402
+from smoothing import SMOOTHERS, smooth  # noqa: E402
+from timing import timed  # noqa: E402
+
+
+def make_daily(days, seed):
+    rng = np.random.default_rng(seed)
+    weights = (np.arange(9) + 1) ** 2
+    probs = np.array([0.404, 0.198, 0.144, 0.078, 0.064, 0.050, 0.040, 0.018, 0.004])
+    counts = rng.multinomial(rng.poisson(2.0, size=days), probs / probs.sum())
+    return pd.DataFrame({'Date': pd.date_range('2022-01-01', periods=days, freq='D', name='Date'),
+                         'weighted_score': (counts @ weights).astype(float), 'raw_level': 0.0})
+
+
+def loop_bands(daily, window, smoother, replicates, seed=0):
+    # One resampled series and one calculate_daily_kinetics call per replicate
+    score = daily['weighted_score'].to_numpy(float)
+    fitted = smooth(score, window, smoother)
+    resid = score - fitted
+    block = min(max(window, round(len(score) ** (1 / 3))), len(score))
+    rows = block_rows(len(score), block, replicates, np.random.default_rng(seed))
+    draws = []
+    for r in range(replicates):
+        replicate = daily.assign(weighted_score=np.maximum(fitted + resid[rows[:, r]], 0))
+        kinetics, *_ = calculate_daily_kinetics(replicate, window, 2, smoother)
+        draws.append(kinetics['acceleration'].to_numpy())
+    return np.quantile(np.column_stack(draws), [0.05, 0.95], axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, nargs='+', default=[90, 1095])
+    parser.add_argument('--replicates', type=int, default=400)
+    parser.add_argument('--window', type=int, default=7)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2])
+    parser.add_argument('--loop-replicates', type=int, default=50, help='replicates timed in the loop (extrapolated)')
+    args = parser.parse_args()
+
+    rows = []
+    for days in args.days:
+        daily = make_daily(days, seed=days)
+        for smoother in SMOOTHERS:
+            _, loop_s = timed(loop_bands, daily, args.window, smoother, args.loop_replicates)
+            _, seconds = timed(kinetics_bands, daily, args.window, smoother, args.replicates)
+            rows.append({'days': days, 'path': f'{smoother}: per-replicate loop (extrapolated)',
+                         'ms': loop_s / args.loop_replicates * args.replicates * 1000})
+            rows.append({'days': days, 'path': f'{smoother}: vectorized batches', 'ms': seconds * 1000})
+
+        reference = None
+        for workers in args.workers:
+            bands, seconds = timed(kinetics_bands, daily, args.window, 'median', args.replicates, workers=workers)
+            rows.append({'days': days, 'path': f'median: workers={workers}', 'ms': seconds * 1000})
+            reference = bands if reference is None else reference
+            assert np.allclose(bands.iloc[:, 1:], reference.iloc[:, 1:], equal_nan=True)
+
+        BAND_CACHE.clear()
+        key = ('bench', days)
+        _, cold = timed(cached_bands, key, daily, args.window)
+        _, warm = timed(cached_bands, key, daily, args.window)
+        rows.append({'days': days, 'path': 'cached_bands cold', 'ms': cold * 1000})
+        rows.append({'days': days, 'path': 'cached_bands warm', 'ms': warm * 1000})
+
+    table = pd.DataFrame(rows).pivot(index='path', columns='days', values='ms')
+    print(f"{args.replicates} replicates, window {args.window}")
+    print(table.to_string(float_format=lambda v: f"{v:,.1f} ms"))
+
+
+if __name__ == '__main__':
+    main()
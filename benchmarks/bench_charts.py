@@ -0,0 +1,86 @@
+"""
+Chart payload benchmark: SPC + acceleration figures for a multi-year hourly
+or daily view, built from the full kinetics frame (legacy) vs the LTTB
+downsampled series of chart_data, and served from CHART_CACHE on a repeat
+rerun. Reports build + serialization time and the JSON bytes that
+st.plotly_chart would send to the browser.
+
+    python benchmarks/bench_charts.py --days 1095 --incidents 1e6
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from chart_data import MAX_POINTS, acceleration_series, cached_chart, trend_series  # noqa: E402
+from daily_index import DailyIndex, HourlyIndex  # noqa: E402
+from data_store import quantize_incidents  # noqa: E402
+from risk_engine import KineticsCache, cached_kinetics, kinetics_key  # noqa: E402
+from synthetic import generate_incidents  # noqa: E402
+
+
+def figures(trend, accel, ucl_value):
+    time_col = trend.columns[0]
+    spc = go.Figure()
+    spc.add_trace(go.Scatter(x=trend[time_col], y=trend['weighted_score']))
+    spc.add_trace(go.Scatter(x=trend[time_col], y=trend['smooth']))
+    spc.add_hline(y=ucl_value, line_dash='dot')
+    area = px.area(accel, x=accel.columns[0], y='acceleration')
+    return spc, area
+
+
+def render(figs):
+    # What st.plotly_chart does with a figure on every rerun
+    return sum(len(pio.to_json(f, validate=False)) for f in figs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=3 * 365)
+    parser.add_argument('--incidents', type=float, default=1e6)
+    parser.add_argument('--window', type=int, default=7)
+    parser.add_argument('--max-points', type=int, default=MAX_POINTS)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    df = quantize_incidents(generate_incidents(int(args.incidents), days=args.days, seed=args.seed))
+    views = {'daily': DailyIndex.from_incidents(df), 'hourly': HourlyIndex.from_incidents(df)}
+    del df
+
+    # Plotly validates and imports lazily on the first figure; keep that out of the timings
+    render(figures(pd.DataFrame({'t': [0], 'weighted_score': [0], 'smooth': [0]}), pd.DataFrame({'t': [0], 'acceleration': [0]}), 0))
+
+    rows = []
+    for name, index in views.items():
+        hours = 24 if name == 'daily' else 1
+        (daily, _, _, ucl_value), _ = cached_kinetics(index, None, None, None, args.window, 2, hours=hours)
+        key = kinetics_key(index, None, None, None, args.window, 2, hours=hours)
+        cache = KineticsCache()
+
+        def legacy():
+            return render(figures(daily, daily, ucl_value))
+
+        def downsampled():
+            return render(cached_chart(key, lambda: figures(
+                trend_series(daily, args.max_points), acceleration_series(daily, args.max_points), ucl_value), cache))
+
+        for path, fn in (('legacy', legacy), ('downsampled (cold)', downsampled), ('downsampled (cached)', downsampled)):
+            t0 = time.perf_counter()
+            payload = fn()
+            rows.append({'view': f"{name} ({len(daily):,} points)", 'path': path,
+                         'ms': (time.perf_counter() - t0) * 1000, 'payload_kb': payload / 1024})
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f"{v:,.1f}"))
+
+
+if __name__ == '__main__':
+    main()
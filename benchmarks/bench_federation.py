@@ -0,0 +1,75 @@
+"""
+Multi-site federation benchmark for 1 to 100 sites.
+
+For each site count, writes one synthetic export per site, then times the
+cold ingest (store + arrays built per site on the process pool), a warm
+reload (stores up to date), the optional sequential cold ingest, and the
+network roll-ups (per site, per unit type, per site × unit) computed from
+the merged counts.
+
+    python benchmarks/bench_federation.py --sites 1 10 100 --incidents 20000
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from federation import ROLLUPS, discover_sites, load_sites, rollup_kinetics, rollup_status  # noqa: E402
+from quantization import HARM_LEVELS  # noqa: E402
+from synthetic import write_csv  # noqa: E402
+from timing import timed  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sites', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--incidents', type=int, default=20_000, help='incidents per site')
+    parser.add_argument('--units', type=int, default=8)
+    parser.add_argument('--categories', type=int, default=5)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--window', type=int, default=7)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--sequential', action='store_true', help='also time a cold ingest with workers=1')
+    args = parser.parse_args()
+
+    rows = []
+    for n_sites in args.sites:
+        with tempfile.TemporaryDirectory() as tmp:
+            exports = os.path.join(tmp, 'exports')
+            os.makedirs(exports)
+            for k in range(n_sites):
+                write_csv(os.path.join(exports, f'site_{k:03d}.csv'), args.incidents, seed=k,
+                          units=args.units, categories=args.categories, days=args.days)
+            sites = discover_sites(exports)
+
+            def record(stage, seconds):
+                rows.append({'sites': n_sites, 'stage': stage, 'seconds': seconds})
+
+            network, seconds = timed(load_sites, sites, os.path.join(tmp, 'stores'), args.workers)
+            record('ingest (cold, pool)', seconds)
+            _, seconds = timed(load_sites, sites, os.path.join(tmp, 'stores'), args.workers)
+            record('ingest (warm, pool)', seconds)
+            if args.sequential:
+                _, seconds = timed(load_sites, sites, os.path.join(tmp, 'stores_seq'), 1)
+                record('ingest (cold, sequential)', seconds)
+            for level in ROLLUPS:
+                daily, seconds = timed(rollup_kinetics, network, level, args.window, 2)
+                record(f'rollup {level}', seconds)
+                _, seconds = timed(rollup_status, daily, 2)
+                record(f'status {level}', seconds)
+            dense = len(network.dates) * n_sites * len(network.units) * len(network.categories) * len(HARM_LEVELS) * 4
+            print(f"{n_sites} sites: {network.nbytes / 2**20:.1f} MB of per-site cubes "
+                  f"(a dense site × unit × category cube: {dense / 2**20:.1f} MB)", flush=True)
+
+    table = pd.DataFrame(rows).pivot(index='stage', columns='sites', values='seconds')
+    print(table.map(lambda s: f"{s * 1000:,.0f} ms").to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Top-K driver ranking benchmark on a multi-year synthetic history.
+
+For every ranking level, times the full aggregation a rerun used to pay
+(groupby over the incident frame, then sort for the top k) against
+hotspots.HotspotIndex.top for the whole history and for a 90-day range,
+and the velocity / acceleration rankings. Then times keeping the index
+current: one add() per micro-batch against rebuilding it. Every ranking is
+checked against the groupby result before it is reported.
+
+    python benchmarks/bench_hotspots.py --incidents 2e6 --units 40 --categories 12 --subcategories 6
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from hotspots import LEVELS, HotspotIndex  # noqa: E402
+from quantization import encode_harm, score  # noqa: E402
+from synthetic import generate_incidents  # noqa: E402
+from timing import timed  # noqa: E402
+
+
+def groupby_top(df, names, k, start=None):
+    frame = df if start is None else df[df['Date'] >= start]
+    totals = frame.groupby(list(names), observed=True)['weighted_score'].sum()
+    return totals[totals > 0].sort_values(ascending=False, kind='stable').head(k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--incidents', type=float, default=2e6)
+    parser.add_argument('--days', type=int, default=3 * 365)
+    parser.add_argument('--units', type=int, default=40)
+    parser.add_argument('--categories', type=int, default=12)
+    parser.add_argument('--subcategories', type=int, default=6)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--batch', type=int, default=50, help='incidents per add() micro-batch')
+    args = parser.parse_args()
+
+    df = generate_incidents(int(args.incidents), units=args.units, categories=args.categories,
+                            subcategories=args.subcategories, days=args.days)
+    df['weighted_score'] = score(encode_harm(df['Harm_Level']))
+    recent = df['Date'].max() - pd.Timedelta(days=89)
+    hotspots, build_s = timed(HotspotIndex.from_incidents, df, repeat=1)
+    print(f"{len(df):,} incidents, {hotspots.n} days; build {build_s * 1000:,.0f} ms")
+
+    rows = []
+    for level, names in LEVELS.items():
+        for label, start in (('all time', None), ('last 90 days', recent)):
+            expected, groupby_s = timed(groupby_top, df, names, args.k, start, repeat=5)
+            ranked, top_s = timed(hotspots.top, level, args.k, start=start, repeat=5)
+            assert np.allclose(ranked['rpn'].to_numpy(), expected.to_numpy())
+            rows.append({'level': level, 'query': f'rpn, {label}', 'groupby ms': groupby_s * 1000, 'top ms': top_s * 1000})
+        for by in ('velocity', 'acceleration'):
+            _, top_s = timed(hotspots.top, level, args.k, by=by, repeat=5)
+            rows.append({'level': level, 'query': by, 'groupby ms': np.nan, 'top ms': top_s * 1000})
+    table = pd.DataFrame(rows)
+    table['speedup'] = table['groupby ms'] / table['top ms']
+    print(table.to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+
+    # Keeping the ranking current: micro-batches on the latest day
+    latest = df[df['Date'] == df['Date'].max()]
+    batch = latest.sample(args.batch, replace=True, random_state=0)
+    _, add_s = timed(hotspots.add, batch, repeat=20)
+    print(f"add() of {args.batch} incidents: {add_s * 1000:,.2f} ms; rebuild: {build_s * 1000:,.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
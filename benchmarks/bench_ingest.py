@@ -0,0 +1,169 @@
+"""
+Ingestion throughput benchmark: incidents per second through ingest_service.
+
+Feeds --incidents synthetic incidents (for the latest days of a multi-year
+history) through each source: the in-process queue (dicts), a tailed JSON
+lines file and a TCP socket. The service validates, quantizes, appends to a
+scratch CSV and folds every batch into the DailyIndex. Reports end-to-end
+incidents/s per source, the per-batch cost of each stage, and how many
+cached dashboard views (unit × date range) keep their cache key after one
+batch. Everything runs on one event loop, so this is one core.
+
+    python benchmarks/bench_ingest.py --incidents 100000 --batch 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from daily_index import DailyIndex  # noqa: E402
+from data_store import quantize_incidents  # noqa: E402
+from ingest_service import (CSV_COLUMNS, FileTailSource, IngestService, QueueSource, SocketSource,  # noqa: E402
+                            parse_records, validate)
+from risk_engine import kinetics_key  # noqa: E402
+from synthetic import SCHEMA, generate_incidents  # noqa: E402
+
+
+def feed_records(n, units, seed):
+    # Incidents for the last week of the history, as the feed would send them
+    df = generate_incidents(n, units=units, categories=12, days=7, start='2027-12-25', seed=seed)
+    df['Date'] = df['Date'].dt.strftime('%Y-%m-%d')
+    return df[SCHEMA].astype(str).to_dict('records')
+
+
+async def drive(service, source, feed, n):
+    # Runs the service until n incidents are accepted; returns the wall time
+    task = asyncio.create_task(service.run([source]))
+    t0 = time.perf_counter()
+    await feed()
+    while service.accepted < n:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.005)
+    seconds = time.perf_counter() - t0
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    return seconds
+
+
+def run_source(kind, index, records, workdir, batch, port):
+    csv_path = os.path.join(workdir, f'{kind}.csv')
+    with open(csv_path, 'w') as fh:
+        fh.write(','.join(CSV_COLUMNS) + '\n')
+    service = IngestService(index, csv_path, os.path.join(workdir, f'{kind}_store'), batch_size=batch,
+                            max_delay=0.05, sync_seconds=0)
+    lines = [json.dumps(r) for r in records]
+
+    async def main():
+        if kind == 'queue':
+            source = QueueSource()
+
+            async def feed():
+                for lo in range(0, len(records), 100):
+                    await source.queue.put(records[lo:lo + 100])
+        elif kind == 'tail':
+            path = os.path.join(workdir, 'feed.jsonl')
+            open(path, 'w').close()
+            source = FileTailSource(path, poll=0.01)
+
+            async def feed():
+                await asyncio.sleep(0.05)
+                with open(path, 'a') as fh:
+                    for lo in range(0, len(lines), 5000):
+                        fh.write('\n'.join(lines[lo:lo + 5000]) + '\n')
+                        fh.flush()
+                        await asyncio.sleep(0)
+        else:
+            source = SocketSource('127.0.0.1', port)
+
+            async def feed():
+                for _ in range(100):
+                    try:
+                        _, writer = await asyncio.open_connection('127.0.0.1', port)
+                        break
+                    except OSError:
+                        await asyncio.sleep(0.01)
+                for lo in range(0, len(lines), 1000):
+                    writer.write(('\n'.join(lines[lo:lo + 1000]) + '\n').encode())
+                    await writer.drain()
+                writer.close()
+        return await drive(service, source, feed, len(records))
+
+    seconds = asyncio.run(main())
+    return service, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--incidents', type=int, default=100_000)
+    parser.add_argument('--history', type=float, default=1e6, help='incidents in the loaded history')
+    parser.add_argument('--units', type=int, default=40)
+    parser.add_argument('--batch', type=int, default=1000)
+    parser.add_argument('--port', type=int, default=18503)
+    args = parser.parse_args()
+
+    history = generate_incidents(int(args.history), units=args.units, categories=12, days=3 * 365)
+    index = DailyIndex.from_incidents(history)
+    del history
+    records = feed_records(args.incidents, args.units, seed=1)
+    print(f"History {len(index.dates)} days × {len(index.units)} units × {len(index.categories)} categories; "
+          f"feeding {len(records):,} incidents in batches of up to {args.batch}")
+
+    workdir = tempfile.mkdtemp(prefix='bench_ingest_')
+    rows = []
+    try:
+        for kind in ('queue', 'tail', 'socket'):
+            service, seconds = run_source(kind, index, records, workdir, args.batch, args.port)
+            assert service.index.incidents.sum() == index.incidents.sum() + len(records)
+            rows.append({'source': kind, 'batches': service.batches, 'seconds': seconds,
+                         'incidents/s': len(records) / seconds})
+        print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+
+        # Per-batch cost of each stage
+        batch = records[:args.batch]
+        stages = {}
+        t0 = time.perf_counter()
+        raw = parse_records(batch)
+        stages['parse'] = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        accepted, _ = validate(raw)
+        stages['validate'] = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        incidents = quantize_incidents(accepted)
+        stages['quantize'] = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        accepted[CSV_COLUMNS].to_csv(os.path.join(workdir, 'stage.csv'), header=False, index=False)
+        stages['append CSV'] = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        updated = index.append(incidents)
+        stages['index append'] = time.perf_counter() - t0
+        print(f"Per batch of {len(batch)}: " + ', '.join(f"{name} {s * 1000:.1f} ms" for name, s in stages.items()))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # Cached views surviving one batch: every unit and the hospital over a few ranges
+    ends = [None, index.dates[-30], index.dates[-365]]
+    views = [(unit, end) for unit in [None] + list(index.units) for end in ends]
+    small = index.append(incidents[incidents['Unit'].isin(index.units[:3])])
+    kept = {}
+    for label, after in (('one batch, all units', updated), ('one batch, 3 units', small)):
+        kept[label] = np.mean([kinetics_key(index, u, None, e, 7, 2) == kinetics_key(after, u, None, e, 7, 2) for u, e in views])
+    print(', '.join(f"{label}: {share:.0%} of {len(views)} cached views kept" for label, share in kept.items()))
+
+
+if __name__ == '__main__':
+    main()
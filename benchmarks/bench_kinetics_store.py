@@ -0,0 +1,92 @@
+"""
+Kinetics store benchmark on a multi-year synthetic history.
+
+Times syncing the store from scratch and after one appended day, then the
+dashboard path: stored_kinetics (one unit's partitions read from disk)
+against cached_kinetics recomputing the same series, both cold. Finally a
+90-day range for one unit read with partition and row-group pruning
+against reading the configuration whole and filtering in pandas. The stored
+series are checked against the recomputed ones before anything is reported.
+
+    python benchmarks/bench_kinetics_store.py --incidents 2e6 --days 1095 --units 40
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from daily_index import DailyIndex  # noqa: E402
+from kinetics_store import config_path, read_kinetics, stored_kinetics, sync_kinetics  # noqa: E402
+from risk_engine import KineticsCache, cached_kinetics  # noqa: E402
+from synthetic import generate_incidents  # noqa: E402
+from timing import timed  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--incidents', type=float, default=2e6)
+    parser.add_argument('--days', type=int, default=3 * 365)
+    parser.add_argument('--units', type=int, default=40)
+    parser.add_argument('--window', type=int, default=7)
+    parser.add_argument('--smoother', default='median')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    df = generate_incidents(int(args.incidents), units=args.units, categories=12, days=args.days)
+    last = df['Date'].max()
+    before = DailyIndex.from_incidents(df[df['Date'] < last])
+    index = DailyIndex.from_incidents(df)
+    unit = index.units[0]
+    del df
+    store = tempfile.mkdtemp(prefix='kinetics_store_')
+    rows = []
+    try:
+        # 1. Keeping the store current
+        (_, months), seconds = timed(sync_kinetics, before, args.window, args.smoother, store)
+        rows.append({'path': f'sync from scratch ({months} months)', 'ms': seconds * 1000})
+        (_, months), seconds = timed(sync_kinetics, index, args.window, args.smoother, store)
+        rows.append({'path': f'sync after one appended day ({months} month)', 'ms': seconds * 1000})
+
+        # 2. Dashboard view (full history, one unit), cold
+        stored = computed = 0.0
+        for _ in range(args.repeat):
+            (view, *_), seconds = timed(stored_kinetics, index, unit, None, None, args.window, 2, args.smoother, store,
+                                        cache=KineticsCache())
+            stored += seconds / args.repeat
+            (expected, *_), seconds = timed(cached_kinetics, index, unit, None, None, args.window, 2,
+                                            cache=KineticsCache(), smoother=args.smoother)
+            computed += seconds / args.repeat
+        pd.testing.assert_frame_equal(view[0], expected[0], check_exact=True)
+        rows.append({'path': 'dashboard view: stored_kinetics', 'ms': stored * 1000})
+        rows.append({'path': 'dashboard view: recompute (cached_kinetics miss)', 'ms': computed * 1000})
+
+        # 3. Analyst query: one unit, last 90 days
+        start = last - pd.Timedelta(days=89)
+        pruned = whole = 0.0
+        for _ in range(args.repeat):
+            ranged, seconds = timed(read_kinetics, unit, start, last, args.window, args.smoother, store_path=store)
+            pruned += seconds / args.repeat
+            frame, seconds = timed(pd.read_parquet, config_path(args.window, args.smoother, store_path=store))
+            frame = frame[(frame['Unit'] == unit) & (frame['Date'] >= start)]
+            whole += seconds / args.repeat
+        assert len(ranged) == len(frame) == 90
+        assert np.allclose(ranged['acceleration'], view[0]['acceleration'].iloc[-90:], equal_nan=True)
+        rows.append({'path': '90 days of one unit: pruned read', 'ms': pruned * 1000})
+        rows.append({'path': '90 days of one unit: whole read + filter', 'ms': whole * 1000})
+    finally:
+        shutil.rmtree(store, ignore_errors=True)
+
+    print(f"{len(index.dates)} days × {len(index.units) + 1} scopes, window {args.window}, {args.smoother}")
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f"{v:,.1f}"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Cold-load benchmark: legacy CSV parse + dict .map quantization vs the columnar
+store vs chunked out-of-core aggregation (where "frame" is the daily aggregate).
+
+Each measurement runs in a fresh interpreter so timings and resident memory
+reflect a cold Streamlit start rather than a warm cache.
+
+    python benchmarks/bench_load.py --repeat 2000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LEGACY = """
+import pandas as pd
+df = pd.read_csv({csv!r}, parse_dates=['Date'])
+df['weighted_score'] = df['Harm_Level'].map({{chr(65+i): (i+1)**2 for i in range(9)}})
+df['raw_level'] = df['Harm_Level'].map({{chr(65+i): i+1 for i in range(9)}})
+"""
+
+STORE = """
+import sys
+sys.path.insert(0, {root!r})
+from data_store import load_incidents
+df = load_incidents({csv!r}, {store!r})
+"""
+
+CHUNKED = """
+import sys
+sys.path.insert(0, {root!r})
+from data_store import aggregate_csv_chunks
+from daily_index import DailyIndex
+df = aggregate_csv_chunks({csv!r}, chunksize=250_000)
+index = DailyIndex.from_aggregates(df)
+"""
+
+PROBE = """
+import resource, time
+t0 = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - t0
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, df.memory_usage(deep=True).sum(), len(df))
+"""
+
+
+def make_csv(repeat, path):
+    """
+    Tiles the shipped sample CSV to reach a realistic incident volume.
+    """
+    with open(os.path.join(ROOT, 'hospital_risk_data.csv')) as fh:
+        header, *rows = fh.read().splitlines()
+    with open(path, 'w') as out:
+        out.write(header + '\n')
+        for _ in range(repeat):
+            out.write('\n'.join(rows) + '\n')
+
+
+def run(body):
+    out = subprocess.run([sys.executable, '-c', PROBE.format(body=body)], capture_output=True, text=True, check=True)
+    seconds, max_rss_kb, frame_bytes, rows = out.stdout.split()
+    return {'seconds': float(seconds), 'max_rss_mb': int(max_rss_kb) / 1024, 'frame_mb': int(frame_bytes) / 2**20, 'rows': int(rows)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=200, help='times to tile the sample CSV (500 rows each)')
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv, store = os.path.join(tmp, 'incidents.csv'), os.path.join(tmp, 'store')
+        make_csv(args.repeat, csv)
+
+        build = run(STORE.format(root=ROOT, csv=csv, store=store))
+        results = {'csv_mb': os.path.getsize(csv) / 2**20, 'store_build': build, 'legacy': [], 'store': [], 'chunked': []}
+        for _ in range(args.runs):
+            results['legacy'].append(run(LEGACY.format(csv=csv)))
+            results['store'].append(run(STORE.format(root=ROOT, csv=csv, store=store)))
+            results['chunked'].append(run(CHUNKED.format(root=ROOT, csv=csv)))
+        results['store_mb'] = sum(
+            os.path.getsize(os.path.join(store, f)) for f in os.listdir(store) if f.endswith('.parquet')
+        ) / 2**20
+
+    print(json.dumps(results, indent=2))
+    for path in ('legacy', 'store', 'chunked'):
+        best = min(results[path], key=lambda r: r['seconds'])
+        print(f"{path:>7}: {best['seconds']:.3f}s  rss {best['max_rss_mb']:.0f} MB  frame {best['frame_mb']:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
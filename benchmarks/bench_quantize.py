@@ -0,0 +1,81 @@
+"""
+Harm_Level quantization benchmark on 10^7 incidents.
+
+Compares the legacy object-dtype path (Series.map of a {level: weight} dict,
+repeated for every weighting scheme) against quantization.encode_harm (one
+uint8 code array) followed by a lookup-table take per scheme, for both
+string and categorical Harm_Level columns. Then times re-scoring a
+DailyIndex under each scheme with with_scheme() against rebuilding it.
+Every result is checked against the legacy path before it is reported.
+
+    python benchmarks/bench_quantize.py --rows 1e7
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from daily_index import DailyIndex  # noqa: E402
+from quantization import HARM_LEVELS, SCHEMES, encode_harm, score  # noqa: E402
+from synthetic import generate_incidents  # noqa: E402
+from timing import timed  # noqa: E402
+
+
+def legacy_scores(levels):
+    # One string-keyed map per scheme, as app.load_data / archive/analytics.py did
+    return {name: levels.map({chr(65 + i): w for i, w in enumerate(weights)}) for name, weights in SCHEMES.items()}
+
+
+def lut_scores(levels):
+    codes = encode_harm(levels)
+    return {name: score(codes, name) for name in SCHEMES}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=float, default=1e7)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    df = generate_incidents(int(args.rows), units=20, categories=10, days=3 * 365, seed=args.seed)
+    categorical = df['Harm_Level']
+    strings = categorical.astype(object)
+    print(f"{len(df):,} incidents, {len(SCHEMES)} schemes")
+
+    rows = []
+    expected, seconds = timed(legacy_scores, strings)
+    rows.append({'path': 'object Series.map (all schemes)', 'seconds': seconds})
+    for label, levels in (('string', strings), ('categorical', categorical)):
+        codes, encode_s = timed(encode_harm, levels)
+        rows.append({'path': f'encode_harm ({label})', 'seconds': encode_s})
+        got, seconds = timed(lut_scores, levels)
+        rows.append({'path': f'encode + LUT take ({label}, all schemes)', 'seconds': seconds})
+        for name in SCHEMES:
+            assert np.array_equal(got[name], expected[name].to_numpy()), name
+    codes = encode_harm(categorical)
+    _, seconds = timed(lambda: [score(codes, name) for name in SCHEMES])
+    rows.append({'path': 'LUT take only (all schemes)', 'seconds': seconds})
+
+    index, seconds = timed(DailyIndex.from_incidents, df)
+    rows.append({'path': 'DailyIndex rebuild', 'seconds': seconds})
+    for name in SCHEMES:
+        view, seconds = timed(index.with_scheme, name)
+        rows.append({'path': f'DailyIndex.with_scheme({name!r})', 'seconds': seconds})
+        totals = view.daily()['weighted_score'].sum()
+        assert totals == expected[name].sum(), name
+
+    table = pd.DataFrame(rows)
+    table['ms'] = table['seconds'] * 1000
+    print(table[['path', 'ms']].to_string(index=False, float_format=lambda v: f"{v:,.1f}"))
+    print(f"Harm_Level codes: {codes.nbytes / 2**20:.0f} MB uint8 "
+          f"(object strings: {strings.memory_usage(deep=True) / 2**20:.0f} MB); levels {''.join(HARM_LEVELS)}")
+
+
+if __name__ == '__main__':
+    main()
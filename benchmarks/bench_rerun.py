@@ -0,0 +1,114 @@
+"""
+Dashboard rerun latency over a sweep of sidebar settings.
+
+The legacy path is the original app.py body (row-wise date filter, .copy(),
+groupby hotspot / category sum / Date × Unit pivot on incidents); the index
+path slices the dense DailyIndex and answers range totals from its prefix cube.
+
+    python benchmarks/bench_rerun.py --repeat 40
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from daily_index import DailyIndex  # noqa: E402
+from data_store import load_incidents  # noqa: E402
+from risk_engine import calculate_daily_kinetics, get_strategic_status  # noqa: E402
+
+
+def make_incidents(repeat):
+    """
+    Repeats the shipped sample, shifting each copy one sample-span later, so
+    both the incident count and the date range grow.
+    """
+    base = load_incidents(os.path.join(ROOT, 'hospital_risk_data.csv'), os.path.join(ROOT, 'risk_store'))
+    span = base['Date'].max() - base['Date'].min() + pd.Timedelta(days=1)
+    copies = []
+    for k in range(repeat):
+        copy = base.copy()
+        copy['Date'] = copy['Date'] + k * span
+        copies.append(copy)
+    df = pd.concat(copies, ignore_index=True)
+    for col in ('Unit', 'Category', 'Subcategory', 'Harm_Level'):
+        df[col] = df[col].astype('category')
+    return df
+
+
+def legacy_rerun(df, unit, start_date, end_date, window, sigma_val):
+    df_f = df[(df['Date'].dt.date >= start_date) & (df['Date'].dt.date <= end_date)].copy()
+    if unit is not None:
+        df_f = df_f[df_f['Unit'] == unit]
+
+    daily = df_f.groupby('Date').agg({'weighted_score': 'sum', 'raw_level': 'mean'}).reset_index()
+    daily['smooth'] = daily['weighted_score'].rolling(window, center=True, min_periods=1).mean()
+    daily['velocity'] = daily['smooth'].diff(window) / window
+    daily['acceleration'] = daily['velocity'].diff(window) / window
+    mean_val, std_val = daily['weighted_score'].mean(), daily['weighted_score'].std()
+    get_strategic_status(daily, mean_val, std_val, sigma_val)
+
+    if not df_f.empty:
+        df_f.groupby(['Unit', 'Category'], observed=True)['weighted_score'].sum().idxmax()
+    df_f.groupby('Category', observed=True)['weighted_score'].sum().sort_values()
+    pivot = df_f.groupby(['Date', 'Unit'], observed=True)['weighted_score'].sum().unstack().fillna(0)
+    pivot.resample('W').sum().T
+
+
+def index_rerun(index, unit, start_date, end_date, window, sigma_val):
+    daily = index.daily(unit, start_date, end_date)
+    daily, mean_val, std_val, _ = calculate_daily_kinetics(daily, window, sigma_val)
+    get_strategic_status(daily, mean_val, std_val, sigma_val)
+    index.hotspot(unit, start_date, end_date)
+    index.category_totals(unit, start_date, end_date)
+    index.weekly_matrix(unit, start_date, end_date)
+
+
+def sweep(index, n_ranges, seed):
+    """
+    Sidebar combinations: scope/unit × date range × window × sigma.
+    """
+    rng = np.random.default_rng(seed)
+    days = index.dates
+    ranges = [(days[0].date(), days[-1].date())]
+    for _ in range(n_ranges - 1):
+        a, b = sorted(rng.integers(0, len(days), size=2))
+        ranges.append((days[a].date(), days[b].date()))
+    units = [None] + list(index.units)
+    return list(itertools.product(units, ranges, [3, 7, 15], [1, 2, 3]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20, help='copies of the 500-row sample, each shifted in time')
+    parser.add_argument('--ranges', type=int, default=4, help='date ranges in the sweep (first is the full range)')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    df = make_incidents(args.repeat)
+    t0 = time.perf_counter()
+    index = DailyIndex.from_incidents(df)
+    build_s = time.perf_counter() - t0
+
+    results = {'incidents': len(df), 'days': len(index.dates), 'index_build_s': build_s}
+    for name, fn, source in (('legacy', legacy_rerun, df), ('index', index_rerun, index)):
+        latencies = []
+        for unit, (start, end), window, sigma_val in sweep(index, args.ranges, args.seed):
+            t0 = time.perf_counter()
+            fn(source, unit, start, end, window, sigma_val)
+            latencies.append(time.perf_counter() - t0)
+        lat = np.array(latencies) * 1000
+        results[name] = {'reruns': len(lat), 'median_ms': float(np.median(lat)), 'p95_ms': float(np.percentile(lat, 95)), 'max_ms': float(lat.max())}
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Memory of N concurrent readers of the incident data (Linux only).
+
+Each reader is a separate process, standing in for a Streamlit worker, a
+risk_api.py or a batch worker. The "frame" path gives each reader a private
+load_incidents DataFrame and runs the legacy filter (a boolean index plus
+.copy()). The "shared" path memory-maps IncidentArrays and filters to row
+selections. PSS (proportional set size) splits shared pages between their
+users, so the summed PSS is the real footprint.
+
+    python benchmarks/bench_shared.py --incidents 1e7 --readers 1 8 32
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def memory_kb():
+    fields = {}
+    with open('/proc/self/smaps_rollup') as fh:
+        for line in fh:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return fields['Rss'], fields['Pss']
+
+
+def reader(mode, csv, store, unit, start, barrier, results):
+    sys.path.insert(0, ROOT)
+    from data_store import load_incidents
+    from shared_arrays import load_arrays
+
+    base_rss, base_pss = memory_kb()
+    t0 = time.perf_counter()
+    if mode == 'frame':
+        df = load_incidents(csv, store)
+        # The legacy per-session filter: boolean index + copy
+        view = df[(df['Date'] >= start) & (df['Unit'] == unit)].copy()
+        total = int(view['weighted_score'].sum())
+    else:
+        arrays = load_arrays(csv, store)
+        selection = arrays.select(unit, start=start)
+        total = int(arrays.weighted_score[selection].sum(dtype='int64'))
+        # Touch every column once, as building the indexes does
+        for col in ('day', 'hour', 'unit', 'category', 'subcategory', 'harm', 'weighted_score', 'raw_level'):
+            getattr(arrays, col).max()
+    seconds = time.perf_counter() - t0
+    barrier.wait()
+    rss, pss = memory_kb()
+    results.put({'rss_mb': (rss - base_rss) / 1024, 'pss_mb': (pss - base_pss) / 1024, 'seconds': seconds, 'total': total})
+    barrier.wait()
+
+
+def measure(mode, readers, csv, store, unit, start):
+    ctx = mp.get_context('spawn')
+    barrier, results = ctx.Barrier(readers), ctx.Queue()
+    procs = [ctx.Process(target=reader, args=(mode, csv, store, unit, start, barrier, results)) for _ in range(readers)]
+    for p in procs:
+        p.start()
+    rows = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return {
+        'mode': mode, 'readers': readers,
+        'rss_mb_total': sum(r['rss_mb'] for r in rows), 'pss_mb_total': sum(r['pss_mb'] for r in rows),
+        'load_s_median': sorted(r['seconds'] for r in rows)[len(rows) // 2],
+        'checksum': rows[0]['total'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--incidents', type=float, default=2e6)
+    parser.add_argument('--readers', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    import pandas as pd
+    from synthetic import write_csv
+    from shared_arrays import load_arrays
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv, store = os.path.join(tmp, 'incidents.csv'), os.path.join(tmp, 'store')
+        write_csv(csv, int(args.incidents), units=40, categories=12, days=3 * 365, seed=args.seed)
+        # Build the store and arrays once so every reader measures a warm load
+        arrays = load_arrays(csv, store)
+        print(f"{len(arrays):,} incidents, {arrays.nbytes() / 2**20:.0f} MB of shared arrays")
+
+        start = str(arrays.day[len(arrays) // 4])
+        rows = []
+        for readers in args.readers:
+            for mode in ('frame', 'shared'):
+                rows.append(measure(mode, readers, csv, store, str(arrays.units[0]), start))
+        table = pd.DataFrame(rows)
+        assert table['checksum'].nunique() == 1
+        print(table.drop(columns='checksum').to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Dashboard cold start: time to the first KPI card.
+
+Each sample runs app.py under Streamlit's AppTest in a fresh interpreter, so
+imports, st.cache_resource and the kinetics caches start cold, and records
+when the first KPI card (the first 'metric-box' markdown) is emitted and when
+the whole script finishes, both from interpreter start. A second session in
+the same process gives the warm figures. --rev also runs the app.py of an
+earlier git revision against the current modules, for a before/after
+comparison of the page layout itself. The "floor" row is a one-card app:
+the cost of the interpreter, Streamlit and AppTest alone.
+
+    python benchmarks/bench_startup.py --runs 5 --rev HEAD~1
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+T0 = time.perf_counter()
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child(app_path):
+    # Runs in the fresh interpreter: time one cold and one warm session
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    stamp = {}
+    markdown = st.markdown
+
+    def timed_markdown(body, *args, **kwargs):
+        if 'metric-box' in str(body) and 'kpi' not in stamp:
+            stamp['kpi'] = time.perf_counter()
+        return markdown(body, *args, **kwargs)
+
+    st.markdown = timed_markdown
+    result = {}
+    for run in ('cold', 'warm'):
+        stamp.clear()
+        started = T0 if run == 'cold' else time.perf_counter()
+        at = AppTest.from_file(app_path, default_timeout=600).run()
+        if at.exception:
+            raise RuntimeError(at.exception)
+        result[f'{run}_kpi_ms'] = (stamp['kpi'] - started) * 1000
+        result[f'{run}_total_ms'] = (time.perf_counter() - started) * 1000
+    print(json.dumps(result))
+
+
+def sample(app_path):
+    out = subprocess.run([sys.executable, __file__, '--child', app_path], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--rev', help='also measure app.py from this git revision (e.g. HEAD~1)')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child)
+
+    floor = os.path.join(ROOT, '_bench_startup_floor.py')
+    with open(floor, 'w') as fh:
+        fh.write("import streamlit as st\nst.markdown('<div class=\"metric-box\"></div>', unsafe_allow_html=True)\n")
+    apps = {'floor': floor, 'current': os.path.join(ROOT, 'app.py')}
+    if args.rev:
+        # Written next to app.py so it imports the same modules
+        path = os.path.join(ROOT, '_bench_startup_app.py')
+        with open(path, 'w') as fh:
+            fh.write(subprocess.run(['git', 'show', f'{args.rev}:app.py'], cwd=ROOT, capture_output=True, text=True, check=True).stdout)
+        apps = {'floor': floor, args.rev: path, 'current': apps['current']}
+
+    import pandas as pd
+    rows = []
+    try:
+        for label, path in apps.items():
+            for _ in range(args.runs):
+                rows.append({'app': label, **sample(path)})
+    finally:
+        for label in ('floor', args.rev):
+            if label in apps:
+                os.remove(apps[label])
+    table = pd.DataFrame(rows).groupby('app', sort=False).median()
+    print(f"median of {args.runs} fresh interpreters (ms from interpreter start; warm = second session)")
+    print(table.to_string(float_format=lambda v: f"{v:,.0f}"))
+
+
+if __name__ == '__main__':
+    main()
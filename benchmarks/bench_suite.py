@@ -0,0 +1,173 @@
+"""
+Scaling benchmark for risk_engine and the dashboard aggregations.
+
+For each incident count, generates a seeded synthetic dataset and times every
+stage (quantization, kinetics, status, hotspot / category / weekly views on
+both the legacy incident-level path and the daily index), recording wall time
+and peak traced memory. Results are saved as JSON; pass --compare to diff
+against a previous run.
+
+    python benchmarks/bench_suite.py --sizes 1e3 1e4 1e5 1e6 --out bench.json
+    python benchmarks/bench_suite.py --sizes 1e5 --compare bench.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from daily_index import DailyIndex, HourlyIndex  # noqa: E402
+from data_store import quantize_incidents  # noqa: E402
+from risk_engine import (  # noqa: E402
+    calculate_group_kinetics, calculate_hourly_kinetics, calculate_risk_kinetics, get_strategic_status,
+)
+from synthetic import generate_incidents  # noqa: E402
+
+
+def measure(fn, *args):
+    """
+    (result, seconds, peak MB) for one call. Time is taken on an untraced
+    call because tracemalloc slows allocation-heavy pandas code; peak
+    memory comes from a second, traced call.
+    """
+    gc.collect()
+    t0 = time.perf_counter()
+    result = fn(*args)
+    seconds = time.perf_counter() - t0
+
+    gc.collect()
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak / 2**20
+
+
+def legacy_hotspot(df):
+    return df.groupby(['Unit', 'Category'], observed=True)['weighted_score'].sum().idxmax()
+
+
+def legacy_category_sum(df):
+    return df.groupby('Category', observed=True)['weighted_score'].sum().sort_values()
+
+
+def legacy_weekly(df):
+    pivot = df.groupby(['Date', 'Unit'], observed=True)['weighted_score'].sum().unstack().fillna(0)
+    return pivot.resample('W').sum().T
+
+
+def check_grouped(df, grouped, index, window):
+    """
+    Grouped kinetics share the index calendar; per unit they must equal
+    calculate_risk_kinetics over that calendar's explicit bounds.
+    """
+    start, end = index.dates[0], index.dates[-1]
+    for unit in grouped['Unit'].unique():
+        expected, mean_val, std_val, ucl_value = calculate_risk_kinetics(df[df['Unit'] == unit], window, 2, start, end)
+        got = grouped[grouped['Unit'] == unit]
+        for col in ('weighted_score', 'raw_level', 'smooth', 'velocity', 'acceleration'):
+            assert np.allclose(got[col].to_numpy(), expected[col].to_numpy(), equal_nan=True), (unit, col)
+        assert np.allclose(got[['mean', 'std', 'ucl']].iloc[0].to_numpy(), [mean_val, std_val, ucl_value]), unit
+
+
+def run_size(n, args):
+    raw = generate_incidents(n, units=args.units, categories=args.categories, days=args.days, seed=args.seed)
+    rows = []
+
+    def record(stage, fn, *fn_args):
+        result, seconds, peak_mb = measure(fn, *fn_args)
+        rows.append({'size': n, 'stage': stage, 'seconds': seconds, 'peak_mb': peak_mb})
+        return result
+
+    df = record('quantize', quantize_incidents, raw)
+    del raw
+    daily, mean_val, std_val, _ = record('calculate_risk_kinetics', calculate_risk_kinetics, df, args.window, 2)
+    record('get_strategic_status', get_strategic_status, daily, mean_val, std_val, 2)
+    record('legacy_hotspot', legacy_hotspot, df)
+    record('legacy_category_sum', legacy_category_sum, df)
+    record('legacy_weekly_pivot', legacy_weekly, df)
+
+    index = record('daily_index_build', DailyIndex.from_incidents, df)
+    grouped = record('group_kinetics_unit', calculate_group_kinetics, index, 'Unit', args.window, 2)
+    check_grouped(df, grouped, index, args.window)
+    record('group_kinetics_unit_category', calculate_group_kinetics, index, ['Unit', 'Category'], args.window, 2)
+    record('index_hotspot', index.hotspot)
+    record('index_category_sum', index.category_totals)
+    record('index_weekly_matrix', index.weekly_matrix)
+
+    hourly = record('hourly_index_build', HourlyIndex.from_incidents, df)
+    record('hourly_kinetics_all_units', calculate_hourly_kinetics, hourly, args.window, 2)
+    record('shift_kinetics_all_units', calculate_hourly_kinetics, hourly, args.window, 2, None, None, 8, 7)
+    return rows
+
+
+def git_revision():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as fh:
+        baseline = json.load(fh)
+    key = ['size', 'stage']
+    merged = pd.DataFrame(current['results']).merge(pd.DataFrame(baseline['results']), on=key, suffixes=('', '_base'))
+    merged['time_ratio'] = merged['seconds'] / merged['seconds_base']
+    merged['mem_ratio'] = merged['peak_mb'] / merged['peak_mb_base']
+    print(f"\nvs {baseline_path} ({baseline['meta'].get('revision')}):")
+    print(merged[key + ['seconds_base', 'seconds', 'time_ratio', 'peak_mb_base', 'peak_mb', 'mem_ratio']].to_string(index=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1e3, 1e4, 1e5, 1e6],
+                        help='incident counts, up to 1e8 (needs tens of GB of RAM)')
+    parser.add_argument('--units', type=int, default=40)
+    parser.add_argument('--categories', type=int, default=12)
+    parser.add_argument('--days', type=int, default=3 * 365)
+    parser.add_argument('--window', type=int, default=7)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='bench_results.json')
+    parser.add_argument('--compare', help='previous results JSON to compare against')
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        n = int(size)
+        print(f"size {n:,} ...", flush=True)
+        results.extend(run_size(n, args))
+
+    report = {
+        'meta': {
+            'revision': git_revision(), 'python': platform.python_version(),
+            'pandas': pd.__version__, 'numpy': np.__version__,
+            'units': args.units, 'categories': args.categories, 'days': args.days,
+            'window': args.window, 'seed': args.seed,
+        },
+        'results': results,
+    }
+    with open(args.out, 'w') as fh:
+        json.dump(report, fh, indent=2)
+
+    table = pd.DataFrame(results).pivot(index='stage', columns='size', values='seconds')
+    print(table.map(lambda s: f"{s * 1000:.1f} ms").to_string())
+    print(f"Saved {args.out}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Drill-down benchmark: hierarchical kinetics tree against a groupby per click.
+
+Builds kinetics_tree.KineticsTree over a multi-year synthetic history
+(hospital → unit → category → subcategory), then times one drill step at
+every depth: the node's daily kinetics plus the breakdown of its children,
+as a filter + calculate_risk_kinetics + groupby over incidents against the
+tree's precomputed columns. Every node series is checked against the
+incident-level result before it is reported.
+
+    python benchmarks/bench_tree.py --incidents 2e6 --units 40 --categories 12 --subcategories 6
+"""
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from kinetics_tree import PATH, KineticsTree  # noqa: E402
+from quantization import HARM_RANKS, encode_harm, score  # noqa: E402
+from risk_engine import calculate_risk_kinetics  # noqa: E402
+from synthetic import generate_incidents  # noqa: E402
+from timing import timed  # noqa: E402
+
+
+def groupby_drill(df, path, window, start, end):
+    # What a click costs without the tree: filter, aggregate the node, group its children
+    frame = df
+    for name, label in zip(PATH, path):
+        frame = frame[frame[name] == label]
+    daily = calculate_risk_kinetics(frame, window, 2, start, end)[0]
+    children = frame.groupby(PATH[len(path)], observed=True)['weighted_score'].sum() if len(path) < len(PATH) else None
+    return daily, children
+
+
+def tree_drill(tree, path, window):
+    return tree.series(path, window), tree.breakdown(path, window) if len(path) < tree.depth else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--incidents', type=float, default=2e6)
+    parser.add_argument('--days', type=int, default=3 * 365)
+    parser.add_argument('--units', type=int, default=40)
+    parser.add_argument('--categories', type=int, default=12)
+    parser.add_argument('--subcategories', type=int, default=6)
+    parser.add_argument('--window', type=int, default=7)
+    args = parser.parse_args()
+
+    df = generate_incidents(int(args.incidents), units=args.units, categories=args.categories,
+                            subcategories=args.subcategories, days=args.days)
+    codes = encode_harm(df['Harm_Level'])
+    df['weighted_score'], df['raw_level'] = score(codes), HARM_RANKS[codes]
+    start, end = df['Date'].min(), df['Date'].max()
+
+    tree, build_s = timed(KineticsTree.from_incidents, df, repeat=1)
+    _, kinetics_s = timed(tree.kinetics, args.window, repeat=1)
+    print(f"{len(df):,} incidents, {tree.n} days, nodes per level {[len(keys) for keys in tree.keys]}; "
+          f"build {build_s * 1000:,.0f} ms, kinetics of every node {kinetics_s * 1000:,.0f} ms, "
+          f"{(tree.score.nbytes * 3 + sum(p.nbytes for p in tree.kinetics(args.window))) / 2**20:,.0f} MB")
+
+    # One drill path down the busiest branch
+    path, paths = (), [()]
+    while len(path) < tree.depth:
+        path = path + (tree.breakdown(path, args.window).index[0],)
+        paths.append(path)
+
+    rows = []
+    for path in paths:
+        (expected, _), groupby_s = timed(groupby_drill, df, path, args.window, start, end, repeat=3)
+        (series, _), tree_s = timed(tree_drill, tree, path, args.window, repeat=5)
+        pd.testing.assert_frame_equal(series, expected[series.columns].astype({'Date': series['Date'].dtype}),
+                                      check_dtype=False)
+        rows.append({'node': ' › '.join(('Hospital',) + path), 'groupby ms': groupby_s * 1000, 'tree ms': tree_s * 1000})
+    table = pd.DataFrame(rows)
+    table['speedup'] = table['groupby ms'] / table['tree ms']
+    print(table.to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+
+
+if __name__ == '__main__':
+    main()
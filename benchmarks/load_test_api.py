@@ -0,0 +1,146 @@
+"""
+Load test for risk_api.py: many concurrent pollers over keep-alive connections.
+
+Phase 1 (cold burst): every poller requests the same not-yet-computed view at
+once; the server should compute it once (see "computed" from /health).
+Phase 2 (steady polling): each poller cycles through /status and every
+unit's kinetics, revalidating with If-None-Match as a well-behaved poller
+would, and latency / throughput / status codes are reported.
+
+    python benchmarks/load_test_api.py --spawn --pollers 200 --requests 50
+    python benchmarks/load_test_api.py --port 8502 --pollers 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from urllib.parse import quote
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Client:
+    """
+    Minimal HTTP/1.1 keep-alive client on asyncio streams.
+    """
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def get(self, path, etag=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        extra = f"If-None-Match: {etag}\r\n" if etag else ''
+        self.writer.write(f"GET {path} HTTP/1.1\r\nHost: {self.host}\r\n{extra}\r\n".encode())
+        await self.writer.drain()
+        head = (await self.reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+        headers = {k.lower(): v.strip() for k, _, v in (line.partition(':') for line in head[1:] if line)}
+        body = await self.reader.readexactly(int(headers.get('content-length', 0)))
+        return int(head[0].split()[1]), headers.get('etag'), body
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def fetch_json(host, port, path):
+    client = Client(host, port)
+    try:
+        return json.loads((await client.get(path))[2])
+    finally:
+        client.close()
+
+
+async def poller(host, port, paths, n_requests, conditional, latencies, codes):
+    client = Client(host, port)
+    etags = {}
+    try:
+        for i in range(n_requests):
+            path = paths[i % len(paths)]
+            t0 = time.perf_counter()
+            code, etag, _ = await client.get(path, etags.get(path) if conditional else None)
+            latencies.append(time.perf_counter() - t0)
+            codes[code] = codes.get(code, 0) + 1
+            if etag:
+                etags[path] = etag
+    finally:
+        client.close()
+
+
+async def run(args):
+    host, port = args.host, args.port
+    units = await fetch_json(host, port, '/units')
+
+    # 1. Cold burst on one uncached view
+    before = await fetch_json(host, port, '/health')
+    burst = f"/status?window={args.window}&sigma=2.5&smoother=median"
+    latencies, codes = [], {}
+    t0 = time.perf_counter()
+    await asyncio.gather(*(poller(host, port, [burst], 1, False, latencies, codes) for _ in range(args.pollers)))
+    burst_s = time.perf_counter() - t0
+    after = await fetch_json(host, port, '/health')
+    print(f"cold burst: {args.pollers} concurrent requests in {burst_s * 1000:.0f} ms, "
+          f"server computed {after['computed'] - before['computed']} bodies, codes {codes}")
+
+    # 2. Steady polling
+    paths = [f"/status?window={args.window}&sigma=2"] + [
+        f"/units/{quote(unit)}/kinetics?window={args.window}&sigma=2" for unit in units
+    ]
+    latencies, codes = [], {}
+    t0 = time.perf_counter()
+    await asyncio.gather(*(
+        poller(host, port, paths[k % len(paths):] + paths[:k % len(paths)], args.requests, not args.no_etag, latencies, codes)
+        for k in range(args.pollers)
+    ))
+    elapsed = time.perf_counter() - t0
+    final = await fetch_json(host, port, '/health')
+
+    ms = np.array(latencies) * 1000
+    print(f"steady: {len(ms)} requests from {args.pollers} pollers in {elapsed:.2f}s -> {len(ms) / elapsed:,.0f} req/s")
+    print(f"latency ms: p50 {np.percentile(ms, 50):.1f}  p95 {np.percentile(ms, 95):.1f}  "
+          f"p99 {np.percentile(ms, 99):.1f}  max {ms.max():.1f}")
+    print(f"codes {codes}; server computed {final['computed'] - after['computed']} bodies")
+
+
+def wait_for(host, port, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            return asyncio.run(fetch_json(host, port, '/health'))
+        except OSError:
+            time.sleep(0.25)
+    raise TimeoutError(f"risk_api did not start on {host}:{port}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--spawn', action='store_true', help='start a local risk_api.py for the test')
+    parser.add_argument('--pollers', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=20, help='requests per poller in the steady phase')
+    parser.add_argument('--window', type=int, default=7)
+    parser.add_argument('--no-etag', action='store_true', help='never send If-None-Match')
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'risk_api.py'), '--host', args.host,
+                                   '--port', str(args.port)], cwd=ROOT)
+    try:
+        wait_for(args.host, args.port)
+        asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Seeded synthetic incident generator matching the hospital_risk_data.csv schema
+(Date, Hour, Category, Subcategory, Unit, Harm_Level, Description, Harm_Score).
+"""
+import numpy as np
+import pandas as pd
+
+BASE_UNITS = ['Emergency', 'General Ward', 'NICU', 'VIP Unit', 'CICU']
+BASE_CATEGORIES = ['Equipment', 'Surgical', 'Fall', 'Infection', 'Medication']
+HARM_LEVELS = [chr(65 + i) for i in range(9)]
+# Harm mix of the shipped sample: mostly near misses, sentinel events rare
+HARM_PROBS = np.array([0.404, 0.198, 0.144, 0.078, 0.064, 0.050, 0.040, 0.018, 0.004])
+HOURS = [f"{h:02d}:00" for h in range(24)]
+SCHEMA = ['Date', 'Hour', 'Category', 'Subcategory', 'Unit', 'Harm_Level', 'Description', 'Harm_Score']
+
+
+def _names(base, n, prefix):
+    return base[:n] + [f"{prefix} {k:03d}" for k in range(len(base), n)]
+
+
+def generate_incidents(n, units=5, categories=5, subcategories=1, days=90, start='2025-01-01',
+                       seed=0, descriptions=False, offset=0):
+    """
+    n incidents spread uniformly over `days` days. Dimensions are categoricals;
+    Description is only materialized when `descriptions` is set because the
+    free text dominates memory at large n. `offset` numbers descriptions when
+    a large file is generated in chunks.
+    """
+    rng = np.random.default_rng(seed)
+    unit_names = _names(BASE_UNITS, units, 'Unit')
+    cat_names = _names(BASE_CATEGORIES, categories, 'Category')
+    if subcategories == 1:
+        sub_names = [f"Sub-{c}" for c in cat_names]
+    else:
+        sub_names = [f"Sub-{c}-{j}" for c in cat_names for j in range(subcategories)]
+
+    day = rng.integers(0, days, size=n)
+    cat = rng.integers(0, categories, size=n)
+    sub = cat * subcategories + rng.integers(0, subcategories, size=n)
+    level = rng.choice(len(HARM_LEVELS), size=n, p=HARM_PROBS / HARM_PROBS.sum())
+
+    df = pd.DataFrame({
+        'Date': pd.Timestamp(start) + pd.to_timedelta(day, unit='D'),
+        'Hour': pd.Categorical.from_codes(rng.integers(0, 24, size=n), HOURS),
+        'Category': pd.Categorical.from_codes(cat, cat_names),
+        'Subcategory': pd.Categorical.from_codes(sub, sub_names),
+        'Unit': pd.Categorical.from_codes(rng.integers(0, units, size=n), unit_names),
+        'Harm_Level': pd.Categorical.from_codes(level, HARM_LEVELS),
+    })
+    df['Description'] = (
+        [f"Incident description {offset + i}" for i in range(n)] if descriptions else ''
+    )
+    df['Harm_Score'] = (level + 1).astype(np.uint8)
+    return df[SCHEMA]
+
+
+def write_csv(path, n, chunk_rows=1_000_000, seed=0, **kwargs):
+    """
+    Streams n synthetic incidents to a CSV in chunks so files larger than RAM
+    can be produced. Each chunk gets its own derived seed.
+    """
+    with open(path, 'w', newline='') as fh:
+        for k, lo in enumerate(range(0, n, chunk_rows)):
+            chunk = generate_incidents(min(chunk_rows, n - lo), seed=seed + k, descriptions=True, offset=lo, **kwargs)
+            chunk['Date'] = chunk['Date'].dt.strftime('%Y-%m-%d')
+            chunk.to_csv(fh, index=False, header=(k == 0))
+    return path
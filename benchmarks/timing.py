@@ -0,0 +1,17 @@
+"""
+Wall-clock timing shared by the benchmark scripts.
+"""
+import time
+
+
+def timed(fn, *args, repeat=1, **kwargs):
+    """
+    (result, seconds) for fn(*args, **kwargs): the best of `repeat` calls,
+    with the result of the last one.
+    """
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+    return result, best
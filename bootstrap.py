@@ -0,0 +1,100 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from diagnostics import instrumented
+from risk_engine import KineticsCache, lag_diff
+from smoothing import smooth
+
+# Replicates per band and per resampling batch (one batch is one time × replicate panel)
+REPLICATES = 400
+BATCH = 100
+
+# Derived series that get bands; each becomes <name>_lo / <name>_hi columns
+BAND_SERIES = ('smooth', 'velocity', 'acceleration')
+
+# Bands per (scope, window, smoother) view; sigma does not enter them
+BAND_CACHE = KineticsCache(max_bytes=16 * 2**20)
+
+
+def block_rows(n, block, replicates, rng):
+    """
+    Moving-block bootstrap row numbers (n × replicates): each column
+    strings together random runs of `block` consecutive rows, so short-range
+    dependence (incident clusters, weekday cycles) survives the resampling.
+    """
+    n_blocks = -(-n // block)
+    starts = rng.integers(0, n - block + 1, size=(n_blocks, 1, replicates))
+    return (starts + np.arange(block).reshape(1, -1, 1)).reshape(n_blocks * block, replicates)[:n]
+
+
+def resample_kinetics(fitted, resid, window, smoother, block, replicates, seed):
+    """
+    Smooth, velocity and acceleration (each time × replicates) of one batch
+    of replicate series: the fitted trend plus block-resampled residuals,
+    floored at zero like a weighted score. All replicates go through the
+    smoother as one panel.
+    """
+    rng = np.random.default_rng(seed)
+    series = np.maximum(fitted[:, None] + resid[block_rows(len(resid), block, replicates, rng)], 0)
+    smoothed = smooth(series, window, smoother)
+    velocity = lag_diff(smoothed, window) / window
+    return smoothed, velocity, lag_diff(velocity, window) / window
+
+
+@instrumented('kinetics_bands')
+def kinetics_bands(daily, window, smoother='mean', replicates=REPLICATES, level=0.9, block=None, seed=0,
+                   workers=1, batch=BATCH):
+    """
+    Pointwise `level` bootstrap bands of smooth, velocity and acceleration
+    for a kinetics frame (time column first, weighted_score). Residuals
+    around the trend are block-resampled (block defaults to
+    max(window, n^(1/3)) rows); batches of replicates run inline or on a
+    process pool of `workers`, with per-batch seeds so the bands do not
+    depend on the pool size. Returns the time column plus <series>_lo /
+    <series>_hi columns; NaN where the series itself is undefined.
+    """
+    time_col = daily.columns[0]
+    score = daily['weighted_score'].to_numpy(float)
+    n = len(score)
+    bands = pd.DataFrame({time_col: daily[time_col].to_numpy()})
+    if n < 2:
+        for name in BAND_SERIES:
+            bands[f'{name}_lo'] = bands[f'{name}_hi'] = np.nan
+        return bands
+
+    # 1. Trend and residuals of the observed series
+    fitted = smooth(score, window, smoother)
+    resid = score - fitted
+    block = min(block or max(window, round(n ** (1 / 3))), n)
+
+    # 2. Replicates in batches, each batch one vectorized pass
+    sizes = [min(batch, replicates - lo) for lo in range(0, replicates, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(fitted, resid, window, smoother, block, size, s) for size, s in zip(sizes, seeds)]
+    if workers == 1 or len(jobs) == 1:
+        results = [resample_kinetics(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(resample_kinetics, *zip(*jobs)))
+
+    # 3. Pointwise quantiles across all replicates
+    tail = (1 - level) / 2
+    for k, name in enumerate(BAND_SERIES):
+        draws = np.concatenate([r[k] for r in results], axis=1)
+        bands[f'{name}_lo'], bands[f'{name}_hi'] = np.quantile(draws, [tail, 1 - tail], axis=1)
+    return bands
+
+
+def cached_bands(key, daily, window, smoother='mean', cache=BAND_CACHE, **kwargs):
+    """
+    kinetics_bands memoized on `key`, e.g. kinetics_key(...) with sigma_val
+    None since the bands do not depend on it. Shared between sessions and
+    read-only.
+    """
+    bands = cache.get(key)
+    if bands is None:
+        bands = kinetics_bands(daily, window, smoother, **kwargs)
+        cache.put(key, bands, int(bands.memory_usage(deep=True).sum()))
+    return bands
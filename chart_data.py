@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+from risk_engine import KineticsCache
+
+# Points per trace sent to the browser; a chart is ~1000 px wide
+MAX_POINTS = 1500
+
+# Built figures and chart series, keyed on everything they are drawn from
+CHART_CACHE = KineticsCache(max_bytes=32 * 2**20)
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: indices of `threshold` points that keep
+    the visual shape (peaks, troughs) of the series (x, y). First and last
+    points are always kept; NaNs count as 0 when choosing points.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+
+    # 1. Bucket the interior points and precompute each bucket's centroid
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    sizes = np.diff(edges)
+    x_avg = np.add.reduceat(x[:-1], edges[:-1]) / sizes
+    y_avg = np.add.reduceat(y[:-1], edges[:-1]) / sizes
+
+    # 2. Per bucket, keep the point spanning the largest triangle with the
+    # previously kept point and the next bucket's centroid
+    picked = np.empty(threshold, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for b in range(threshold - 2):
+        lo, hi = edges[b], edges[b + 1]
+        cx, cy = (x_avg[b + 1], y_avg[b + 1]) if b + 1 < len(sizes) else (x[-1], y[-1])
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        picked[b + 1] = a
+    return picked
+
+
+def downsample(frame, x_col, y_cols, max_points=MAX_POINTS):
+    """
+    Rows of `frame` kept by LTTB on each of `y_cols`, sharing max_points
+    between them (union, so traces on one x axis stay aligned). Frames
+    within max_points pass through.
+    """
+    if len(frame) <= max_points:
+        return frame
+    x = frame[x_col]
+    x = x.to_numpy('int64') if pd.api.types.is_datetime64_any_dtype(x) else x.to_numpy(float)
+    per_column = max(max_points // len(y_cols), 3)
+    keep = np.unique(np.concatenate([lttb(x, frame[c].to_numpy(float), per_column) for c in y_cols]))
+    return frame.iloc[keep].reset_index(drop=True)
+
+
+def _nbytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    # Plotly figure: size of its trace arrays plus layout overhead
+    arrays = (getattr(t, attr, None) for t in getattr(value, 'data', ()) for attr in ('x', 'y', 'z', 'text'))
+    return sum(np.asarray(a).nbytes for a in arrays if a is not None) + 4096
+
+
+def cached_chart(key, build, cache=CHART_CACHE):
+    """
+    build() memoized on `key`, which must cover every input of the chart
+    (e.g. kinetics_key(...) plus display options). Cached values are shared
+    between sessions and must be treated as read-only.
+    """
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.put(key, value, _nbytes(value))
+    return value
+
+
+def _with_bands(daily, columns, bands, name):
+    frame = daily[columns]
+    if bands is None:
+        return frame, columns[1:]
+    band_cols = [f'{name}_lo', f'{name}_hi']
+    return pd.concat([frame, bands[band_cols].set_axis(frame.index)], axis=1), columns[1:] + band_cols
+
+
+def trend_series(daily, max_points=MAX_POINTS, bands=None):
+    """
+    Time, raw score and trend of a kinetics frame, downsampled for the SPC
+    chart; with bootstrap `bands` (bootstrap.kinetics_bands of the same
+    frame) also smooth_lo / smooth_hi.
+    """
+    time_col = daily.columns[0]
+    frame, y_cols = _with_bands(daily, [time_col, 'weighted_score', 'smooth'], bands, 'smooth')
+    return downsample(frame, time_col, y_cols, max_points)
+
+
+def acceleration_series(daily, max_points=MAX_POINTS, bands=None):
+    """
+    Time and acceleration of a kinetics frame, downsampled for the momentum
+    chart; with bootstrap `bands` also acceleration_lo / acceleration_hi.
+    """
+    time_col = daily.columns[0]
+    frame, y_cols = _with_bands(daily, [time_col, 'acceleration'], bands, 'acceleration')
+    return downsample(frame, time_col, y_cols, max_points)
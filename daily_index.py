@@ -0,0 +1,405 @@
+import copy
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from prefix_cube import PrefixCube
+from quantization import DEFAULT_SCHEME, HARM_LEVELS, HARM_RANKS, encode_harm, harm_weights, scheme_key
+
+
+def _fingerprint(start, *parts):
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(str(start).encode())
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(np.ascontiguousarray(part).data)
+        else:
+            digest.update('|'.join(map(str, part)).encode())
+    return digest.hexdigest()
+
+
+def _scheme_version(content, key):
+    # The default scheme keeps the plain content hash, so existing cache keys and ETags stay valid
+    return content if key == DEFAULT_SCHEME else _fingerprint(content, [key])
+
+
+def _revision_content(base, revision):
+    # Content id after `revision` appends to the data loaded as `base`
+    return base if revision == 0 else f'{base}+{revision}'
+
+
+def _rescored(index, scheme):
+    """
+    `index` under another weighting scheme. Only the score plane is
+    recomputed (counts @ weights); counts and every other plane are shared,
+    and each scheme's view is built once per index.
+    """
+    key = scheme_key(scheme)
+    if key not in index._schemes:
+        view = copy.copy(index)
+        view.scheme, view.weights = scheme, harm_weights(scheme)
+        view.score = index.counts @ view.weights
+        view.version = _scheme_version(index.content, key)
+        index._schemes[key] = view
+    return index._schemes[key]
+
+
+def day_slice(origin, n_days, start, end):
+    lo = 0 if start is None else (pd.Timestamp(start).normalize() - origin).days
+    hi = n_days if end is None else (pd.Timestamp(end).normalize() - origin).days + 1
+    return slice(min(max(lo, 0), n_days), min(max(hi, 0), n_days))
+
+
+def _day_span(days):
+    """
+    (first day, number of calendar days) covered by a datetime64[D] array.
+    """
+    if len(days):
+        first, last = days.min(), days.max()
+    else:
+        first = last = np.datetime64('today', 'D')
+    return first, int((last - first).astype(np.int64)) + 1
+
+
+def hour_of_day(hours):
+    """
+    Hour of day (0-23) for an 'HH:MM' column. Only the distinct labels are
+    parsed; rows are mapped through their category codes.
+    """
+    labels = pd.Categorical(hours)
+    lookup = np.array([int(str(h).split(':')[0]) for h in labels.categories], dtype=np.int64)
+    return lookup[labels.codes]
+
+
+class DailyIndex:
+    """
+    Dense, zero-filled date × unit × category × harm-level incident counts,
+    built once at load time. Every calendar day between the first and last
+    incident has a row, so a window of w rows is always w days and every view
+    (kinetics, weekly matrix, hotspot, category totals) is a slice of it.
+    """
+
+    def __init__(self, start, units, categories, counts, scheme=DEFAULT_SCHEME):
+        self.start = pd.Timestamp(start).normalize()
+        self.units = pd.Index(units, name='Unit')
+        self.categories = pd.Index(categories, name='Category')
+        self.counts = counts
+        self.dates = pd.date_range(self.start, periods=counts.shape[0], freq='D', name='Date')
+        # Derived daily planes (date × unit × category); score depends on the weighting scheme
+        self.scheme, self.weights = scheme, harm_weights(scheme)
+        self.score = counts @ self.weights
+        self.level_sum = counts @ HARM_RANKS
+        self.incidents = counts.sum(axis=-1)
+        # Range totals (hotspot, harm distribution, weekly matrix) come from here
+        self.cube = PrefixCube(counts)
+        self.content = self.base = self._fingerprint()
+        self.version = _scheme_version(self.content, scheme_key(scheme))
+        # Appends since load, and the last one to touch each day × unit (None until the first)
+        self.revision = 0
+        self.stamps = None
+        # Shared by every re-scored view of these counts
+        self._schemes = {scheme_key(scheme): self}
+
+    def _fingerprint(self):
+        """
+        Content hash of the dataset; keys derived results such as the kinetics cache.
+        """
+        return _fingerprint(self.start, self.units, self.categories, self.counts)
+
+    def with_scheme(self, scheme):
+        """
+        This index re-scored under a quantization weighting scheme (a name
+        in quantization.SCHEMES or a custom A-I table), without a reload.
+        """
+        return _rescored(self, scheme)
+
+    @classmethod
+    def from_incidents(cls, df):
+        """
+        Scatters incidents (Date, Unit, Category, Harm_Level) into the dense cube.
+        """
+        return cls._scatter(df)
+
+    @classmethod
+    def from_aggregates(cls, agg):
+        """
+        Builds the cube from pre-reduced daily counts (Date, Unit, Category,
+        Harm_Level, incidents), e.g. from data_store.aggregate_csv_chunks.
+        """
+        return cls._scatter(agg, agg['incidents'].to_numpy())
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Builds the cube straight from the code columns of a
+        shared_arrays.IncidentArrays, without materializing a frame.
+        """
+        first, n_days = _day_span(arrays.day)
+        return cls._from_codes(first, n_days, (arrays.day - first).astype(np.int64),
+                               arrays.unit, arrays.category, arrays.harm, arrays.units, arrays.categories)
+
+    @classmethod
+    def _scatter(cls, df, weights=None):
+        units = pd.Categorical(df['Unit'])
+        categories = pd.Categorical(df['Category'])
+        levels = encode_harm(df['Harm_Level'])
+        days = df['Date'].to_numpy().astype('datetime64[D]')
+        first, n_days = _day_span(days)
+        return cls._from_codes(first, n_days, (days - first).astype(np.int64), units.codes, categories.codes, levels,
+                               units.categories, categories.categories, weights)
+
+    @classmethod
+    def _from_codes(cls, first, n_days, day_pos, unit_codes, category_codes, levels, units, categories, weights=None):
+        shape = (n_days, len(units), len(categories), len(HARM_LEVELS))
+        flat = np.ravel_multi_index((day_pos, unit_codes, category_codes, levels), shape)
+        counts = np.bincount(flat, weights=weights, minlength=int(np.prod(shape))).reshape(shape).astype(np.int32)
+        return cls(first, units, categories, counts)
+
+    # --- Live appends ---
+    def append(self, incidents):
+        """
+        A new index with a micro-batch of incidents (Date, Unit, Category,
+        Harm_Level) added; this one is left untouched for the sessions still
+        reading it. Only days from the earliest incident on are re-derived,
+        and the day × unit cells it touches are stamped with the new
+        revision (see view_version). Unseen units or categories, or days
+        before the start, rebuild the planes and restamp every cell.
+        """
+        days = pd.to_datetime(incidents['Date']).to_numpy().astype('datetime64[D]')
+        unit_labels, category_labels = np.asarray(incidents['Unit']), np.asarray(incidents['Category'])
+        units = self.units.append(pd.Index(pd.unique(unit_labels[self.units.get_indexer(unit_labels) < 0]), name='Unit'))
+        categories = self.categories.append(pd.Index(
+            pd.unique(category_labels[self.categories.get_indexer(category_labels) < 0]), name='Category'))
+
+        # 1. Calendar and axes of the new counts
+        origin = np.datetime64(self.start.date(), 'D')
+        n_old = len(self.dates)
+        shift = max(int((origin - days.min()).astype(np.int64)), 0)
+        n_days = max(n_old + shift, int((days.max() - origin).astype(np.int64)) + shift + 1)
+        rebuild = shift > 0 or len(units) > len(self.units) or len(categories) > len(self.categories)
+        if rebuild:
+            counts = np.zeros((n_days, len(units), len(categories), len(HARM_LEVELS)), dtype=self.counts.dtype)
+            counts[shift:shift + n_old, :len(self.units), :len(self.categories)] = self.counts
+        else:
+            counts = np.concatenate((self.counts, np.zeros((n_days - n_old,) + self.counts.shape[1:], self.counts.dtype)))
+        day_pos = (days - origin).astype(np.int64) + shift
+        unit_pos = units.get_indexer(unit_labels)
+        np.add.at(counts, (day_pos, unit_pos, categories.get_indexer(category_labels), encode_harm(incidents['Harm_Level'])), 1)
+
+        # 2. Derived planes, from the first touched day on
+        view = copy.copy(self)
+        view.start = pd.Timestamp(origin - shift)
+        view.units, view.categories, view.counts = units, categories, counts
+        view.dates = pd.date_range(view.start, periods=n_days, freq='D', name='Date')
+        if rebuild:
+            view.score, view.level_sum, view.incidents = counts @ self.weights, counts @ HARM_RANKS, counts.sum(axis=-1)
+            view.cube = PrefixCube(counts)
+        else:
+            # Quiet days between the old end and the batch are re-derived too
+            first = min(int(day_pos.min()), n_old)
+            tail = counts[first:]
+            view.score = np.concatenate((self.score[:first], tail @ self.weights))
+            view.level_sum = np.concatenate((self.level_sum[:first], tail @ HARM_RANKS))
+            view.incidents = np.concatenate((self.incidents[:first], tail.sum(axis=-1)))
+            view.cube = self.cube.extended(counts, first)
+
+        # 3. A new version, stamped on the cells this batch changed
+        view.revision = self.revision + 1
+        if rebuild or self.stamps is None:
+            view.stamps = np.full((n_days, len(units)), view.revision if rebuild else 0, dtype=np.int32)
+        else:
+            view.stamps = np.concatenate((self.stamps, np.zeros((n_days - n_old, len(units)), np.int32)))
+        view.stamps[day_pos, unit_pos] = view.revision
+        view.content = _revision_content(self.base, view.revision)
+        view.version = _scheme_version(view.content, scheme_key(self.scheme))
+        view._schemes = {scheme_key(self.scheme): view}
+        return view
+
+    def view_version(self, unit=None, rows=slice(None)):
+        """
+        Version of one unit's (or the hospital's) data over a row range: the
+        index version as of the last append that touched it. Views cached
+        under it survive appends to other units and other days.
+        """
+        if self.stamps is None:
+            return self.version
+        stamps = self.stamps[rows][:, self._unit_pos(unit)]
+        revision = int(stamps.max()) if stamps.size else 0
+        return _scheme_version(_revision_content(self.base, revision), scheme_key(self.scheme))
+
+    # --- Slicing ---
+    def day_slice(self, start=None, end=None):
+        """
+        Row slice for an inclusive [start, end] date range, clipped to the index.
+        """
+        return day_slice(self.start, len(self.dates), start, end)
+
+    def _unit_pos(self, unit):
+        return slice(None) if unit is None else [self.units.get_loc(unit)]
+
+    def _category_pos(self, category):
+        return slice(None) if category is None else [self.categories.get_loc(category)]
+
+    def daily(self, unit=None, start=None, end=None, category=None):
+        """
+        Dense daily frame (Date, weighted_score, raw_level) for the hospital,
+        one unit and/or one category; raw_level is 0 on days without incidents.
+        """
+        rows, cols, cats = self.day_slice(start, end), self._unit_pos(unit), self._category_pos(category)
+        score = self.score[rows][:, cols][:, :, cats].sum(axis=(1, 2))
+        level_sum = self.level_sum[rows][:, cols][:, :, cats].sum(axis=(1, 2))
+        incidents = self.incidents[rows][:, cols][:, :, cats].sum(axis=(1, 2))
+        return pd.DataFrame({
+            'Date': self.dates[rows],
+            'weighted_score': score,
+            'raw_level': np.divide(level_sum, incidents, out=np.zeros(len(score)), where=incidents > 0),
+        })
+
+    def unit_category_totals(self, unit=None, start=None, end=None):
+        """
+        weighted_score summed over the date range, as a unit × category frame.
+        """
+        rows, cols = self.day_slice(start, end), self._unit_pos(unit)
+        totals = self.cube.range_counts(rows.start, rows.stop, cols) @ self.weights
+        return pd.DataFrame(totals, index=self.units[cols], columns=self.categories)
+
+    def hotspot(self, unit=None, start=None, end=None):
+        """
+        (Unit, Category) with the highest cumulative RPN, or ("N/A", "N/A").
+        """
+        totals = self.unit_category_totals(unit, start, end)
+        if totals.empty or not totals.to_numpy().any():
+            return ("N/A", "N/A")
+        u, c = np.unravel_index(np.argmax(totals.to_numpy()), totals.shape)
+        return (totals.index[u], totals.columns[c])
+
+    def category_totals(self, unit=None, start=None, end=None):
+        totals = self.unit_category_totals(unit, start, end).sum(axis=0)
+        return totals[totals > 0].sort_values()
+
+    def weekly_matrix(self, unit=None, start=None, end=None):
+        """
+        Unit × week (ending Sunday) weighted_score, equivalent to
+        pivot(Date, Unit).resample('W').sum().T.
+        """
+        rows, cols = self.day_slice(start, end), self._unit_pos(unit)
+        dates = self.dates[rows]
+        if len(dates) == 0:
+            return pd.DataFrame(index=self.units[cols])
+        # Week boundaries fall on fixed 7-day strides after the first Sunday
+        first_end = (6 - dates[0].dayofweek) % 7
+        starts = np.r_[0, np.arange(first_end + 1, len(dates), 7)]
+        edges = rows.start + np.r_[starts, len(dates)]
+        weekly = (self.cube.bucket_counts(edges, cols) @ self.weights).sum(axis=2)
+        labels = pd.DatetimeIndex(dates[0] + pd.to_timedelta(first_end + 7 * np.arange(len(starts)), unit='D'), name='Date')
+        return pd.DataFrame(weekly.T, index=self.units[cols], columns=labels)
+
+
+class HourlyIndex:
+    """
+    Dense hour × unit × harm-level counts, 24 rows per calendar day, built
+    from Date + Hour without per-row datetime parsing. Hourly and per-shift
+    series are fixed-stride reductions of this plane.
+    """
+
+    def __init__(self, start, units, counts, scheme=DEFAULT_SCHEME):
+        self.start = pd.Timestamp(start).normalize()
+        self.units = pd.Index(units, name='Unit')
+        self.counts = counts
+        self.n_days = counts.shape[0] // 24
+        self.scheme, self.weights = scheme, harm_weights(scheme)
+        self.score = counts @ self.weights
+        self.level_sum = counts @ HARM_RANKS
+        self.incidents = counts.sum(axis=-1)
+        self.content = _fingerprint(self.start, self.units, self.counts)
+        self.version = _scheme_version(self.content, scheme_key(scheme))
+        self._schemes = {scheme_key(scheme): self}
+
+    def with_scheme(self, scheme):
+        """
+        This plane re-scored under another weighting scheme (see DailyIndex.with_scheme).
+        """
+        return _rescored(self, scheme)
+
+    @classmethod
+    def from_incidents(cls, df):
+        """
+        Scatters incidents (Date, Hour, Unit, Harm_Level) into the hourly plane.
+        """
+        return cls._scatter(df)
+
+    @classmethod
+    def from_aggregates(cls, agg):
+        """
+        Builds the plane from data_store.aggregate_csv_chunks(keys=HOURLY_AGGREGATE_KEYS).
+        """
+        return cls._scatter(agg, agg['incidents'].to_numpy())
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Builds the plane from the day / hour / unit / harm code columns of a
+        shared_arrays.IncidentArrays.
+        """
+        first, n_days = _day_span(arrays.day)
+        slot = (arrays.day - first).astype(np.int64) * 24 + arrays.hour
+        return cls._from_codes(first, n_days, slot, arrays.unit, arrays.harm, arrays.units)
+
+    @classmethod
+    def _scatter(cls, df, weights=None):
+        units = pd.Categorical(df['Unit'])
+        levels = encode_harm(df['Harm_Level'])
+        days = df['Date'].to_numpy().astype('datetime64[D]')
+        first, n_days = _day_span(days)
+        slot = (days - first).astype(np.int64) * 24 + hour_of_day(df['Hour'])
+        return cls._from_codes(first, n_days, slot, units.codes, levels, units.categories, weights)
+
+    @classmethod
+    def _from_codes(cls, first, n_days, slot, unit_codes, levels, units, weights=None):
+        shape = (n_days * 24, len(units), len(HARM_LEVELS))
+        flat = np.ravel_multi_index((slot, unit_codes, levels), shape)
+        counts = np.bincount(flat, weights=weights, minlength=int(np.prod(shape))).reshape(shape).astype(np.int32)
+        return cls(first, units, counts)
+
+    def day_slice(self, start=None, end=None):
+        return day_slice(self.start, self.n_days, start, end)
+
+    def view_version(self, unit=None, rows=slice(None)):
+        # Not appended to live; every view shares the dataset version
+        return self.version
+
+    def plane(self, unit=None, start=None, end=None, hours=1, offset=0):
+        """
+        (timestamps, score, level_sum, incidents) as bucket × unit arrays.
+        Buckets are `hours` long and start at hour-of-day `offset` (e.g.
+        hours=8, offset=7 for 07/15/23 shifts); edge buckets may be partial.
+        """
+        days = self.day_slice(start, end)
+        lo, n = days.start * 24, (days.stop - days.start) * 24
+        cols = slice(None) if unit is None else [self.units.get_loc(unit)]
+        planes = [self.score[lo:lo + n][:, cols], self.level_sum[lo:lo + n][:, cols], self.incidents[lo:lo + n][:, cols]]
+        if n == 0:
+            return (pd.DatetimeIndex([], name='Timestamp'),) + tuple(planes)
+        if hours > 1:
+            starts = np.unique(np.r_[0, np.arange((offset - lo) % hours, n, hours)])
+            planes = [np.add.reduceat(p, starts, axis=0) for p in planes]
+            rows = lo + starts
+            rows = rows - (rows - offset) % hours
+        else:
+            rows = lo + np.arange(n)
+        stamps = pd.DatetimeIndex(self.start + pd.to_timedelta(rows, unit='h'), name='Timestamp')
+        return (stamps,) + tuple(planes)
+
+    def series(self, unit=None, start=None, end=None, hours=1, offset=0):
+        """
+        Dense frame (Timestamp, weighted_score, raw_level) for the hospital or
+        one unit at hourly or shift resolution.
+        """
+        stamps, score, level_sum, incidents = self.plane(unit, start, end, hours, offset)
+        score, level_sum, incidents = score.sum(axis=1), level_sum.sum(axis=1), incidents.sum(axis=1)
+        return pd.DataFrame({
+            'Timestamp': stamps,
+            'weighted_score': score,
+            'raw_level': np.divide(level_sum, incidents, out=np.zeros(len(score)), where=incidents > 0),
+        })
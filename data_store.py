@@ -0,0 +1,208 @@
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from diagnostics import instrumented
+from quantization import DEFAULT_SCHEME, encode_harm, score
+
+# --- 1. STORE LAYOUT ---
+CSV_PATH = 'hospital_risk_data.csv'
+STORE_PATH = 'risk_store'
+MANIFEST = '_manifest.json'
+
+CATEGORICAL_COLUMNS = ['Hour', 'Unit', 'Category', 'Subcategory', 'Harm_Level']
+ANALYTIC_COLUMNS = ['Date', 'Hour', 'Unit', 'Category', 'Subcategory', 'Harm_Level', 'weighted_score', 'raw_level']
+
+# Keys of the daily (and hourly) aggregates produced by chunked ingestion
+AGGREGATE_KEYS = ['Date', 'Unit', 'Category', 'Harm_Level']
+HOURLY_AGGREGATE_KEYS = ['Date', 'Hour', 'Unit', 'Harm_Level']
+
+# Read size when streaming the previously ingested CSV to check for an append-only change
+DIGEST_CHUNK = 1 << 20
+
+
+# --- 2. INGEST ---
+def quantize_incidents(raw):
+    """
+    Types a raw CSV frame for the store: categoricals, datetime64 Date and
+    precomputed uint8 harm weights: raw_level is the 1-9 rank and
+    weighted_score the default (quadratic) scheme. Other schemes are
+    lookups on the harm codes (quantization.score). The free-text
+    Description is dropped.
+    """
+    df = pd.DataFrame({'Date': pd.to_datetime(raw['Date'], format='%Y-%m-%d')})
+    for col in CATEGORICAL_COLUMNS:
+        df[col] = raw[col].astype('category')
+    codes = encode_harm(df['Harm_Level'])
+    df['weighted_score'] = score(codes, DEFAULT_SCHEME)
+    df['raw_level'] = score(codes, 'linear')
+    return df
+
+
+def _read_csv(source):
+    return pd.read_csv(source, usecols=['Date'] + CATEGORICAL_COLUMNS, dtype={c: 'category' for c in CATEGORICAL_COLUMNS})
+
+
+def _digest(fh, nbytes):
+    """
+    blake2b of the next `nbytes` of an open file, streamed in DIGEST_CHUNK
+    reads; returns the hash object so later bytes can extend it.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    while nbytes > 0:
+        block = fh.read(min(DIGEST_CHUNK, nbytes))
+        if not block:
+            break
+        digest.update(block)
+        nbytes -= len(block)
+    return digest
+
+
+def _write_part(df, store_path, part):
+    df.to_parquet(os.path.join(store_path, f'part-{part:05d}.parquet'), compression='zstd', index=False)
+
+
+def _write_manifest(store_path, manifest):
+    with open(os.path.join(store_path, MANIFEST), 'w') as fh:
+        json.dump(manifest, fh, indent=2)
+
+
+def read_manifest(store_path=STORE_PATH):
+    path = os.path.join(store_path, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def build_store(csv_path=CSV_PATH, store_path=STORE_PATH):
+    """
+    Converts the incident CSV into a compressed Parquet store from scratch.
+    """
+    os.makedirs(store_path, exist_ok=True)
+    for name in os.listdir(store_path):
+        if name.endswith('.parquet'):
+            os.remove(os.path.join(store_path, name))
+
+    with open(csv_path, 'rb') as fh:
+        payload = fh.read()
+    _write_part(quantize_incidents(_read_csv(io.BytesIO(payload))), store_path, 0)
+
+    stat = os.stat(csv_path)
+    manifest = {
+        'source': os.path.abspath(csv_path),
+        'header': payload.split(b'\n', 1)[0].decode(),
+        'size': len(payload),
+        'mtime': stat.st_mtime,
+        'ends_with_newline': payload.endswith(b'\n'),
+        'digest': hashlib.blake2b(payload, digest_size=16).hexdigest(),
+        'parts': 1,
+    }
+    _write_manifest(store_path, manifest)
+    return manifest
+
+
+def refresh_store(csv_path=CSV_PATH, store_path=STORE_PATH):
+    """
+    Brings the store up to date with the CSV. Complete rows appended to the
+    end of the CSV are ingested as a new part (a row still being written is
+    picked up by a later refresh); any other change triggers a full rebuild.
+    """
+    manifest = read_manifest(store_path)
+    # Manifests without a full-file digest predate the prefix check
+    if manifest is None or manifest['source'] != os.path.abspath(csv_path) or 'digest' not in manifest:
+        return build_store(csv_path, store_path)
+
+    stat = os.stat(csv_path)
+    if stat.st_size == manifest['size'] and stat.st_mtime == manifest['mtime']:
+        return manifest
+
+    if stat.st_size <= manifest['size'] or not manifest['ends_with_newline']:
+        return build_store(csv_path, store_path)
+
+    # Append-only only if every previously ingested byte is unchanged; one pass hashes the old prefix and the tail
+    with open(csv_path, 'rb') as fh:
+        digest = _digest(fh, manifest['size'])
+        if digest.hexdigest() != manifest['digest']:
+            return build_store(csv_path, store_path)
+        tail = fh.read()
+    # A writer may be mid-row; ingest complete lines only and leave the rest for the next refresh
+    tail = tail[:tail.rfind(b'\n') + 1]
+    digest.update(tail)
+    if tail.strip():
+        chunk = _read_csv(io.BytesIO(manifest['header'].encode() + b'\n' + tail))
+        _write_part(quantize_incidents(chunk), store_path, manifest['parts'])
+        manifest['parts'] += 1
+
+    manifest.update({
+        'size': manifest['size'] + len(tail),
+        'mtime': stat.st_mtime,
+        'digest': digest.hexdigest(),
+    })
+    _write_manifest(store_path, manifest)
+    return manifest
+
+
+# --- 3. LOAD ---
+@instrumented('load_incidents')
+def load_incidents(csv_path=CSV_PATH, store_path=STORE_PATH, columns=ANALYTIC_COLUMNS):
+    """
+    Returns the incident frame from the columnar store, refreshing it first if
+    the CSV has changed. Only the requested columns are read from disk.
+    """
+    refresh_store(csv_path, store_path)
+    df = pd.read_parquet(store_path, columns=list(columns))
+    # Parts written at different times carry their own dictionaries; re-align them
+    for col in df.columns.intersection(CATEGORICAL_COLUMNS):
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+
+# --- 4. OUT-OF-CORE AGGREGATION ---
+@instrumented('aggregate_csv_chunks')
+def aggregate_csv_chunks(csv_path=CSV_PATH, chunksize=1_000_000, keys=AGGREGATE_KEYS):
+    """
+    Streams the CSV in chunks, reading only the aggregate keys, and reduces
+    each chunk to incident counts per key combination (by default daily
+    unit × category × harm level; HOURLY_AGGREGATE_KEYS for the hourly index).
+    Peak memory is one chunk plus the running aggregate, whatever the
+    number of incidents. Feed the result to DailyIndex.from_aggregates.
+    """
+    keys = list(keys)
+    total = None
+    reader = pd.read_csv(csv_path, usecols=keys, dtype={c: 'category' for c in keys}, chunksize=chunksize)
+    for chunk in reader:
+        part = chunk.groupby(keys, observed=True).size().rename('incidents').reset_index()
+        part[keys] = part[keys].astype(object)
+        if total is not None:
+            part = pd.concat([total, part], ignore_index=True).groupby(keys, sort=False, as_index=False)['incidents'].sum()
+        total = part
+
+    if total is None:
+        total = pd.DataFrame({key: pd.Series(dtype=object) for key in keys + ['incidents']})
+    total['Date'] = pd.to_datetime(total['Date'], format='%Y-%m-%d')
+    for col in keys[1:]:
+        total[col] = total[col].astype('category')
+    total['incidents'] = total['incidents'].astype(np.int64)
+    return total
+
+
+# --- 5. RESULTS ---
+def write_results(table, path):
+    """
+    Writes a result table to .parquet, .csv or .json, chosen by the extension.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.parquet':
+        table.to_parquet(path, index=False)
+    elif ext == '.json':
+        table.to_json(path, orient='records', date_format='iso', indent=1)
+    elif ext == '.csv':
+        table.to_csv(path, index=False)
+    else:
+        raise ValueError(f"Unsupported output format '{ext}' (use .parquet, .csv or .json).")
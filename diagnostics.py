@@ -0,0 +1,154 @@
+import contextvars
+import functools
+import json
+import threading
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+
+# Profile of the current rerun/thread; None means instrumentation is off
+_ACTIVE = contextvars.ContextVar('risk_profile', default=None)
+
+# tracemalloc is process-wide: it runs while any memory-tracked profile is
+# active, and a stage's allocation is only attributed to it when no other
+# such profile ran alongside (concurrent sessions share the traced total)
+_MEMORY_LOCK = threading.Lock()
+_MEMORY = {'profiles': 0, 'starts': 0, 'owned': False}
+
+
+def _track_memory(profile):
+    with _MEMORY_LOCK:
+        if _MEMORY['profiles'] == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _MEMORY['owned'] = True
+        _MEMORY['profiles'] += 1
+        _MEMORY['starts'] += 1
+    profile._tracking = True
+
+
+def _untrack_memory(profile):
+    with _MEMORY_LOCK:
+        if not profile._tracking:
+            return
+        profile._tracking = False
+        _MEMORY['profiles'] -= 1
+        if _MEMORY['profiles'] == 0 and _MEMORY['owned']:
+            tracemalloc.stop()
+            _MEMORY['owned'] = False
+
+
+def _memory_epoch():
+    # Identifies an uninterrupted stretch with a single memory-tracked profile
+    return _MEMORY['starts'] if _MEMORY['profiles'] == 1 else None
+
+
+class Profile:
+    """
+    Stage records (wall time, rows, net allocated memory) for one run.
+    """
+
+    def __init__(self, track_memory=True):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started = datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+        self.track_memory = track_memory
+        self.records = []
+        self._origin = time.perf_counter()
+        self._depth = 0
+        self._tracking = False
+
+    def to_jsonl(self):
+        return ''.join(json.dumps({'run': self.run_id, 'started': self.started, **r}) + '\n' for r in self.ordered())
+
+    def write_jsonl(self, path):
+        with open(path, 'a') as fh:
+            fh.write(self.to_jsonl())
+
+    def ordered(self):
+        # Records are appended as stages close; nested stages finish first
+        return sorted(self.records, key=lambda r: (r['start_ms'], r['depth']))
+
+    def total_seconds(self):
+        return sum(r['seconds'] for r in self.records if r['depth'] == 0)
+
+
+def start_profile(enabled, track_memory=True):
+    """
+    Activates a fresh Profile for the calling context (one dashboard rerun,
+    one CLI run), or clears instrumentation when disabled.
+    """
+    stale = _ACTIVE.get()
+    if stale is not None:
+        # A previous run in this context ended without finish_profile (e.g. an exception)
+        finish_profile(stale)
+    profile = Profile(track_memory) if enabled else None
+    if profile is not None and track_memory:
+        _track_memory(profile)
+    _ACTIVE.set(profile)
+    return profile
+
+
+def finish_profile(profile):
+    _ACTIVE.set(None)
+    if profile is not None:
+        _untrack_memory(profile)
+    return profile
+
+
+class stage:
+    """
+    Context manager timing one hot-path stage. When no profile is active the
+    only cost is a ContextVar lookup. Set `.rows` inside the block to record
+    how many rows the stage processed. alloc_kb is None when another
+    session's profile overlapped the stage.
+    """
+    __slots__ = ('name', 'rows', '_profile', '_t0', '_mem0', '_epoch')
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+        self._profile = None
+
+    def __enter__(self):
+        profile = _ACTIVE.get()
+        if profile is not None:
+            self._profile = profile
+            profile._depth += 1
+            self._epoch = _memory_epoch() if profile.track_memory else None
+            self._mem0 = tracemalloc.get_traced_memory()[0] if self._epoch is not None else 0
+            self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        profile = self._profile
+        if profile is not None:
+            seconds = time.perf_counter() - self._t0
+            alloc = None
+            if self._epoch is not None and self._epoch == _memory_epoch():
+                alloc = (tracemalloc.get_traced_memory()[0] - self._mem0) / 1024
+            profile._depth -= 1
+            profile.records.append({
+                'stage': self.name, 'start_ms': (self._t0 - profile._origin) * 1000,
+                'seconds': seconds, 'rows': self.rows,
+                'alloc_kb': alloc, 'depth': profile._depth,
+            })
+            self._profile = None
+        return False
+
+
+def instrumented(name):
+    """
+    Decorator form of `stage`; rows default to len() of the first argument
+    when it is a frame, array or other sized container.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _ACTIVE.get() is None:
+                return fn(*args, **kwargs)
+            with stage(name) as s:
+                if args and hasattr(args[0], '__len__') and not isinstance(args[0], (str, bytes)):
+                    s.rows = len(args[0])
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
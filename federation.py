@@ -0,0 +1,249 @@
+"""
+Multi-site federation: one dataset over many hospital exports.
+
+Each site exports its own file in the hospital_risk_data.csv schema. Files
+are discovered from a directory or glob, ingested in parallel on a process
+pool (each into its own store under --store-root, so reruns only re-ingest
+changed sites), and merged into a SiteIndex on a common calendar with a
+Site dimension. Each site keeps its own units and categories; network
+views (per site, per unit type across sites, per site × unit) are roll-ups
+of the merged counts, not re-reads of the files.
+
+    python federation.py --sites exports/ --out network.parquet
+    python federation.py --sites 'exports/*.csv' --by unit_type --window 7 --sigma 2
+"""
+import argparse
+import glob
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from daily_index import DailyIndex
+from data_store import aggregate_csv_chunks, write_results
+from diagnostics import instrumented
+from quantization import HARM_LEVELS
+from risk_engine import calculate_group_kinetics, get_strategic_status
+from shared_arrays import load_arrays
+
+SITE_STORE_ROOT = 'site_stores'
+ROLLUPS = ('site', 'unit_type', 'site_unit')
+
+
+def discover_sites(source):
+    """
+    {site: csv path} for a directory of CSVs or a glob; the site is the file stem.
+    """
+    paths = sorted(glob.glob(os.path.join(source, '*.csv')) if os.path.isdir(source) else glob.glob(source))
+    sites = {}
+    for path in paths:
+        site = os.path.splitext(os.path.basename(path))[0]
+        if site in sites:
+            raise ValueError(f"Duplicate site name '{site}' ({sites[site]} and {path}).")
+        sites[site] = path
+    return sites
+
+
+def _ingest_site(site, csv_path, store_root, chunked):
+    # Runs on a worker; returns only the compact cube (no derived planes) to keep the pickle small
+    if chunked:
+        index = DailyIndex.from_aggregates(aggregate_csv_chunks(csv_path))
+    else:
+        index = DailyIndex.from_arrays(load_arrays(csv_path, os.path.join(store_root, site)))
+    return site, index.start, list(index.units), list(index.categories), index.counts
+
+
+class SiteIndex:
+    """
+    Per-site date × unit × category × harm-level counts on a common
+    calendar. Each site keeps the cube it was ingested as: its own units,
+    categories and days, so memory grows with what the sites report rather
+    than with sites × every unit × every category in the network. Roll-ups
+    densify only the axes they are asked for and are DailyIndex objects, so
+    every existing view and kinetics function applies to them.
+    """
+
+    def __init__(self, start, n_days, cubes):
+        # cubes: {site: (first day on the calendar, units, categories, counts)}
+        self.start = pd.Timestamp(start).normalize()
+        self.sites = pd.Index(sorted(cubes), name='Site')
+        self.cubes = {site: (offset, pd.Index(units, name='Unit'), pd.Index(categories, name='Category'), counts)
+                      for site, (offset, units, categories, counts) in sorted(cubes.items())}
+        self.units = pd.Index(sorted(set().union(*(cube[1] for cube in self.cubes.values()))), name='Unit')
+        self.categories = pd.Index(sorted(set().union(*(cube[2] for cube in self.cubes.values()))), name='Category')
+        self.dates = pd.date_range(self.start, periods=n_days, freq='D', name='Date')
+        digest = hashlib.blake2b(str(self.start).encode(), digest_size=8)
+        for site, (offset, units, categories, counts) in self.cubes.items():
+            digest.update('|'.join(map(str, [site, offset, *units, *categories])).encode())
+            digest.update(np.ascontiguousarray(counts).data)
+        self.version = digest.hexdigest()
+        self._rollups = {}
+
+    @property
+    def nbytes(self):
+        return sum(cube[3].nbytes for cube in self.cubes.values())
+
+    @classmethod
+    def merge(cls, parts):
+        """
+        Places per-site (site, start, units, categories, counts) cubes on one calendar.
+        """
+        starts = [pd.Timestamp(p[1]) for p in parts]
+        first = min(starts)
+        last = max(s + pd.Timedelta(days=p[4].shape[0] - 1) for s, p in zip(starts, parts))
+        cubes = {site: ((start - first).days, units, categories, counts)
+                 for start, (site, _, units, categories, counts) in zip(starts, parts)}
+        return cls(first, (last - first).days + 1, cubes)
+
+    def _plane(self, columns):
+        return np.zeros((len(self.dates), columns, len(self.categories), len(HARM_LEVELS)), dtype=np.int32)
+
+    def _place(self, out, site, counts, columns):
+        # Adds a site's (days × columns × its categories × harm) counts into `out` at the given columns
+        offset, _, categories, _ = self.cubes[site]
+        days = np.arange(offset, offset + counts.shape[0])
+        out[np.ix_(days, columns, self.categories.get_indexer(categories))] += counts
+
+    def site(self, site):
+        """
+        DailyIndex of one site, on the network calendar and its own units and categories.
+        """
+        def build():
+            offset, units, categories, counts = self.cubes[site]
+            dense = np.zeros((len(self.dates),) + counts.shape[1:], dtype=counts.dtype)
+            dense[offset:offset + counts.shape[0]] = counts
+            return DailyIndex(self.start, units, categories, dense)
+        return self._rollup(('site', site), build)
+
+    def by_unit_type(self):
+        """
+        DailyIndex of the whole network with each unit type summed across sites.
+        """
+        def build():
+            out = self._plane(len(self.units))
+            for site, (_, units, _, counts) in self.cubes.items():
+                self._place(out, site, counts, self.units.get_indexer(units))
+            return DailyIndex(self.start, self.units, self.categories, out)
+        return self._rollup('unit_type', build)
+
+    def by_site(self):
+        """
+        DailyIndex whose "units" are the sites (all units of a site summed).
+        """
+        def build():
+            out = self._plane(len(self.sites))
+            for s, (site, cube) in enumerate(self.cubes.items()):
+                self._place(out, site, cube[3].sum(axis=1, keepdims=True), [s])
+            return DailyIndex(self.start, self.sites, self.categories, out)
+        return self._rollup('site', build)
+
+    def by_site_unit(self):
+        """
+        DailyIndex whose "units" are 'site / unit' pairs that have any incidents.
+        """
+        def build():
+            observed = {site: cube[3].sum(axis=(0, 2, 3)) > 0 for site, cube in self.cubes.items()}
+            out = self._plane(sum(int(mask.sum()) for mask in observed.values()))
+            labels, column = [], 0
+            for site, (_, units, _, counts) in self.cubes.items():
+                mask = observed[site]
+                self._place(out, site, counts[:, mask], np.arange(column, column + mask.sum()))
+                labels += [f"{site} / {unit}" for unit in units[mask]]
+                column += mask.sum()
+            return DailyIndex(self.start, np.array(labels, dtype=object), self.categories, out)
+        return self._rollup('site_unit', build)
+
+    def _rollup(self, key, build):
+        if key not in self._rollups:
+            self._rollups[key] = build()
+        return self._rollups[key]
+
+
+@instrumented('load_sites')
+def load_sites(sites, store_root=SITE_STORE_ROOT, workers=None, chunked=False):
+    """
+    Ingests {site: csv path} on a process pool (inline for workers=1) and
+    merges the results into a SiteIndex.
+    """
+    jobs = [(site, path, store_root, chunked) for site, path in sites.items()]
+    if not jobs:
+        raise ValueError("No site files found.")
+    if workers == 1 or len(jobs) == 1:
+        parts = [_ingest_site(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_ingest_site, *zip(*jobs)))
+    return SiteIndex.merge(parts)
+
+
+@instrumented('rollup_kinetics')
+def rollup_kinetics(network, level, window, sigma_val, start=None, end=None, smoother='mean'):
+    """
+    calculate_group_kinetics for a network roll-up: per 'site', per
+    'unit_type' (across sites) or per 'site_unit'. Returns the long frame
+    with Site and/or Unit columns.
+    """
+    if level == 'site':
+        daily = calculate_group_kinetics(network.by_site(), 'Unit', window, sigma_val, start, end, smoother)
+        return daily.rename(columns={'Unit': 'Site'})
+    if level == 'unit_type':
+        return calculate_group_kinetics(network.by_unit_type(), 'Unit', window, sigma_val, start, end, smoother)
+    if level == 'site_unit':
+        daily = calculate_group_kinetics(network.by_site_unit(), 'Unit', window, sigma_val, start, end, smoother)
+        pairs = daily['Unit'].astype(str).str.split(' / ', n=1, expand=True)
+        daily.insert(0, 'Site', pairs[0])
+        daily['Unit'] = pairs[1]
+        return daily
+    raise ValueError(f"Unknown roll-up '{level}' (expected one of {', '.join(ROLLUPS)}).")
+
+
+def rollup_status(daily, sigma_val):
+    """
+    get_strategic_status of every group of a rollup_kinetics frame.
+    """
+    keys = [c for c in ('Site', 'Unit') if c in daily.columns]
+    rows = []
+    for group, frame in daily.groupby(keys, sort=True):
+        z_score, status, _, _, conf_pct = get_strategic_status(frame, frame['mean'].iloc[0], frame['std'].iloc[0], sigma_val)
+        group = group if isinstance(group, tuple) else (group,)
+        rows.append({**dict(zip(keys, group)), 'total_rpn': float(frame['weighted_score'].sum()),
+                     'latest_rpn': float(frame['weighted_score'].iloc[-1]), 'ucl': float(frame['ucl'].iloc[0]),
+                     'z_score': float(z_score), 'status': status, 'confidence': conf_pct})
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sites', required=True, help='directory of site CSVs, or a glob')
+    parser.add_argument('--store-root', default=SITE_STORE_ROOT, help='per-site stores are kept under here')
+    parser.add_argument('--by', choices=ROLLUPS, default='site')
+    parser.add_argument('--window', type=int, default=7)
+    parser.add_argument('--sigma', type=int, default=2)
+    parser.add_argument('--start', help='first day of the analysis period (YYYY-MM-DD)')
+    parser.add_argument('--end', help='last day of the analysis period (YYYY-MM-DD)')
+    parser.add_argument('--workers', type=int, default=None, help='process pool size (default: all cores; 1 runs inline)')
+    parser.add_argument('--chunked', action='store_true', help='stream each CSV into daily aggregates (out-of-core)')
+    parser.add_argument('--out', help='write the roll-up status table (.parquet, .csv or .json)')
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    network = load_sites(discover_sites(args.sites), args.store_root, args.workers, args.chunked)
+    load_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    daily = rollup_kinetics(network, args.by, args.window, args.sigma, args.start, args.end)
+    table = rollup_status(daily, args.sigma)
+    rollup_s = time.perf_counter() - t0
+
+    print(f"Loaded {len(network.sites)} sites × {len(network.units)} unit types × {len(network.dates)} days in {load_s:.2f}s")
+    print(f"Rolled up {len(table)} {args.by} groups in {rollup_s:.2f}s")
+    print(table['status'].value_counts().to_string())
+    if args.out:
+        write_results(table, args.out)
+        print(f"Wrote {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+import functools
+import threading
+
+import numpy as np
+import pandas as pd
+
+from daily_index import day_slice
+from quantization import DEFAULT_SCHEME, encode_harm, score
+from risk_engine import latest_kinetics
+
+# Ranking levels and the incident columns that key them. Subcategories are
+# keyed under their category; the unit-qualified levels rank within one unit.
+LEVELS = {
+    'Unit': ('Unit',),
+    'Category': ('Category',),
+    'Subcategory': ('Category', 'Subcategory'),
+    'Unit × Category': ('Unit', 'Category'),
+    'Unit × Subcategory': ('Unit', 'Category', 'Subcategory'),
+}
+
+# Ranking metrics: cumulative RPN over the range, or the trend kinetics on its last day
+RANK_BY = ('rpn', 'velocity', 'acceleration')
+
+
+def _key_codes(columns, names):
+    """
+    (column per row, keys) for one level: a single column keeps all its
+    labels; a composite level keeps only the label combinations that occur.
+    """
+    if len(names) == 1:
+        codes, labels = columns[names[0]]
+        return codes, pd.Index(labels, name=names[0])
+    dims = [len(columns[name][1]) for name in names]
+    flat = np.ravel_multi_index([columns[name][0] for name in names], dims)
+    present, inverse = np.unique(flat, return_inverse=True)
+    parts = np.unravel_index(present, dims)
+    keys = pd.MultiIndex.from_arrays([np.asarray(columns[name][1])[part] for name, part in zip(names, parts)], names=names)
+    return inverse, keys
+
+
+def _locked(method):
+    # add() grows and replaces planes in place; readers on other threads wait for it
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class HotspotIndex:
+    """
+    Maintained top-K driver rankings. Each level holds a day × key plane of
+    weighted_score with running prefix sums, so the cumulative RPN of every
+    key over any date range is one subtraction, and keeps its keys ordered
+    by all-time RPN. add() scatters a micro-batch into the touched days,
+    refreshes the prefix sums from the earliest of them (O(keys) when
+    appending to the latest day) and re-inserts only the keys it changed.
+    """
+
+    def __init__(self, start, keys, planes, scheme=DEFAULT_SCHEME):
+        self.start = pd.Timestamp(start).normalize()
+        self.scheme = scheme
+        self.keys = dict(keys)
+        self.n = next(iter(planes.values())).shape[0] if planes else 0
+        self.version = 0
+        self._lock = threading.RLock()
+        self.score, self.cum, self._order = {}, {}, {}
+        for level, plane in planes.items():
+            rows, cols = max(2 * self.n, 64), max(2 * plane.shape[1], 16)
+            self.score[level] = np.zeros((rows, cols))
+            self.score[level][:self.n, :plane.shape[1]] = plane
+            self.cum[level] = np.zeros((rows + 1, cols))
+            np.cumsum(plane, axis=0, out=self.cum[level][1:self.n + 1, :plane.shape[1]])
+            self._order[level] = np.argsort(-self.cum[level][self.n, :plane.shape[1]], kind='stable')
+
+    @property
+    def levels(self):
+        return list(self.keys)
+
+    @property
+    def dates(self):
+        return pd.date_range(self.start, periods=self.n, freq='D', name='Date')
+
+    # --- Construction ---
+    @classmethod
+    def from_incidents(cls, df, scheme=DEFAULT_SCHEME, levels=None):
+        """
+        Builds every level whose columns are in `df` (Date, Harm_Level and
+        Unit / Category / Subcategory), or only `levels`.
+        """
+        names = {name for cols in LEVELS.values() for name in cols if name in df}
+        columns = {}
+        for name in names:
+            labels = pd.Categorical(df[name])
+            columns[name] = (labels.codes, labels.categories)
+        days = df['Date'].to_numpy().astype('datetime64[D]')
+        return cls._from_codes(days, columns, score(encode_harm(df['Harm_Level']), scheme), scheme, levels)
+
+    @classmethod
+    def from_arrays(cls, arrays, scheme=DEFAULT_SCHEME, levels=None):
+        """
+        Builds every level from the code columns of a
+        shared_arrays.IncidentArrays, without materializing a frame.
+        """
+        columns = {'Unit': (arrays.unit, arrays.units), 'Category': (arrays.category, arrays.categories),
+                   'Subcategory': (arrays.subcategory, arrays.subcategories)}
+        return cls._from_codes(arrays.day, columns, arrays.score(scheme), scheme, levels)
+
+    @classmethod
+    def from_index(cls, index):
+        """
+        Unit, category and unit × category levels from the score plane of a
+        daily_index.DailyIndex (e.g. a federated roll-up or a chunked load,
+        which carry no subcategories), under the index's scheme.
+        """
+        n_days, n_units, n_categories = index.score.shape
+        keys = {'Unit': index.units, 'Category': index.categories,
+                'Unit × Category': pd.MultiIndex.from_product([index.units, index.categories])}
+        planes = {'Unit': index.score.sum(axis=2), 'Category': index.score.sum(axis=1),
+                  'Unit × Category': index.score.reshape(n_days, n_units * n_categories)}
+        return cls(index.start, keys, planes, index.scheme)
+
+    @classmethod
+    def _from_codes(cls, days, columns, weights, scheme, levels=None):
+        levels = [level for level, names in LEVELS.items() if all(name in columns for name in names)
+                  and (levels is None or level in levels)]
+        if len(days):
+            first = days.min()
+            n_days = int((days.max() - first).astype(np.int64)) + 1
+        else:
+            first, n_days = np.datetime64('today', 'D'), 0
+        day_pos = (days - first).astype(np.int64)
+        keys, planes = {}, {}
+        for level in levels:
+            codes, keys[level] = _key_codes(columns, LEVELS[level])
+            size = len(keys[level])
+            planes[level] = np.bincount(day_pos * size + codes, weights=weights, minlength=n_days * size).reshape(n_days, size)
+        return cls(first, keys, planes, scheme)
+
+    # --- Incremental updates ---
+    @_locked
+    def add(self, incidents):
+        """
+        Adds one incident (dict) or a micro-batch (DataFrame) with Date,
+        Harm_Level and the level columns; late incidents and unseen units,
+        categories or subcategories are allowed.
+        """
+        if isinstance(incidents, dict):
+            incidents = pd.DataFrame([incidents])
+        if incidents.empty:
+            return self
+
+        days = pd.to_datetime(incidents['Date']).to_numpy().astype('datetime64[D]')
+        weights = score(encode_harm(incidents['Harm_Level']), self.scheme)
+        first = self._extend(days.min(), days.max())
+        day_pos = (days - self.start.to_datetime64().astype('datetime64[D]')).astype(np.int64) - first
+
+        for level, names in LEVELS.items():
+            if level not in self.keys:
+                continue
+            codes = self._lookup(level, incidents, names)
+            size = len(self.keys[level])
+            delta = np.bincount(day_pos * size + codes, weights=weights, minlength=(self.n - first) * size)
+            delta = delta.reshape(self.n - first, size)
+            plane, cum = self.score[level], self.cum[level]
+            plane[first:self.n, :size] += delta
+            # Prefix sums only change from the earliest touched day on
+            np.cumsum(plane[first:self.n, :size], axis=0, out=cum[first + 1:self.n + 1, :size])
+            cum[first + 1:self.n + 1, :size] += cum[first, :size]
+            self._rerank(level, np.flatnonzero(delta.any(axis=0)))
+        self.version += 1
+        return self
+
+    def _extend(self, lo, hi):
+        """
+        Extends the calendar to cover [lo, hi], growing every plane's row
+        capacity by doubling; days before the start shift the planes down.
+        Returns the row of `lo`.
+        """
+        origin = self.start.to_datetime64().astype('datetime64[D]')
+        if self.n == 0:
+            self.start, origin = pd.Timestamp(lo), lo
+        shift = max(int((origin - lo).astype(np.int64)), 0)
+        n = max(self.n + shift, int((hi - origin).astype(np.int64)) + shift + 1)
+        for level in self.keys:
+            plane, cum = self.score[level], self.cum[level]
+            if n > plane.shape[0] or shift:
+                rows = max(plane.shape[0], 2 * n) if n > plane.shape[0] else plane.shape[0]
+                grown = np.zeros((rows, plane.shape[1]))
+                grown[shift:shift + self.n] = plane[:self.n]
+                self.score[level] = grown
+                self.cum[level] = np.zeros((rows + 1, plane.shape[1]))
+                self.cum[level][shift + 1:shift + self.n + 1] = cum[1:self.n + 1]
+            # Quiet days carry the running totals forward
+            self.cum[level][shift + self.n + 1:n + 1] = self.cum[level][shift + self.n]
+        if shift:
+            self.start = pd.Timestamp(lo)
+        self.n = n
+        return int((lo - self.start.to_datetime64().astype('datetime64[D]')).astype(np.int64))
+
+    def _lookup(self, level, incidents, names):
+        """
+        Key column of each incident, appending unseen keys (and growing the
+        column capacity by doubling).
+        """
+        if len(names) == 1:
+            labels = pd.Index(incidents[names[0]].to_numpy(), name=names[0])
+        else:
+            labels = pd.MultiIndex.from_arrays([incidents[name].to_numpy() for name in names], names=names)
+        keys = self.keys[level]
+        codes = keys.get_indexer(labels)
+        if (codes < 0).any():
+            keys = self.keys[level] = keys.append(labels[codes < 0].unique())
+            codes = keys.get_indexer(labels)
+            plane = self.score[level]
+            if len(keys) > plane.shape[1]:
+                cols = 2 * len(keys)
+                for arrays in (self.score, self.cum):
+                    grown = np.zeros((arrays[level].shape[0], cols))
+                    grown[:, :arrays[level].shape[1]] = arrays[level]
+                    arrays[level] = grown
+            # New keys have no history: they join the ranking at their first total
+            self._order[level] = np.r_[self._order[level], np.arange(len(self._order[level]), len(keys))]
+        return codes
+
+    def _rerank(self, level, changed):
+        """
+        Moves the `changed` keys to their new places in the all-time
+        ranking; every other key keeps its relative order.
+        """
+        if not len(changed):
+            return
+        totals = self.cum[level][self.n, :len(self.keys[level])]
+        order = self._order[level]
+        kept = order[~np.isin(order, changed)]
+        moved = changed[np.argsort(-totals[changed], kind='stable')]
+        positions = np.searchsorted(-totals[kept], -totals[moved], side='right')
+        self._order[level] = np.insert(kept, positions, moved)
+
+    # --- Queries ---
+    def day_slice(self, start=None, end=None):
+        return day_slice(self.start, self.n, start, end)
+
+    @_locked
+    def totals(self, level, start=None, end=None):
+        """
+        Cumulative RPN of every key over the inclusive [start, end] date range.
+        """
+        rows, size = self.day_slice(start, end), len(self.keys[level])
+        cum = self.cum[level]
+        return pd.Series(cum[rows.stop, :size] - cum[rows.start, :size], index=self.keys[level], name='rpn')
+
+    @_locked
+    def top(self, level, k=10, by='rpn', start=None, end=None, unit=None, window=7, smoother='mean'):
+        """
+        The k leading drivers at `level` over [start, end], ranked by
+        cumulative RPN or by the velocity / acceleration of their smoothed
+        daily score on the last day of the range. `unit` restricts a
+        unit-qualified level to one unit. Keys without RPN in the range are
+        never ranked. Returns rpn, velocity and acceleration per key, best first.
+        """
+        if by not in RANK_BY:
+            raise ValueError(f"Unknown ranking {by!r}; expected one of {', '.join(RANK_BY)}")
+        keys = self.keys[level]
+        rows, size = self.day_slice(start, end), len(keys)
+        cum = self.cum[level]
+        rpn = cum[rows.stop, :size] - cum[rows.start, :size]
+        candidates = rpn > 0
+        if unit is not None:
+            candidates &= keys.get_level_values('Unit') == unit
+
+        # 1. Selection: all-time RPN walks the maintained order, other rankings partition
+        if by == 'rpn' and rows == slice(0, self.n):
+            order = self._order[level]
+            chosen = order[candidates[order]][:k]
+        else:
+            plane = self.score[level][rows, :size]
+            if by == 'rpn':
+                metric = rpn
+            else:
+                velocity, acceleration = latest_kinetics(plane, window, smoother)[1:]
+                metric = velocity if by == 'velocity' else acceleration
+            metric = np.where(candidates & ~np.isnan(metric), metric, -np.inf)
+            chosen = np.flatnonzero(np.isfinite(metric))
+            if len(chosen) > k:
+                chosen = chosen[np.argpartition(-metric[chosen], k - 1)[:k]]
+            chosen = chosen[np.lexsort((chosen, -metric[chosen]))]
+
+        # 2. Kinetics for the chosen keys only
+        _, velocity, acceleration = latest_kinetics(self.score[level][rows, chosen], window, smoother)
+        return pd.DataFrame({'rpn': rpn[chosen], 'velocity': velocity, 'acceleration': acceleration},
+                            index=keys[chosen])
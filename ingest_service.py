@@ -0,0 +1,403 @@
+"""
+Live incident ingestion: new incidents reach the store and the indexes as
+they arrive, instead of when someone replaces the CSV.
+
+An asyncio service reads one or more sources:
+    tail:<path>            a file being appended to (JSON lines or CSV rows)
+    socket:<host>:<port>   newline-delimited records over TCP
+    queue                  an in-process asyncio.Queue (stand-in for the HL7/FHIR feed)
+Records are batched (up to --batch records or --max-delay seconds) and
+validated and quantized one batch at a time. Accepted rows are appended to
+the incident CSV, and the Parquet store is brought up to date every --sync
+seconds, so risk_api.py, alert_engine.py and the next dashboard start see
+them too. Rejected rows are counted (and written to --rejects). The
+dashboard runs the same service in-process with
+RISK_INGEST_SOURCE=<source>[,<source>...]. Each batch also goes into its
+DailyIndex as a new version, so only cached views of the units and days it
+touched are recomputed.
+
+    python ingest_service.py --source socket:127.0.0.1:8503 --source tail:feed.jsonl
+    echo '{"Date": "2025-03-31", "Hour": "14:00", "Unit": "NICU", "Category": "Fall", "Subcategory": "Sub-Fall", "Harm_Level": "C"}' | nc -q0 127.0.0.1 8503
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_store import CSV_PATH, STORE_PATH, quantize_incidents, refresh_store
+from diagnostics import instrumented
+from hotspots import HotspotIndex
+from quantization import DEFAULT_SCHEME, HARM_LEVELS, scheme_key
+
+# Incident fields, in hospital_risk_data.csv column order
+CSV_COLUMNS = ['Date', 'Hour', 'Category', 'Subcategory', 'Unit', 'Harm_Level', 'Description', 'Harm_Score']
+
+
+# --- 1. SOURCES ---
+# Each source is an async iterator of record chunks: lists of dicts or text lines.
+class QueueSource:
+    """
+    In-process feed: put a record (dict or text line) or a list of them on
+    `queue`; None ends the source. Stands in for an HL7/FHIR interface
+    engine until one is wired in.
+    """
+
+    def __init__(self, queue=None, maxsize=1024):
+        self.queue = queue if queue is not None else asyncio.Queue(maxsize)
+
+    async def chunks(self):
+        while True:
+            item = await self.queue.get()
+            if item is None:
+                return
+            yield item if isinstance(item, list) else [item]
+
+
+class FileTailSource:
+    """
+    Lines appended to a file (JSON lines, or CSV rows in the incident
+    schema), polled every `poll` seconds. Starts at the end of the file
+    unless `from_start`; starts over if the file is truncated or replaced.
+    """
+
+    def __init__(self, path, poll=0.25, from_start=False):
+        self.path, self.poll, self.from_start = path, poll, from_start
+
+    async def chunks(self):
+        while not os.path.exists(self.path):
+            await asyncio.sleep(self.poll)
+        fh = open(self.path, 'rb')
+        try:
+            if not self.from_start:
+                fh.seek(0, os.SEEK_END)
+            pending = b''
+            while True:
+                data = fh.read(1 << 20)
+                if data:
+                    lines = (pending + data).split(b'\n')
+                    pending = lines.pop()
+                    yield [line.decode() for line in lines if line.strip()]
+                    continue
+                try:
+                    stat = os.stat(self.path)
+                except FileNotFoundError:
+                    stat = None
+                if stat is None or stat.st_size < fh.tell() or stat.st_ino != os.fstat(fh.fileno()).st_ino:
+                    # Rotated or truncated: read the new file from its start
+                    while not os.path.exists(self.path):
+                        await asyncio.sleep(self.poll)
+                    fh.close()
+                    fh, pending = open(self.path, 'rb'), b''
+                    continue
+                await asyncio.sleep(self.poll)
+        finally:
+            fh.close()
+
+
+class SocketSource:
+    """
+    A TCP listener; every connection sends newline-delimited records. A
+    bounded hand-off queue pushes back on senders when ingestion lags.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8503, backlog=64):
+        self.host, self.port = host, port
+        self._queue = asyncio.Queue(backlog)
+
+    async def _handle(self, reader, writer):
+        pending = b''
+        try:
+            while data := await reader.read(1 << 16):
+                lines = (pending + data).split(b'\n')
+                pending = lines.pop()
+                await self._queue.put([line.decode() for line in lines if line.strip()])
+            if pending.strip():
+                await self._queue.put([pending.decode()])
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def chunks(self):
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        async with server:
+            while True:
+                yield await self._queue.get()
+
+
+def open_source(spec):
+    """
+    Source for a 'tail:<path>', 'socket:<host>:<port>' or 'queue' spec.
+    """
+    kind, _, target = spec.partition(':')
+    if kind == 'tail':
+        return FileTailSource(target)
+    if kind == 'socket':
+        host, _, port = target.rpartition(':')
+        return SocketSource(host or '127.0.0.1', int(port))
+    if kind == 'queue':
+        return QueueSource()
+    raise ValueError(f"Unknown source '{spec}' (expected tail:<path>, socket:<host>:<port> or queue).")
+
+
+# --- 2. VALIDATION & QUANTIZATION ---
+def parse_records(records):
+    """
+    Frame of raw fields (all strings) from dicts, JSON lines or CSV rows;
+    CSV header lines are skipped and unparseable lines become empty rows,
+    which validation rejects.
+    """
+    rows = []
+    for record in records:
+        if isinstance(record, str):
+            text = record.strip()
+            if text.startswith('{'):
+                try:
+                    record = json.loads(text)
+                except ValueError:
+                    record = {}
+            elif text.startswith('Date,'):
+                continue
+            else:
+                record = dict(zip(CSV_COLUMNS, next(csv.reader([text]), [])))
+        rows.append(record if isinstance(record, dict) else {})
+    frame = pd.DataFrame.from_records(rows, columns=CSV_COLUMNS)
+    return frame.astype(object).where(frame.notna(), '').astype(str)
+
+
+def validate(raw):
+    """
+    (accepted, rejected): rows with a YYYY-MM-DD date, an HH:MM hour, a
+    known harm level and non-empty unit / category / subcategory. Rejected
+    rows carry the reason in an 'error' column.
+    """
+    dates = pd.to_datetime(raw['Date'], format='%Y-%m-%d', errors='coerce')
+    hours = raw['Hour'].str.extract(r'^(\d{2}):\d{2}$')[0].astype(float)
+    checks = {
+        'Date': dates.notna(),
+        'Hour': hours.lt(24),
+        'Harm_Level': raw['Harm_Level'].isin(HARM_LEVELS),
+        'Unit': raw['Unit'].str.len() > 0,
+        'Category': raw['Category'].str.len() > 0,
+        'Subcategory': raw['Subcategory'].str.len() > 0,
+    }
+    ok = np.logical_and.reduce([check.to_numpy() for check in checks.values()])
+    rejected = raw[~ok].copy()
+    if len(rejected):
+        failed = pd.DataFrame({field: ~check[~ok] for field, check in checks.items()})
+        rejected['error'] = failed.apply(lambda row: 'invalid ' + ', '.join(row.index[row]), axis=1)
+    accepted = raw[ok].copy()
+    accepted['Harm_Score'] = (accepted['Harm_Level'].map({level: i + 1 for i, level in enumerate(HARM_LEVELS)})).astype(str)
+    return accepted.reset_index(drop=True), rejected
+
+
+# --- 3. SERVICE ---
+class IngestService:
+    """
+    Batches records from any number of sources. Each batch is validated,
+    quantized, appended to the CSV and, when an index is held, folded into
+    it as a new version (DailyIndex.append); `index` always refers to the
+    latest version, so readers just take it. Hotspot indexes requested
+    through hotspot_index() are kept current by adding every batch to them.
+    The store is synced from the CSV every `sync_seconds` and when the
+    sources end.
+    """
+
+    def __init__(self, index=None, csv_path=CSV_PATH, store_path=STORE_PATH, batch_size=1000, max_delay=0.2,
+                 sync_seconds=5.0, rejects_path=None, persist=True):
+        self.index = index
+        self.csv_path, self.store_path, self.rejects_path = csv_path, store_path, rejects_path
+        self.batch_size, self.max_delay, self.sync_seconds, self.persist = batch_size, max_delay, sync_seconds, persist
+        self.received = self.accepted = self.rejected = self.batches = 0
+        self.busy_seconds = 0.0
+        self.started = time.time()
+        self._pending = None
+        self._io = None
+        self._unsynced = False
+        # Scheme key -> HotspotIndex; guarded with the index against the reading threads
+        self.hotspots = {}
+        self._lock = threading.Lock()
+
+    def hotspot_index(self, scheme=DEFAULT_SCHEME):
+        """
+        Top-K driver rankings of the live data under `scheme`: built from
+        the index on first request, then updated in place with every
+        accepted batch (HotspotIndex.add) rather than rebuilt per version.
+        """
+        key = scheme_key(scheme)
+        with self._lock:
+            if key not in self.hotspots:
+                self.hotspots[key] = HotspotIndex.from_index(self.index.with_scheme(scheme))
+            return self.hotspots[key]
+
+    def stats(self):
+        elapsed = time.time() - self.started
+        return {
+            'received': self.received, 'accepted': self.accepted, 'rejected': self.rejected, 'batches': self.batches,
+            'version': None if self.index is None else self.index.version,
+            'per_second': self.accepted / elapsed if elapsed else 0.0,
+            'busy_per_second': self.accepted / self.busy_seconds if self.busy_seconds else 0.0,
+        }
+
+    # --- Batches ---
+    @instrumented('ingest_batch')
+    def process(self, records):
+        """
+        Validates, quantizes and applies one batch; returns the accepted
+        incidents as a quantized frame.
+        """
+        t0 = time.perf_counter()
+        raw = parse_records(records)
+        accepted, rejected = validate(raw)
+        self.received += len(raw)
+        self.rejected += len(rejected)
+        if len(rejected) and self.rejects_path:
+            rejected.to_json(self.rejects_path, orient='records', lines=True, mode='a')
+        incidents = quantize_incidents(accepted)
+        if len(incidents):
+            if self.persist:
+                self._append_csv(accepted)
+            with self._lock:
+                if self.index is not None:
+                    self.index = self.index.append(incidents)
+                for hotspots in self.hotspots.values():
+                    hotspots.add(incidents)
+            self.accepted += len(incidents)
+        self.batches += 1
+        self.busy_seconds += time.perf_counter() - t0
+        return incidents
+
+    def _append_csv(self, accepted):
+        # Rows go in the CSV's own column order, after a newline if the file lacks one
+        with open(self.csv_path, 'a+', newline='') as fh:
+            fh.seek(0, os.SEEK_END)
+            if fh.tell():
+                fh.seek(fh.tell() - 1)
+                if fh.read(1) != '\n':
+                    fh.write('\n')
+            accepted[CSV_COLUMNS].to_csv(fh, header=False, index=False, lineterminator='\n')
+        self._unsynced = True
+
+    def sync_store(self):
+        """
+        Brings the Parquet store up to date with the appended CSV rows.
+        """
+        if self._unsynced:
+            refresh_store(self.csv_path, self.store_path)
+            self._unsynced = False
+
+    # --- Event loop ---
+    async def _pump(self, source):
+        async for chunk in source.chunks():
+            if chunk:
+                await self._pending.put(chunk)
+
+    async def _batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            chunk = await self._pending.get()
+            if chunk is None:
+                return
+            records, deadline = list(chunk), loop.time() + self.max_delay
+            while len(records) < self.batch_size:
+                try:
+                    chunk = await asyncio.wait_for(self._pending.get(), max(deadline - loop.time(), 0))
+                except asyncio.TimeoutError:
+                    break
+                if chunk is None:
+                    self._pending.put_nowait(None)
+                    break
+                records.extend(chunk)
+            async with self._io:
+                for lo in range(0, len(records), self.batch_size):
+                    self.process(records[lo:lo + self.batch_size])
+
+    async def _sync_loop(self):
+        while True:
+            await asyncio.sleep(self.sync_seconds)
+            async with self._io:
+                self.sync_store()
+
+    async def run(self, sources):
+        """
+        Ingests until every source has ended (queue sources end on None;
+        tailed files and sockets run until cancelled).
+        """
+        self._pending = asyncio.Queue(64)
+        self._io = asyncio.Lock()
+        batcher = asyncio.create_task(self._batches())
+        syncer = asyncio.create_task(self._sync_loop()) if self.persist and self.sync_seconds else None
+        pumps = asyncio.gather(*(self._pump(source) for source in sources))
+        try:
+            # A failed batch stops the service instead of leaving the sources filling the queue
+            await asyncio.wait([pumps, batcher], return_when=asyncio.FIRST_COMPLETED)
+            if batcher.done():
+                batcher.result()
+            await pumps
+            await self._pending.put(None)
+            await batcher
+        finally:
+            pumps.cancel()
+            batcher.cancel()
+            await asyncio.gather(pumps, batcher, return_exceptions=True)
+            if syncer is not None:
+                syncer.cancel()
+            if self.persist:
+                self.sync_store()
+
+    def start(self, sources):
+        """
+        Runs the service on its own event loop in a daemon thread (e.g.
+        inside the dashboard process); returns the thread.
+        """
+        thread = threading.Thread(target=asyncio.run, args=(self.run(sources),), name='ingest', daemon=True)
+        thread.start()
+        return thread
+
+
+async def _report(service, seconds):
+    while True:
+        await asyncio.sleep(seconds)
+        stats = service.stats()
+        print(f"{stats['accepted']:,} accepted, {stats['rejected']:,} rejected in {stats['batches']:,} batches "
+              f"({stats['per_second']:,.0f}/s overall, {stats['busy_per_second']:,.0f}/s while busy)", flush=True)
+
+
+async def _serve(service, sources, report):
+    reporter = asyncio.create_task(_report(service, report)) if report else None
+    try:
+        await service.run(sources)
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--source', action='append', required=True, help='tail:<path> or socket:<host>:<port> (repeatable)')
+    parser.add_argument('--csv', default=CSV_PATH)
+    parser.add_argument('--store', default=STORE_PATH)
+    parser.add_argument('--batch', type=int, default=1000, help='records per batch at most')
+    parser.add_argument('--max-delay', type=float, default=0.2, help='seconds a partial batch waits for more records')
+    parser.add_argument('--sync', type=float, default=5.0, help='seconds between store syncs')
+    parser.add_argument('--rejects', help='append rejected records (with the reason) to this JSON lines file')
+    parser.add_argument('--report', type=float, default=10.0, help='seconds between progress lines (0 disables)')
+    args = parser.parse_args(argv)
+
+    service = IngestService(None, args.csv, args.store, args.batch, args.max_delay, args.sync, args.rejects)
+    print(f"Ingesting {', '.join(args.source)} into {args.csv} / {args.store}", flush=True)
+    try:
+        asyncio.run(_serve(service, [open_source(spec) for spec in args.source], args.report))
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(service.stats()))
+
+
+if __name__ == '__main__':
+    main()
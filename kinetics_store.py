@@ -0,0 +1,245 @@
+"""
+Persisted kinetics: the daily series the dashboard derives, kept on disk.
+
+Writes the calculate_daily_kinetics series (weighted_score, raw_level,
+smooth, velocity, acceleration) of the whole hospital and every unit into a
+Parquet dataset, one directory per series configuration and hive-partitioned
+by unit and month:
+
+    kinetics_store/window=7/smoother=mean/scheme=quadratic/Unit=ICU/month=2025-03/part-00000.parquet
+
+A rerun after the CSV has grown rewrites only the months whose values the
+new days change; any other change to the history rebuilds the
+configuration. Read it back with read_kinetics(), or from any Arrow/Parquet
+tool, filtering on Unit / month / Date for partition and row-group pruning:
+
+    python kinetics_store.py --windows 3 7 15 --smoothers mean median
+    pd.read_parquet('kinetics_store', filters=[('window', '=', 7), ('Unit', '=', 'ICU'), ('Date', '>=', pd.Timestamp('2025-03-01'))])
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from daily_index import DailyIndex
+from data_store import CSV_PATH, STORE_PATH, aggregate_csv_chunks
+from diagnostics import instrumented
+from quantization import DEFAULT_SCHEME, SCHEMES
+from risk_engine import KINETICS_CACHE, get_strategic_status, group_planes, kinetics_key, lag_diff
+from shared_arrays import load_arrays
+from smoothing import SMOOTHERS, smooth
+
+KINETICS_STORE_PATH = 'kinetics_store'
+MANIFEST = '_manifest.json'
+
+# Stored columns, as in a calculate_daily_kinetics frame; the control limits
+# depend on the analysis period and are derived on read
+SERIES_COLUMNS = ['Date', 'weighted_score', 'raw_level', 'smooth', 'velocity', 'acceleration']
+
+# Scope label of the hospital-wide series (as in latest_group_signals)
+HOSPITAL = 'Hospital'
+
+
+def config_path(window, smoother='mean', scheme=DEFAULT_SCHEME, store_path=KINETICS_STORE_PATH):
+    """
+    Directory of one series configuration; only named weighting schemes are stored.
+    """
+    if scheme not in SCHEMES:
+        raise ValueError(f"Only named schemes are stored (one of {', '.join(SCHEMES)}).")
+    return os.path.join(store_path, f'window={window}', f'smoother={smoother}', f'scheme={scheme}')
+
+
+def read_manifest(path):
+    path = os.path.join(path, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def _planes(index):
+    """
+    Day × scope score, level_sum and incident planes; scope 0 is the
+    hospital, then every unit, reduced exactly as DailyIndex.daily does.
+    """
+    rows = index.day_slice()
+    _, hospital = group_planes(index, [], rows, index.score, index.level_sum, index.incidents)
+    _, units = group_planes(index, ['Unit'], rows, index.score, index.level_sum, index.incidents)
+    return [np.column_stack((h, u)) for h, u in zip(hospital, units)]
+
+
+def _digest(planes, n_days):
+    digest = hashlib.blake2b(digest_size=8)
+    for plane in planes:
+        digest.update(np.ascontiguousarray(plane[:n_days]).data)
+    return digest.hexdigest()
+
+
+def _first_changed_day(stored_days, window, smoother):
+    # Centered smoothers reach (window - 1) // 2 days ahead; velocity and
+    # acceleration only look back, so earlier days keep their values
+    return stored_days if smoother == 'ewma' else max(stored_days - (window - 1) // 2, 0)
+
+
+@instrumented('sync_kinetics')
+def sync_kinetics(index, window, smoother='mean', store_path=KINETICS_STORE_PATH):
+    """
+    Brings one configuration (window, smoother, the index's scheme) up to
+    date with `index`. Days appended since the last sync rewrite only the
+    months they change; any other change to the stored history rebuilds the
+    configuration. Returns (mode, months written): mode is 'current',
+    'appended' or 'built'.
+    """
+    path = config_path(window, smoother, index.scheme, store_path)
+    manifest = read_manifest(path)
+    planes = _planes(index)
+    scopes = [HOSPITAL] + [str(unit) for unit in index.units]
+    n_days = len(index.dates)
+
+    # 1. What changed since the last sync
+    first = 0
+    if (manifest is not None and manifest['start'] == str(index.start.date()) and manifest['scopes'] == scopes
+            and manifest['days'] <= n_days and manifest['digest'] == _digest(planes, manifest['days'])):
+        if manifest['version'] == index.version:
+            return 'current', 0
+        first = _first_changed_day(manifest['days'], window, smoother)
+    mode = 'appended' if first else 'built'
+    if first == 0:
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(os.path.join(path, MANIFEST)):
+        os.remove(os.path.join(path, MANIFEST))
+
+    # 2. Kinetics of every scope in one pass down the calendar
+    score, level_sum, incidents = planes
+    smoothed = smooth(score, window, smoother)
+    velocity = lag_diff(smoothed, window) / window
+    series = {
+        'weighted_score': score,
+        'raw_level': np.divide(level_sum, incidents, out=np.zeros(score.shape), where=incidents > 0),
+        'smooth': smoothed, 'velocity': velocity, 'acceleration': lag_diff(velocity, window) / window,
+    }
+
+    # 3. One file per scope and month, replaced atomically
+    months = index.dates.strftime('%Y-%m')
+    changed = pd.unique(months[first:])
+    for month in changed:
+        rows = np.flatnonzero(months == month)
+        dates = pa.array(index.dates[rows].to_numpy())
+        for s, scope in enumerate(scopes):
+            part = os.path.join(path, f'Unit={quote(scope, safe="")}', f'month={month}')
+            os.makedirs(part, exist_ok=True)
+            table = pa.table({'Date': dates, **{name: values[rows, s] for name, values in series.items()}})
+            pq.write_table(table, os.path.join(part, 'part-00000.parquet.tmp'), compression='zstd')
+            os.replace(os.path.join(part, 'part-00000.parquet.tmp'), os.path.join(part, 'part-00000.parquet'))
+
+    # Written last: readers only trust a configuration whose manifest matches their index
+    manifest = {'version': index.version, 'start': str(index.start.date()), 'days': n_days,
+                'digest': _digest(planes, n_days), 'scopes': scopes,
+                'window': window, 'smoother': smoother, 'scheme': index.scheme}
+    with open(os.path.join(path, MANIFEST), 'w') as fh:
+        json.dump(manifest, fh, indent=2)
+    return mode, len(changed)
+
+
+@instrumented('read_kinetics')
+def read_kinetics(unit=None, start=None, end=None, window=7, smoother='mean', scheme=DEFAULT_SCHEME,
+                  store_path=KINETICS_STORE_PATH, columns=SERIES_COLUMNS):
+    """
+    Stored daily kinetics of one unit (or the hospital when unit is None)
+    over an inclusive [start, end] date range, sorted by date. Only the
+    files of that unit and of the months in range are opened (found from
+    the directory names, without discovering the whole dataset), and Date
+    bounds are pushed down to their Parquet row groups.
+    """
+    import pyarrow.dataset as ds
+
+    # 1. Partition pruning straight from the layout: one unit, the months in range
+    scope = os.path.join(config_path(window, smoother, scheme, store_path),
+                         f'Unit={quote(HOSPITAL if unit is None else str(unit), safe="")}')
+    months = sorted(name[len('month='):] for name in os.listdir(scope) if name.startswith('month='))
+    predicate = None
+    if start is not None:
+        start = pd.Timestamp(start).normalize()
+        months = [m for m in months if m >= start.strftime('%Y-%m')]
+        predicate = ds.field('Date') >= pa.scalar(start)
+    if end is not None:
+        end = pd.Timestamp(end).normalize()
+        months = [m for m in months if m <= end.strftime('%Y-%m')]
+        predicate = ds.field('Date') <= pa.scalar(end) if predicate is None else predicate & (ds.field('Date') <= pa.scalar(end))
+
+    # 2. Date bounds pushed down to the row groups of those files
+    dataset = ds.dataset([os.path.join(scope, f'month={m}', 'part-00000.parquet') for m in months], format='parquet')
+    frame = dataset.to_table(columns=list(columns), filter=predicate).to_pandas()
+    return frame.sort_values('Date', ignore_index=True) if 'Date' in frame else frame
+
+
+def stored_kinetics(index, unit, start, end, window, sigma_val, smoother='mean', store_path=KINETICS_STORE_PATH,
+                    cache=KINETICS_CACHE):
+    """
+    cached_kinetics for a daily view, served from the store instead of
+    recomputed: same key, same ((daily, mean_val, std_val, ucl_value),
+    status) result. None when the store cannot serve the view: a sub-range
+    (its edges are smoothed over the range alone), or no configuration
+    synced from this exact index.
+    """
+    rows = index.day_slice(start, end)
+    if rows != slice(0, len(index.dates)) or index.scheme not in SCHEMES:
+        return None
+    manifest = read_manifest(config_path(window, smoother, index.scheme, store_path))
+    if manifest is None or manifest['version'] != index.version:
+        return None
+
+    key = kinetics_key(index, unit, start, end, window, sigma_val, smoother=smoother)
+    result = cache.get(key)
+    if result is None:
+        daily = read_kinetics(unit, None, None, window, smoother, index.scheme, store_path)
+        # Parquet keeps at least millisecond timestamps; match the index's own resolution
+        daily['Date'] = daily['Date'].astype(index.dates.dtype)
+        mean_val = daily['weighted_score'].mean()
+        std_val = daily['weighted_score'].std()
+        kinetics = (daily, mean_val, std_val, mean_val + sigma_val * std_val)
+        result = (kinetics, get_strategic_status(*kinetics[:3], sigma_val))
+        cache.put(key, result, int(daily.memory_usage(deep=True).sum()) + 512)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--csv', default=CSV_PATH)
+    parser.add_argument('--store', default=STORE_PATH)
+    parser.add_argument('--out', default=KINETICS_STORE_PATH, help='kinetics store directory')
+    parser.add_argument('--windows', type=int, nargs='+', default=[3, 7, 15])
+    parser.add_argument('--smoothers', nargs='+', default=['mean'], choices=SMOOTHERS)
+    parser.add_argument('--schemes', nargs='+', default=[DEFAULT_SCHEME], choices=list(SCHEMES))
+    parser.add_argument('--chunked', action='store_true', help='stream the CSV into daily aggregates (out-of-core)')
+    args = parser.parse_args(argv)
+
+    if args.chunked:
+        index = DailyIndex.from_aggregates(aggregate_csv_chunks(args.csv))
+    else:
+        index = DailyIndex.from_arrays(load_arrays(args.csv, args.store))
+    print(f"{len(index.dates)} days × {len(index.units) + 1} scopes")
+
+    rows = []
+    for scheme in args.schemes:
+        scored = index.with_scheme(scheme)
+        for window in args.windows:
+            for smoother in args.smoothers:
+                t0 = time.perf_counter()
+                mode, months = sync_kinetics(scored, window, smoother, args.out)
+                rows.append({'window': window, 'smoother': smoother, 'scheme': scheme, 'mode': mode,
+                             'months written': months, 'seconds': time.perf_counter() - t0})
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+    print(f"Wrote {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+import numpy as np
+import pandas as pd
+
+from daily_index import day_slice
+from quantization import DEFAULT_SCHEME, HARM_RANKS, encode_harm, score
+from risk_engine import lag_diff
+from smoothing import smooth
+
+# Drill-down path below the hospital root, coarsest level first
+PATH = ('Unit', 'Category', 'Subcategory')
+
+# Per-node series, in calculate_daily_kinetics column order
+SERIES = ['weighted_score', 'raw_level', 'smooth', 'velocity', 'acceleration']
+
+
+class KineticsTree:
+    """
+    Hospital → unit → category → subcategory kinetics, aggregated bottom-up.
+    Every node of every level is one column of a day × node plane: the
+    hospital root first, then each level in path order, leaves last.
+    Leaf columns are scattered once from the incident codes; siblings are
+    contiguous, so each parent column is the sum of its children's
+    (np.add.reduceat), never a groupby over incidents. kinetics() smooths
+    and differentiates every node in one pass per window and smoother and
+    keeps the result, so drilling into a node is a column lookup.
+    """
+
+    def __init__(self, start, leaves, score, level_sum, incidents, scheme=DEFAULT_SCHEME):
+        # `leaves` (a MultiIndex of full paths) must be sorted in path order
+        self.start = pd.Timestamp(start).normalize()
+        self.scheme = scheme
+        self.names = list(leaves.names)
+        self.n = score.shape[0]
+        self.dates = pd.date_range(self.start, periods=self.n, freq='D', name='Date')
+
+        # 1. Keys of every level: the distinct path prefixes, found from the leaf codes
+        codes = np.array(leaves.codes, dtype=np.int64).reshape(len(self.names), -1)
+        self.keys, self._starts = [None] * (self.depth + 1), [None] * self.depth
+        self.keys[self.depth] = leaves
+        for depth in range(self.depth - 1, -1, -1):
+            new = np.ones(len(leaves), dtype=bool)
+            if len(leaves):
+                new[1:] = (np.diff(codes[:depth], axis=1) != 0).any(axis=0)
+            self._starts[depth] = np.flatnonzero(new)
+            self.keys[depth] = pd.MultiIndex.from_arrays(
+                [leaves.get_level_values(name)[self._starts[depth]] for name in self.names[:depth]],
+                names=self.names[:depth]) if depth else pd.Index([()])
+        self.offsets = np.cumsum([0] + [len(keys) for keys in self.keys])
+
+        # 2. Parents are the sums of their children, level by level up to the root
+        self.score, self.level_sum = np.zeros((self.n, self.offsets[-1])), np.zeros((self.n, self.offsets[-1]))
+        self.incidents = np.zeros((self.n, self.offsets[-1]), dtype=np.int64)
+        for plane, leaf in ((self.score, score), (self.level_sum, level_sum), (self.incidents, incidents)):
+            plane[:, self.offsets[-2]:] = leaf
+            for depth in range(self.depth - 1, -1, -1):
+                # Children of parent p are the columns starting at _starts[depth][p]
+                starts = self._children_starts(depth)
+                if len(starts):
+                    plane[:, self.offsets[depth]:self.offsets[depth + 1]] = np.add.reduceat(
+                        plane[:, self.offsets[depth + 1]:self.offsets[depth + 2]], starts, axis=1)
+        self._kinetics = {}
+
+    @property
+    def depth(self):
+        return len(self.names)
+
+    def _children_starts(self, depth):
+        # First child column (within level depth + 1) of every node at `depth`
+        leaf_starts = self._starts[depth]
+        if depth + 1 == self.depth:
+            return leaf_starts
+        return np.searchsorted(self._starts[depth + 1], leaf_starts)
+
+    # --- Construction ---
+    @classmethod
+    def from_arrays(cls, arrays, scheme=DEFAULT_SCHEME):
+        """
+        Full tree from the code columns of a shared_arrays.IncidentArrays.
+        """
+        columns = {'Unit': (arrays.unit, arrays.units), 'Category': (arrays.category, arrays.categories),
+                   'Subcategory': (arrays.subcategory, arrays.subcategories)}
+        return cls._from_codes(arrays.day, columns, arrays.harm, scheme)
+
+    @classmethod
+    def from_incidents(cls, df, scheme=DEFAULT_SCHEME):
+        """
+        Tree over the PATH columns present in `df` (Date, Harm_Level and
+        Unit / Category / Subcategory); without Subcategory the leaves are
+        categories.
+        """
+        columns = {}
+        for name in PATH:
+            if name in df:
+                labels = pd.Categorical(df[name])
+                columns[name] = (labels.codes, labels.categories)
+        days = df['Date'].to_numpy().astype('datetime64[D]')
+        return cls._from_codes(days, columns, encode_harm(df['Harm_Level']), scheme)
+
+    @classmethod
+    def from_index(cls, index):
+        """
+        Hospital → unit → category tree from the planes of a
+        daily_index.DailyIndex (e.g. a live, federated or chunked load, which
+        carry no subcategories), under the index's scheme.
+        """
+        n_days = len(index.dates)
+        leaves = pd.MultiIndex.from_product([index.units, index.categories], names=['Unit', 'Category'])
+        incidents = index.incidents.reshape(n_days, -1)
+        present = incidents.any(axis=0)
+        return cls(index.start, leaves[present], index.score.reshape(n_days, -1)[:, present],
+                   index.level_sum.reshape(n_days, -1)[:, present], incidents[:, present], index.scheme)
+
+    @classmethod
+    def _from_codes(cls, days, columns, harm, scheme):
+        names = [name for name in PATH if name in columns]
+        dims = [len(columns[name][1]) for name in names]
+        flat = np.ravel_multi_index([np.asarray(columns[name][0], dtype=np.int64) for name in names], dims)
+        # np.unique sorts the leaves in path (code) order
+        present, leaf = np.unique(flat, return_inverse=True)
+        parts = np.unravel_index(present, dims)
+        leaves = pd.MultiIndex.from_arrays([np.asarray(columns[name][1])[part] for name, part in zip(names, parts)],
+                                           names=names)
+        if len(days):
+            first = days.min()
+            n_days = int((days.max() - first).astype(np.int64)) + 1
+        else:
+            first, n_days = np.datetime64('today', 'D'), 0
+        cells = (days - first).astype(np.int64) * len(leaves) + leaf
+        size = n_days * len(leaves)
+        planes = [np.bincount(cells, weights=weights, minlength=size).reshape(n_days, len(leaves))
+                  for weights in (score(harm, scheme), HARM_RANKS[harm], None)]
+        return cls(first, leaves, *planes[:2], planes[2].astype(np.int64), scheme)
+
+    # --- Nodes ---
+    def node(self, path=()):
+        """
+        Column of a node: () is the hospital, ('ICU',) a unit,
+        ('ICU', 'Falls') a category within it, and so on down the tree.
+        """
+        path = tuple(path)
+        if len(path) > self.depth:
+            raise KeyError(path)
+        if not path:
+            return 0
+        return self.offsets[len(path)] + self.keys[len(path)].get_loc(path)
+
+    def children(self, path=()):
+        """
+        Paths of a node's children, in path order (empty for a leaf).
+        """
+        depth = len(path)
+        if depth == self.depth:
+            return self.keys[depth][:0]
+        p = self.node(path) - self.offsets[depth]
+        starts = self._children_starts(depth)
+        stop = starts[p + 1] if p + 1 < len(starts) else len(self.keys[depth + 1])
+        return self.keys[depth + 1][starts[p]:stop]
+
+    # --- Kinetics ---
+    def kinetics(self, window, smoother='mean'):
+        """
+        (smooth, velocity, acceleration) day × node planes of the whole tree,
+        computed on first use and kept for the lifetime of the tree.
+        """
+        key = (window, smoother)
+        if key not in self._kinetics:
+            smoothed = smooth(self.score, window, smoother)
+            velocity = lag_diff(smoothed, window) / window
+            self._kinetics[key] = (smoothed, velocity, lag_diff(velocity, window) / window)
+        return self._kinetics[key]
+
+    def day_slice(self, start=None, end=None):
+        return day_slice(self.start, self.n, start, end)
+
+    def series(self, path=(), window=7, smoother='mean', start=None, end=None):
+        """
+        Daily kinetics frame of one node (the calculate_daily_kinetics
+        columns) over an inclusive [start, end] range. The trend is the
+        node's full-history series sliced to the range, so a range's first
+        days are smoothed with the days before them.
+        """
+        column, rows = self.node(path), self.day_slice(start, end)
+        smoothed, velocity, acceleration = self.kinetics(window, smoother)
+        incidents = self.incidents[rows, column]
+        return pd.DataFrame({
+            'Date': self.dates[rows],
+            'weighted_score': self.score[rows, column],
+            'raw_level': np.divide(self.level_sum[rows, column], incidents, out=np.zeros(len(incidents)), where=incidents > 0),
+            'smooth': smoothed[rows, column], 'velocity': velocity[rows, column], 'acceleration': acceleration[rows, column],
+        })
+
+    def breakdown(self, path=(), window=7, smoother='mean', start=None, end=None):
+        """
+        One row per child of a node with incidents in [start, end]: its RPN
+        and incidents over the range and its velocity / acceleration on the
+        range's last day, highest RPN first.
+        """
+        depth, children = len(path), self.children(path)
+        rows = self.day_slice(start, end)
+        lo = self.node(children[0]) if len(children) else 0
+        columns = slice(lo, lo + len(children))
+        _, velocity, acceleration = self.kinetics(window, smoother)
+        last = rows.stop - 1 if rows.stop > rows.start else None
+        table = pd.DataFrame({
+            'rpn': self.score[rows, columns].sum(axis=0),
+            'incidents': self.incidents[rows, columns].sum(axis=0),
+            'velocity': velocity[last, columns] if last is not None else np.nan,
+            'acceleration': acceleration[last, columns] if last is not None else np.nan,
+        }, index=pd.Index(children.get_level_values(depth), name=self.names[depth]) if depth < self.depth else None)
+        table = table[table['incidents'] > 0]
+        return table.sort_values('rpn', ascending=False, kind='stable')
@@ -0,0 +1,43 @@
+import numpy as np
+
+
+class PrefixCube:
+    """
+    Cumulative incident counts over date × unit × category × harm level.
+    Row d holds the totals of every day before d, so the totals of any
+    day range [lo, hi) are cum[hi] - cum[lo]: one subtraction,
+    independent of how many incidents or days the range covers.
+    """
+
+    def __init__(self, counts):
+        total = int(counts.sum())
+        dtype = np.int32 if total < np.iinfo(np.int32).max else np.int64
+        self.cum = np.zeros((counts.shape[0] + 1,) + counts.shape[1:], dtype=dtype)
+        np.cumsum(counts, axis=0, dtype=dtype, out=self.cum[1:])
+
+    def extended(self, counts, first):
+        """
+        The cube of `counts`, which match this cube's counts on every row
+        before `first` (e.g. incidents appended from `first` on): earlier
+        prefix rows are copied, only the rest is re-accumulated.
+        """
+        cube = PrefixCube.__new__(PrefixCube)
+        cube.cum = np.empty((counts.shape[0] + 1,) + counts.shape[1:], dtype=self.cum.dtype)
+        cube.cum[:first + 1] = self.cum[:first + 1]
+        np.cumsum(counts[first:], axis=0, dtype=self.cum.dtype, out=cube.cum[first + 1:])
+        cube.cum[first + 1:] += self.cum[first]
+        return cube
+
+    def range_counts(self, lo, hi, units=slice(None)):
+        """
+        unit × category × harm-level counts for day rows [lo, hi).
+        """
+        return self.cum[hi, units] - self.cum[lo, units]
+
+    def bucket_counts(self, edges, units=slice(None)):
+        """
+        Counts for consecutive day buckets [edges[k], edges[k + 1]) in one
+        vectorized subtraction (e.g. calendar weeks).
+        """
+        edges = np.asarray(edges)
+        return self.cum[edges[1:]][:, units] - self.cum[edges[:-1]][:, units]
@@ -0,0 +1,80 @@
+import functools
+
+import numpy as np
+import pandas as pd
+
+# NCC MERP harm levels A-I; code i (0-8) is level chr(65 + i)
+HARM_LEVELS = [chr(65 + i) for i in range(9)]
+
+# Weight of each code under every built-in scheme. 'ncc_merp' follows the
+# NCC MERP outcome bands: A-D no harm (error, did not reach, reached,
+# needed monitoring), E-F temporary harm, G permanent harm, H intervention
+# to sustain life, I death.
+SCHEMES = {
+    'quadratic': tuple((i + 1) ** 2 for i in range(9)),
+    'linear': tuple(i + 1 for i in range(9)),
+    'exponential': tuple(2 ** i for i in range(9)),
+    'ncc_merp': (1, 1, 2, 3, 10, 15, 50, 80, 100),
+}
+DEFAULT_SCHEME = 'quadratic'
+
+
+def encode_harm(levels):
+    """
+    uint8 code (0-8) of every Harm_Level. Categorical input is recoded
+    through its categories, so strings are only compared once per label.
+    """
+    codes = pd.Categorical(levels, categories=HARM_LEVELS).codes
+    if (codes < 0).any():
+        raise ValueError("Unknown Harm_Level in source data (expected A-I).")
+    return codes.astype(np.uint8)
+
+
+def scheme_key(scheme):
+    """
+    Hashable identity of a scheme: its name, or the weight tuple of a
+    custom table ({level: weight} or nine weights in A-I order).
+    """
+    if isinstance(scheme, str):
+        if scheme not in SCHEMES:
+            raise ValueError(f"Unknown weighting scheme '{scheme}' (expected one of {', '.join(SCHEMES)}).")
+        return scheme
+    if isinstance(scheme, dict):
+        scheme = [scheme[level] for level in HARM_LEVELS]
+    weights = tuple(float(w) for w in scheme)
+    if len(weights) != len(HARM_LEVELS):
+        raise ValueError(f"A weighting table needs {len(HARM_LEVELS)} weights (A-I), got {len(weights)}.")
+    return weights
+
+
+@functools.lru_cache(maxsize=None)
+def _tables(key):
+    weights = np.array(SCHEMES[key] if isinstance(key, str) else key, dtype=float)
+    # Integral tables are also kept in the narrowest unsigned dtype for row-level scores
+    if np.all(weights == np.round(weights)) and weights.min() >= 0:
+        compact = weights.astype(np.min_scalar_type(int(weights.max())))
+    else:
+        compact = weights.copy()
+    weights.flags.writeable = False
+    compact.flags.writeable = False
+    return weights, compact
+
+
+def harm_weights(scheme=DEFAULT_SCHEME):
+    """
+    Read-only float64 lookup table (one weight per code) of a scheme, built
+    once per scheme. counts @ harm_weights(scheme) weights a count cube.
+    """
+    return _tables(scheme_key(scheme))[0]
+
+
+def score(codes, scheme=DEFAULT_SCHEME):
+    """
+    Per-row weight of harm codes under a scheme: one take on the lookup
+    table, in its narrowest dtype (uint8 for the built-in tables that fit).
+    """
+    return _tables(scheme_key(scheme))[1].take(codes)
+
+
+# Quantized severity rank (1-9) of each code; raw_level in the store
+HARM_RANKS = harm_weights('linear')
@@ -0,0 +1,339 @@
+"""
+Local REST/JSON API over risk_engine for downstream pollers (bed management,
+nurse staffing).
+
+Loads the incident store once into a shared in-process index and serves the
+kinetics and strategic status of any unit from it. Responses carry an ETag
+derived from the dataset version and query, so a poller that sends
+If-None-Match gets a 304 without any recomputation; concurrent requests for
+the same view share one computation. The CSV is re-checked every --refresh
+seconds and the index rebuilt when it changes.
+
+    python risk_api.py --port 8502
+    curl 'localhost:8502/status?window=7&sigma=2'
+    curl 'localhost:8502/units/NICU/kinetics?window=7&sigma=2&resolution=shift'
+
+Endpoints (GET or HEAD):
+    /health                          dataset version, counters, cache stats
+    /units                           unit names
+    /status                          status of the hospital and every unit
+    /hospital/kinetics               hospital-wide series and status
+    /units/{unit}/kinetics           one unit's series and status
+Query: window (2-60, default 7), sigma (default 2), start / end (YYYY-MM-DD),
+smoother (mean, median, mad_mean, ewma), resolution (daily, shift, hourly).
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pandas as pd
+
+from daily_index import DailyIndex, HourlyIndex
+from data_store import CSV_PATH, HOURLY_AGGREGATE_KEYS, STORE_PATH, aggregate_csv_chunks
+from risk_engine import KINETICS_CACHE, KineticsCache, cached_kinetics, kinetics_key
+from shared_arrays import load_arrays
+from smoothing import SMOOTHERS
+
+# (bucket hours, offset) per resolution; shifts start at 07:00, 15:00 and 23:00
+RESOLUTIONS = {'daily': (24, 0), 'shift': (8, 7), 'hourly': (1, 0)}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _number(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return float(value)
+
+
+def _columns(frame):
+    """
+    Column-oriented JSON for a kinetics frame: timestamps as ISO strings, NaN as null.
+    """
+    out = {}
+    for col in frame.columns:
+        values = frame[col]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            out[col] = values.dt.strftime('%Y-%m-%d' if col == 'Date' else '%Y-%m-%dT%H:%M').tolist()
+        else:
+            out[col] = [None if math.isnan(v) else v for v in values.astype(float).tolist()]
+    return out
+
+
+def _summary(unit, kinetics, strategic):
+    daily, mean_val, std_val, ucl_value = kinetics
+    z_score, status, _, prompt, conf_pct = strategic
+    settled = daily.dropna()
+    latest = settled.iloc[-1] if not settled.empty else None
+    return {
+        'unit': unit, 'status': status, 'directive': prompt, 'confidence': conf_pct,
+        'z_score': _number(z_score), 'mean': _number(mean_val), 'std': _number(std_val), 'ucl': _number(ucl_value),
+        'latest': None if latest is None else latest[daily.columns[0]].isoformat(),
+        'latest_rpn': None if latest is None else _number(latest['weighted_score']),
+        'velocity': None if latest is None else _number(latest['velocity']),
+        'acceleration': None if latest is None else _number(latest['acceleration']),
+    }
+
+
+class RiskApi:
+    """
+    Shared state of the service: the loaded indexes, a byte-bounded cache of
+    encoded response bodies and the computations currently in flight.
+    """
+
+    def __init__(self, csv_path=CSV_PATH, store_path=STORE_PATH, chunked=False, workers=4):
+        self.csv_path, self.store_path, self.chunked = csv_path, store_path, chunked
+        self.index = self._hourly = self._source = None
+        self.bodies = KineticsCache(max_bytes=16 * 2**20)
+        self.requests = self.not_modified = self.computed = 0
+        self.started = time.time()
+        self._inflight = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+
+    # --- Data ---
+    def _source_stat(self):
+        stat = os.stat(self.csv_path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def load(self):
+        source = self._source_stat()
+        if self.chunked:
+            index = DailyIndex.from_aggregates(aggregate_csv_chunks(self.csv_path))
+        else:
+            index = DailyIndex.from_arrays(load_arrays(self.csv_path, self.store_path))
+        self.index, self._hourly, self._source = index, None, source
+        return index
+
+    def hourly(self):
+        # Built on first hourly / shift request; a reload drops it
+        hourly = self._hourly
+        if hourly is None:
+            if self.chunked:
+                hourly = HourlyIndex.from_aggregates(aggregate_csv_chunks(self.csv_path, keys=HOURLY_AGGREGATE_KEYS))
+            else:
+                hourly = HourlyIndex.from_arrays(load_arrays(self.csv_path, self.store_path))
+            self._hourly = hourly
+        return hourly
+
+    async def refresh_loop(self, seconds):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(seconds)
+            try:
+                source = self._source_stat()
+                if source != self._source:
+                    await loop.run_in_executor(self._executor, self.load)
+            except OSError:
+                # CSV mid-replace; keep serving the current index and retry next tick
+                continue
+            except ValueError as exc:
+                # Rows the store cannot ingest: keep serving the current index and retry once the CSV changes again
+                print(f"Refresh failed, serving version {self.index.version}: {exc}", file=sys.stderr, flush=True)
+                self._source = source
+
+    # --- Query parsing ---
+    def _view(self, query):
+        def one(name, default=None):
+            values = query.get(name)
+            return values[-1] if values else default
+
+        try:
+            window = int(one('window', 7))
+            sigma = float(one('sigma', 2))
+            start = one('start') and pd.Timestamp(one('start'))
+            end = one('end') and pd.Timestamp(one('end'))
+        except ValueError as exc:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Invalid query parameter: {exc}")
+        if not 2 <= window <= 60:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "window must be between 2 and 60.")
+        if not math.isfinite(sigma) or sigma <= 0:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "sigma must be a positive number.")
+        if start and end and start > end:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "start must not be after end.")
+        smoother = one('smoother', 'mean')
+        if smoother not in SMOOTHERS:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"smoother must be one of {', '.join(SMOOTHERS)}.")
+        resolution = one('resolution', 'daily')
+        if resolution not in RESOLUTIONS:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"resolution must be one of {', '.join(RESOLUTIONS)}.")
+        hours, offset = RESOLUTIONS[resolution]
+        return {
+            'start': start or None, 'end': end or None, 'window': window,
+            # get_strategic_status labels confidence for whole sigmas
+            'sigma_val': int(sigma) if sigma.is_integer() else sigma,
+            'hours': hours, 'offset': offset, 'smoother': smoother,
+        }
+
+    def _unit(self, name):
+        if name not in self.index.units:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Unknown unit '{name}'.")
+        return name
+
+    # --- Bodies (run on the executor) ---
+    def _kinetics(self, index, unit, view):
+        return cached_kinetics(index, unit, view['start'], view['end'], view['window'], view['sigma_val'],
+                               cache=KINETICS_CACHE, hours=view['hours'], offset=view['offset'], smoother=view['smoother'])
+
+    def _kinetics_body(self, index, unit, view):
+        kinetics, strategic = self._kinetics(index, unit, view)
+        payload = {'version': index.version, **_summary(unit, kinetics, strategic), 'series': _columns(kinetics[0])}
+        return json.dumps(payload).encode()
+
+    def _status_body(self, index, view):
+        scopes = [None] + list(index.units)
+        payload = {
+            'version': index.version, 'window': view['window'], 'sigma': view['sigma_val'],
+            'scopes': [_summary(unit, *self._kinetics(index, unit, view)) for unit in scopes],
+        }
+        return json.dumps(payload).encode()
+
+    # --- Single flight + ETag ---
+    def _settle(self, key, future):
+        self._inflight.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            body = future.result()
+            self.bodies.put(key, body, len(body) + 256)
+
+    def _body(self, key, build):
+        """
+        Awaitable encoded body for `key`: from the body cache, else the
+        computation already in flight for it, else a new one on the executor.
+        """
+        body = self.bodies.get(key)
+        if body is not None:
+            return asyncio.sleep(0, body)
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(self._executor, build)
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._settle(key, f))
+            self.computed += 1
+        # A poller hanging up must not cancel the computation others await
+        return asyncio.shield(future)
+
+    async def _cached(self, key, build, headers):
+        etag = '"' + hashlib.blake2b(repr(key).encode(), digest_size=12).hexdigest() + '"'
+        if etag in headers.get('if-none-match', ''):
+            self.not_modified += 1
+            return HTTPStatus.NOT_MODIFIED, etag, b''
+        return HTTPStatus.OK, etag, await self._body(key, build)
+
+    # --- Routing ---
+    async def route(self, path, query, headers):
+        parts = [unquote(p) for p in path.strip('/').split('/') if p]
+        index = self.index
+        if parts == ['health']:
+            body = {
+                'version': index.version, 'days': len(index.dates), 'units': len(index.units),
+                'uptime_s': round(time.time() - self.started, 1), 'requests': self.requests,
+                'computed': self.computed, 'not_modified': self.not_modified, 'in_flight': len(self._inflight),
+                'body_cache': self.bodies.stats(), 'kinetics_cache': KINETICS_CACHE.stats(),
+            }
+            return HTTPStatus.OK, None, json.dumps(body).encode()
+        if parts == ['units']:
+            return await self._cached(('units', index.version), lambda: json.dumps(list(index.units)).encode(), headers)
+
+        view = self._view(query)
+        is_status = parts == ['status']
+        is_kinetics = parts == ['hospital', 'kinetics'] or (len(parts) == 3 and parts[0] == 'units' and parts[2] == 'kinetics')
+        if not is_status and not is_kinetics:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"No route for /{'/'.join(parts)}.")
+        unit = None if is_status or parts[0] == 'hospital' else self._unit(parts[1])
+        # Shift and hourly views are served from the hourly index, built on first use
+        source = index
+        if view['hours'] != 24:
+            source = await asyncio.get_running_loop().run_in_executor(self._executor, self.hourly)
+        if is_status:
+            key = ('status',) + kinetics_key(source, None, **view)
+            return await self._cached(key, lambda: self._status_body(source, view), headers)
+        key = ('kinetics',) + kinetics_key(source, unit, **view)
+        return await self._cached(key, lambda: self._kinetics_body(source, unit, view), headers)
+
+    # --- HTTP/1.1 ---
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout=60)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+                    return
+                request_line, *header_lines = head.decode('latin-1').split('\r\n')
+                headers = {}
+                for line in header_lines:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, version = request_line.split(' ')
+                except ValueError:
+                    method, target, version = '', '/', 'HTTP/1.0'
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' or (version == 'HTTP/1.1' and connection != 'close')
+
+                self.requests += 1
+                etag = None
+                try:
+                    if method not in ('GET', 'HEAD'):
+                        raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED, "Only GET and HEAD are supported.")
+                    url = urlsplit(target)
+                    status, etag, body = await self.route(url.path, parse_qs(url.query), headers)
+                except ApiError as exc:
+                    status, body = exc.status, json.dumps({'error': str(exc)}).encode()
+                except Exception as exc:  # noqa: BLE001 - report, keep the connection usable
+                    status, body = HTTPStatus.INTERNAL_SERVER_ERROR, json.dumps({'error': repr(exc)}).encode()
+
+                lines = [f"HTTP/1.1 {status.value} {status.phrase}", "Content-Type: application/json",
+                         f"Content-Length: {len(body)}", "Cache-Control: no-cache",
+                         f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                if etag:
+                    lines.append(f"ETag: {etag}")
+                writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + (b'' if method == 'HEAD' else body))
+                await writer.drain()
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    async def serve(self, host, port, refresh=60):
+        server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        if refresh:
+            asyncio.get_running_loop().create_task(self.refresh_loop(refresh))
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--csv', default=CSV_PATH)
+    parser.add_argument('--store', default=STORE_PATH)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--chunked', action='store_true', help='stream the CSV into daily aggregates (out-of-core)')
+    parser.add_argument('--refresh', type=float, default=60, help='seconds between CSV change checks (0 disables)')
+    parser.add_argument('--workers', type=int, default=4, help='threads computing cache misses')
+    args = parser.parse_args(argv)
+
+    api = RiskApi(args.csv, args.store, args.chunked, args.workers)
+    index = api.load()
+    print(f"Loaded {len(index.dates)} days × {len(index.units)} units (version {index.version})")
+    print(f"Serving on http://{args.host}:{args.port}", flush=True)
+    try:
+        asyncio.run(api.serve(args.host, args.port, args.refresh))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,35 +1,83 @@
+import threading
+from collections import OrderedDict
+
 import pandas as pd
 import numpy as np
 
-def calculate_risk_kinetics(df_f, window, sigma_val):
+from daily_index import DailyIndex, HourlyIndex
+from diagnostics import instrumented
+from smoothing import smooth, streaming_centered_median
+
+def lag_diff(values, window):
     """
-    Translates categorical harm data into kinetic time-series derivatives.
+    diff(window) down axis 0; on a dense calendar this is always `window` days.
     """
-    # 1. Aggregation & Weighting logic
-    daily = df_f.groupby('Date').agg({'weighted_score': 'sum', 'raw_level': 'mean'}).reset_index()
-    
-    # 2. Kinetic Derivatives (Velocity & Acceleration)
-    daily['smooth'] = daily['weighted_score'].rolling(window, center=True, min_periods=1).mean()
-    daily['velocity'] = daily['smooth'].diff(window) / window
-    daily['acceleration'] = daily['velocity'].diff(window) / window
+    out = np.full(values.shape, np.nan)
+    out[window:] = values[window:] - values[:-window]
+    return out
+
+@instrumented('calculate_daily_kinetics')
+def calculate_daily_kinetics(daily, window, sigma_val, smoother='mean'):
+    """
+    Kinetic derivatives and control limits for a dense daily frame
+    (Date, weighted_score, raw_level), e.g. a DailyIndex.daily() slice.
+    `smoother` is one of smoothing.SMOOTHERS (mean, median, mad_mean, ewma).
+    """
+    daily = daily.copy()
+
+    # 1. Kinetic Derivatives (Velocity & Acceleration)
+    daily['smooth'] = smooth(daily['weighted_score'].to_numpy(float), window, smoother)
+    daily['velocity'] = lag_diff(daily['smooth'].to_numpy(), window) / window
+    daily['acceleration'] = lag_diff(daily['velocity'].to_numpy(), window) / window
 
-    # 3. Statistical Control Limits
+    # 2. Statistical Control Limits
     mean_val = daily['weighted_score'].mean()
     std_val = daily['weighted_score'].std()
     ucl_value = mean_val + (sigma_val * std_val)
     
     return daily, mean_val, std_val, ucl_value
 
-def get_strategic_status(daily, mean_val, std_val, sigma_val):
+@instrumented('calculate_risk_kinetics')
+def calculate_risk_kinetics(df_f, window, sigma_val, start=None, end=None, smoother='mean'):
+    """
+    Translates categorical harm data into kinetic time-series derivatives.
+    Days without incidents are zero-filled between `start` and `end`
+    (default: first and last incident) so windows are measured in days.
+    A scope without incidents and without both bounds gives an empty frame
+    (NaN mean, std and UCL).
+    """
+    # 1. Aggregation & Weighting logic on a dense calendar
+    daily = df_f.groupby('Date').agg(
+        weighted_score=('weighted_score', 'sum'), level_sum=('raw_level', 'sum'), incidents=('raw_level', 'size'))
+    if daily.empty and (start is None or end is None):
+        calendar = pd.DatetimeIndex([], name='Date')
+    else:
+        calendar = pd.date_range(start if start is not None else daily.index.min(),
+                                 end if end is not None else daily.index.max(), freq='D', name='Date')
+    daily = daily.reindex(calendar, fill_value=0)
+    daily['raw_level'] = (daily['level_sum'] / daily['incidents']).where(daily['incidents'] > 0, 0.0)
+
+    return calculate_daily_kinetics(daily[['weighted_score', 'raw_level']].reset_index(), window, sigma_val, smoother)
+
+@instrumented('get_strategic_status')
+def get_strategic_status(daily, mean_val=None, std_val=None, sigma_val=2):
     """
     Determines the executive directive based on risk appetite thresholds.
+    `daily` is either a calculate_risk_kinetics frame (with its mean/std) or a
+    live KineticsState, whose latest z-score is read without recomputation.
     """
     confidence_levels = {1: "68%", 2: "95%", 3: "99.7%"}
     conf_pct = confidence_levels.get(sigma_val, "95%")
 
-    if not daily.dropna().empty:
-        latest = daily.dropna().iloc[-1]
-        z_score = (latest['weighted_score'] - mean_val) / std_val
+    if isinstance(daily, KineticsState):
+        latest_score = daily.latest_score()
+        mean_val, std_val = daily.mean_val, daily.std_val
+    else:
+        settled = daily.dropna()
+        latest_score = None if settled.empty else settled.iloc[-1]['weighted_score']
+
+    if latest_score is not None:
+        z_score = (latest_score - mean_val) / std_val
         
         if z_score > sigma_val:
             status, color = "OUTSIDE TOLERANCE", "#FF3B30"
@@ -43,4 +91,417 @@ def get_strategic_status(daily, mean_val, std_val, sigma_val):
             
         return z_score, status, color, prompt, conf_pct
     
-    return 0, "NO DATA", "#86868B", "Check date filters.", "N/A"
\ No newline at end of file
+    return 0, "NO DATA", "#86868B", "Check date filters.", "N/A"
+
+
+@instrumented('calculate_group_kinetics')
+def calculate_group_kinetics(source, by, window, sigma_val, start=None, end=None, smoother='mean'):
+    """
+    Batched calculate_risk_kinetics: daily smooth, velocity, acceleration and
+    UCL for every group in `by` (None for hospital-wide, 'Unit', or
+    ['Unit', 'Category']) in one vectorized pass over a dense day × group
+    array. `source` is an incident frame or a prebuilt DailyIndex; groups with
+    no incidents in the range are omitted.
+
+    Every group shares one calendar: [start, end], by default the index's
+    first and last day, not each group's own first and last incident. A
+    group's rows (and its mean, std and UCL) therefore equal
+    calculate_risk_kinetics on that group's incidents only when it is given
+    the same explicit `start` and `end`.
+    """
+    keys = group_keys(by)
+    index = source if isinstance(source, DailyIndex) else DailyIndex.from_incidents(source)
+    rows = index.day_slice(start, end)
+
+    # 1. Aggregation: collapse the cube to day × group planes
+    groups, (score, level_sum, incidents) = group_planes(index, keys, rows, index.score, index.level_sum, index.incidents)
+    observed = incidents.sum(axis=0) > 0
+    score, level_sum, incidents = score[:, observed], level_sum[:, observed], incidents[:, observed]
+    groups = groups[observed] if keys else None
+
+    return _plane_kinetics(keys, groups, 'Date', index.dates[rows], score, level_sum, incidents, window, sigma_val, smoother)
+
+
+# Groupings a DailyIndex can be collapsed to, and the cube axes each one sums over
+GROUPINGS = {(): (1, 2), ('Unit',): (2,), ('Unit', 'Category'): ()}
+
+
+def group_keys(by):
+    return [] if by is None else ([by] if isinstance(by, str) else list(by))
+
+
+def group_planes(index, keys, rows, *cubes):
+    """
+    Collapses day × unit × category cubes of a DailyIndex to day × group
+    planes for `keys` ([], ['Unit'] or ['Unit', 'Category']).
+    """
+    reduce_axes = GROUPINGS[tuple(keys)]
+    n_days = len(range(*rows.indices(len(index.dates))))
+    planes = [cube[rows].sum(axis=reduce_axes).reshape(n_days, -1) for cube in cubes]
+    groups = pd.MultiIndex.from_product([index.units, index.categories][:len(keys)], names=keys) if keys else None
+    return groups, planes
+
+
+@instrumented('latest_group_signals')
+def latest_group_signals(index, by, window, sigma_val, start=None, end=None, smoother='mean'):
+    """
+    get_strategic_status inputs for every group of a DailyIndex in one sweep:
+    the latest day's score, acceleration and z-score against each group's
+    mean/std over [start, end]. Only the tail needed by the latest day's
+    acceleration is smoothed (the whole range for the causal ewma).
+    Returns a frame indexed by group (one row 'Hospital' when by is None).
+    """
+    keys = group_keys(by)
+    rows = index.day_slice(start, end)
+    groups, (score,) = group_planes(index, keys, rows, index.score)
+    n_days, n_groups = score.shape
+
+    # 1. Control limits over the whole range
+    mean = score.mean(axis=0) if n_days else np.full(n_groups, np.nan)
+    std = score.std(axis=0, ddof=1) if n_days > 1 else np.full(n_groups, np.nan)
+
+    # 2. Derivatives of the latest day; NaN until 2·window days have passed
+    latest_smooth, velocity, acceleration = latest_kinetics(score, window, smoother)
+    settled = n_days > 2 * window
+    if settled:
+        latest = score[-1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z_score = (latest - mean) / std
+    else:
+        latest = z_score = np.full(n_groups, np.nan)
+
+    signals = pd.DataFrame({
+        'Date': index.dates[rows][-1] if settled else pd.NaT,
+        'weighted_score': latest, 'smooth': latest_smooth,
+        'velocity': velocity, 'acceleration': acceleration,
+        'mean': mean, 'std': std, 'ucl': mean + sigma_val * std, 'z_score': z_score,
+    }, index=groups if keys else pd.Index(['Hospital'], name='Scope'))
+    return signals
+
+
+def latest_kinetics(score, window, smoother='mean'):
+    """
+    (smooth, velocity, acceleration) of the last day of a day × group plane,
+    one value per group. Only the tail the last day's acceleration needs is
+    smoothed (the whole plane for the causal ewma); velocity and
+    acceleration are NaN until 2·window days have passed.
+    """
+    n_days, n_groups = score.shape
+    if n_days == 0:
+        return np.full(n_groups, np.nan), np.full(n_groups, np.nan), np.full(n_groups, np.nan)
+    tail = score if smoother == 'ewma' else score[max(n_days - 3 * window - 1, 0):]
+    smoothed = smooth(tail, window, smoother)
+    if n_days <= 2 * window:
+        return smoothed[-1], np.full(n_groups, np.nan), np.full(n_groups, np.nan)
+    velocity = (smoothed[-1] - smoothed[-1 - window]) / window
+    acceleration = (velocity - (smoothed[-1 - window] - smoothed[-1 - 2 * window]) / window) / window
+    return smoothed[-1], velocity, acceleration
+
+
+@instrumented('calculate_hourly_kinetics')
+def calculate_hourly_kinetics(hourly, window, sigma_val, start=None, end=None, hours=1, offset=0, smoother='mean'):
+    """
+    Smooth, velocity, acceleration and UCL for every unit on an hourly
+    (hours=1) or per-shift (e.g. hours=8, offset=7) HourlyIndex plane, with
+    `window` counted in buckets. Units with no incidents are omitted.
+    """
+    stamps, score, level_sum, incidents = hourly.plane(None, start, end, hours, offset)
+    observed = incidents.sum(axis=0) > 0
+    groups = pd.MultiIndex.from_arrays([hourly.units[observed]], names=['Unit'])
+    return _plane_kinetics(['Unit'], groups, 'Timestamp', stamps,
+                           score[:, observed], level_sum[:, observed], incidents[:, observed], window, sigma_val, smoother)
+
+
+def _plane_kinetics(keys, groups, time_col, stamps, score, level_sum, incidents, window, sigma_val, smoother='mean'):
+    """
+    Kinetics for a dense time × group plane, returned as a long group-major frame.
+    """
+    # 2. Kinetic Derivatives down the time axis of every group at once
+    smoothed = smooth(score, window, smoother)
+    velocity = lag_diff(smoothed, window) / window
+    acceleration = lag_diff(velocity, window) / window
+
+    # 3. Statistical Control Limits per group
+    mean = score.mean(axis=0)
+    std = score.std(axis=0, ddof=1) if len(stamps) > 1 else np.full(score.shape[1], np.nan)
+
+    n_steps, n_groups = score.shape
+    daily = pd.DataFrame({key: np.repeat(groups.get_level_values(key), n_steps) for key in keys})
+    daily[time_col] = np.tile(stamps, n_groups)
+    daily['weighted_score'] = score.T.ravel()
+    daily['raw_level'] = np.divide(level_sum, incidents, out=np.zeros(score.shape), where=incidents > 0).T.ravel()
+    daily['smooth'] = smoothed.T.ravel()
+    daily['velocity'] = velocity.T.ravel()
+    daily['acceleration'] = acceleration.T.ravel()
+    daily['mean'] = np.repeat(mean, n_steps)
+    daily['std'] = np.repeat(std, n_steps)
+    daily['ucl'] = daily['mean'] + sigma_val * daily['std']
+    return daily
+
+
+class KineticsCache:
+    """
+    Thread-safe LRU of computed kinetics, bounded by the approximate bytes of
+    the cached frames. Shared by every dashboard session in the process.
+    """
+
+    def __init__(self, max_bytes=64 * 2**20):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, nbytes):
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (value, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries), 'bytes': self.nbytes, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+KINETICS_CACHE = KineticsCache()
+
+def kinetics_key(index, unit, start, end, window, sigma_val, hours=24, offset=0, smoother='mean'):
+    """
+    Cache key of one dashboard view; also keys anything derived from it
+    (charts). Keyed on the version of the unit and rows it covers, so a
+    live append elsewhere leaves it valid.
+    """
+    rows = index.day_slice(start, end)
+    return (index.view_version(unit, rows), unit, rows.start, rows.stop, window, sigma_val, hours, offset, smoother)
+
+
+def cached_kinetics(index, unit, start, end, window, sigma_val, cache=KINETICS_CACHE, hours=24, offset=0, smoother='mean'):
+    """
+    calculate_daily_kinetics + get_strategic_status for one dashboard view,
+    memoized on (dataset version, unit, day range, window, sigma, bucket,
+    smoother).
+    `index` is a DailyIndex, or an HourlyIndex for hourly/shift buckets of
+    `hours` starting at `offset`. Returns ((daily, mean_val, std_val,
+    ucl_value), status); the cached frame is shared between callers and
+    must be treated as read-only.
+    """
+    key = kinetics_key(index, unit, start, end, window, sigma_val, hours, offset, smoother)
+    result = cache.get(key)
+    if result is None:
+        if isinstance(index, HourlyIndex):
+            series = index.series(unit, start, end, hours, offset)
+        else:
+            series = index.daily(unit, start, end)
+        kinetics = calculate_daily_kinetics(series, window, sigma_val, smoother)
+        status = get_strategic_status(*kinetics[:3], sigma_val)
+        result = (kinetics, status)
+        cache.put(key, result, int(kinetics[0].memory_usage(deep=True).sum()) + 512)
+    return result
+
+
+class KineticsState:
+    """
+    Incrementally maintained calculate_risk_kinetics for a live incident feed.
+    The calendar is kept dense (quiet days are zero rows). Daily sums,
+    derivatives and Welford mean/std are updated in place; an ingest only
+    recomputes the days whose rolling window it touches, so appending to the
+    latest day costs O(window).
+    """
+    _ARRAYS = ('score', 'level_sum', 'count', 'smooth', 'velocity', 'acceleration')
+
+    def __init__(self, window, sigma_val=2, capacity=1024, smoother='mean'):
+        self.window = window
+        self.sigma_val = sigma_val
+        self.smoother = smoother
+        self.n = 0
+        self.days = np.empty(capacity, dtype='datetime64[D]')
+        for name in self._ARRAYS:
+            setattr(self, name, np.zeros(capacity))
+        # Welford accumulators over the daily weighted_score
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    @classmethod
+    def from_frame(cls, df, window, sigma_val=2, smoother='mean'):
+        return cls(window, sigma_val, max(1024, 2 * df['Date'].nunique()), smoother).ingest(df)
+
+    # --- Ingest ---
+    def ingest(self, incidents):
+        """
+        Adds one incident (dict) or a micro-batch (DataFrame) with Date,
+        weighted_score and raw_level. Late incidents for past days are allowed.
+        """
+        if isinstance(incidents, dict):
+            incidents = pd.DataFrame([incidents])
+        if incidents.empty:
+            return self
+
+        days = pd.to_datetime(incidents['Date']).to_numpy().astype('datetime64[D]')
+        batch_days, inverse = np.unique(days, return_inverse=True)
+        d_score = np.bincount(inverse, incidents['weighted_score'].to_numpy(float))
+        d_level = np.bincount(inverse, incidents['raw_level'].to_numpy(float))
+        d_count = np.bincount(inverse)
+
+        first = self.n
+        for day, score, level, count in zip(batch_days, d_score, d_level, d_count):
+            i, inserted = self._locate(day)
+            old = self.score[i]
+            self.score[i] += score
+            self._welford_replace(old, self.score[i])
+            self.level_sum[i] += level
+            self.count[i] += count
+            first = min(first, i, inserted)
+
+        self._refresh(first)
+        return self
+
+    def _locate(self, day):
+        """
+        Row of `day`, extending the dense calendar with zero days if needed.
+        Returns (row, first shifted or inserted row).
+        """
+        if self.n == 0:
+            self._insert_days(0, day, 1)
+            return 0, 0
+        offset = int((day - self.days[0]).astype(np.int64))
+        if offset < 0:
+            self._insert_days(0, day, -offset)
+            return 0, 0
+        if offset >= self.n:
+            inserted = self.n
+            self._insert_days(self.n, self.days[self.n - 1] + 1, offset - self.n + 1)
+            return offset, inserted
+        return offset, self.n
+
+    def _insert_days(self, i, first_day, k):
+        """
+        Inserts k consecutive zero days at row i (0 or n) and merges them
+        into the Welford accumulators.
+        """
+        while self.n + k > len(self.days):
+            self.days = np.concatenate((self.days, np.empty(len(self.days), dtype=self.days.dtype)))
+            for name in self._ARRAYS:
+                arr = getattr(self, name)
+                setattr(self, name, np.concatenate((arr, np.zeros(len(arr)))))
+        self.days[i + k:self.n + k] = self.days[i:self.n].copy()
+        self.days[i:i + k] = first_day + np.arange(k)
+        for name in self._ARRAYS:
+            arr = getattr(self, name)
+            arr[i + k:self.n + k] = arr[i:self.n].copy()
+            arr[i:i + k] = 0.0
+
+        # Chan et al. merge of k zero observations
+        total = self.n + k
+        delta = -self._mean
+        self._m2 += delta * delta * self.n * k / total
+        self._mean += delta * k / total
+        self.n = total
+
+    def _welford_replace(self, old, new):
+        delta = new - old
+        prev_mean = self._mean
+        self._mean += delta / self.n
+        self._m2 += delta * (new - self._mean + old - prev_mean)
+
+    def _refresh(self, first):
+        """
+        Recomputes smooth/velocity/acceleration from the earliest day whose
+        smoothing window includes the changed day `first`.
+        """
+        w, n = self.window, self.n
+        causal = self.smoother == 'ewma'
+        start = first if causal else max(first - (w - 1) // 2, 0)
+        if start >= n:
+            return
+
+        # 1. Smoothing over the tail only
+        if causal:
+            init = self.smooth[start - 1] if start > 0 else None
+            self.smooth[start:n] = smooth(self.score[start:n], w, 'ewma', init=init)
+        else:
+            # Include enough leading days for the first recomputed window to be complete
+            context = max(start - (w - 1 - (w - 1) // 2), 0)
+            if self.smoother == 'median':
+                # One RollingMedian slid over the tail: an add and a remove per day, O(log w) each
+                smoothed = streaming_centered_median(self.score[context:n], w)
+            else:
+                smoothed = smooth(self.score[context:n], w, self.smoother)
+            self.smooth[start:n] = smoothed[start - context:]
+        rows = np.arange(start, n)
+
+        # 2. diff(window) / window, twice
+        for src, dst in (('smooth', 'velocity'), ('velocity', 'acceleration')):
+            src_arr, dst_arr = getattr(self, src), getattr(self, dst)
+            dst_arr[start:n] = np.nan
+            valid = rows[rows >= w]
+            dst_arr[valid] = (src_arr[valid] - src_arr[valid - w]) / w
+
+    # --- Read side ---
+    def __len__(self):
+        return self.n
+
+    @property
+    def mean_val(self):
+        return self._mean if self.n else np.nan
+
+    @property
+    def std_val(self):
+        return np.sqrt(self._m2 / (self.n - 1)) if self.n > 1 else np.nan
+
+    @property
+    def ucl_value(self):
+        return self.mean_val + self.sigma_val * self.std_val
+
+    def latest_score(self):
+        """
+        weighted_score of the latest fully-derived day (the row
+        get_strategic_status uses), or None before 2 * window days exist.
+        """
+        if self.n == 0 or np.isnan(self.acceleration[self.n - 1]):
+            return None
+        return self.score[self.n - 1]
+
+    def z_score(self):
+        latest = self.latest_score()
+        return np.nan if latest is None else (latest - self.mean_val) / self.std_val
+
+    def to_frame(self):
+        """
+        Same layout as the daily frame from calculate_risk_kinetics.
+        """
+        n = self.n
+        return pd.DataFrame({
+            'Date': pd.to_datetime(self.days[:n]),
+            'weighted_score': self.score[:n],
+            'raw_level': np.divide(self.level_sum[:n], self.count[:n], out=np.zeros(n), where=self.count[:n] > 0),
+            'smooth': self.smooth[:n],
+            'velocity': self.velocity[:n],
+            'acceleration': self.acceleration[:n],
+        })
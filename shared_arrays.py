@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from daily_index import hour_of_day
+from data_store import CSV_PATH, STORE_PATH, load_incidents, refresh_store
+from diagnostics import instrumented
+from quantization import DEFAULT_SCHEME, HARM_LEVELS, encode_harm, score
+
+# Inside the store directory; the leading underscore keeps it out of the Parquet dataset.
+# Each build is a directory named after its store signature; CURRENT names the published one.
+ARRAYS_DIR = '_arrays'
+CURRENT = 'CURRENT'
+META = 'meta.json'
+
+# Column -> dtype of the memory-mapped files; codes index the dictionaries in meta.json
+ARRAY_COLUMNS = {
+    'day': 'datetime64[D]', 'hour': 'uint8', 'unit': 'int16', 'category': 'int16',
+    'subcategory': 'int16', 'harm': 'uint8', 'weighted_score': 'uint8', 'raw_level': 'uint8',
+}
+
+
+def _store_signature(manifest):
+    # Changes whenever refresh_store ingests anything
+    fields = {k: manifest[k] for k in ('source', 'size', 'mtime', 'digest', 'parts')}
+    return hashlib.blake2b(json.dumps(fields, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+
+class IncidentArrays:
+    """
+    Quantized incidents as read-only memory-mapped columns, sorted by day.
+    The OS page cache holds one copy however many sessions, threads or
+    processes open them; every accessor returns views, and filters return
+    row selections (a slice, or row numbers) rather than copied frames.
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, META)) as fh:
+            meta = json.load(fh)
+        self.path = path
+        self.signature = meta['signature']
+        self.units = pd.Index(meta['units'], name='Unit')
+        self.categories = pd.Index(meta['categories'], name='Category')
+        self.subcategories = pd.Index(meta['subcategories'], name='Subcategory')
+        for col in ARRAY_COLUMNS:
+            setattr(self, col, np.load(os.path.join(path, f'{col}.npy'), mmap_mode='r'))
+
+    def __len__(self):
+        return len(self.day)
+
+    def nbytes(self):
+        return sum(getattr(self, col).nbytes for col in ARRAY_COLUMNS)
+
+    def rows(self, start=None, end=None):
+        """
+        Contiguous row slice for an inclusive [start, end] date range.
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.day, np.datetime64(pd.Timestamp(start).date(), 'D'), 'left'))
+        hi = len(self) if end is None else int(np.searchsorted(self.day, np.datetime64(pd.Timestamp(end).date(), 'D'), 'right'))
+        return slice(lo, max(lo, hi))
+
+    def select(self, unit=None, category=None, start=None, end=None):
+        """
+        Rows matching the filters: the date slice itself when no unit or
+        category is given, otherwise the matching row numbers within it.
+        """
+        rows = self.rows(start, end)
+        keep = None
+        if unit is not None:
+            keep = self.unit[rows] == self.units.get_loc(unit)
+        if category is not None:
+            match = self.category[rows] == self.categories.get_loc(category)
+            keep = match if keep is None else keep & match
+        return rows if keep is None else rows.start + np.flatnonzero(keep)
+
+    def score(self, scheme=DEFAULT_SCHEME, selection=slice(None)):
+        """
+        Per-incident weight under a weighting scheme, looked up from the
+        harm codes; the stored weighted_score column is the default scheme.
+        """
+        return score(self.harm[selection], scheme)
+
+    def frame(self, selection=slice(None)):
+        """
+        Incident frame (the data_store.load_incidents columns) for a selection.
+        Only needed by frame-based callers; the arrays themselves stay shared.
+        """
+        day = self.day[selection]
+        return pd.DataFrame({
+            'Date': day.astype('datetime64[ns]'),
+            'Hour': pd.Categorical.from_codes(self.hour[selection], [f"{h:02d}:00" for h in range(24)]),
+            'Unit': pd.Categorical.from_codes(self.unit[selection], self.units),
+            'Category': pd.Categorical.from_codes(self.category[selection], self.categories),
+            'Subcategory': pd.Categorical.from_codes(self.subcategory[selection], self.subcategories),
+            'Harm_Level': pd.Categorical.from_codes(self.harm[selection], HARM_LEVELS),
+            'weighted_score': self.weighted_score[selection],
+            'raw_level': self.raw_level[selection],
+        })
+
+
+def build_arrays(df, path, signature):
+    """
+    Writes a load_incidents frame as day-sorted column files plus
+    dictionaries into a new version directory under `path`, then publishes
+    it by atomically replacing the CURRENT pointer. Readers resolve the
+    pointer once, so they see either the old or the new arrays and never a
+    partial directory. Every other version is then removed (maps of its
+    files stay valid, and a reader whose version goes while it is opening
+    re-reads the pointer), as are temporaries of failed or killed builds.
+    """
+    order = np.argsort(df['Date'].to_numpy(), kind='stable')
+    columns = {
+        'day': df['Date'].to_numpy().astype('datetime64[D]'),
+        'hour': hour_of_day(df['Hour']),
+        'unit': df['Unit'].cat.codes.to_numpy(),
+        'category': df['Category'].cat.codes.to_numpy(),
+        'subcategory': df['Subcategory'].cat.codes.to_numpy(),
+        'harm': encode_harm(df['Harm_Level']),
+        'weighted_score': df['weighted_score'].to_numpy(),
+        'raw_level': df['raw_level'].to_numpy(),
+    }
+    version = os.path.join(path, signature)
+    tmp = f'{version}.tmp-{os.getpid()}'
+    try:
+        os.makedirs(tmp, exist_ok=True)
+        for col, dtype in ARRAY_COLUMNS.items():
+            np.save(os.path.join(tmp, f'{col}.npy'), np.ascontiguousarray(columns[col][order].astype(dtype)))
+        meta = {
+            'signature': signature, 'rows': len(df),
+            'units': [str(u) for u in df['Unit'].cat.categories],
+            'categories': [str(c) for c in df['Category'].cat.categories],
+            'subcategories': [str(s) for s in df['Subcategory'].cat.categories],
+        }
+        with open(os.path.join(tmp, META), 'w') as fh:
+            json.dump(meta, fh)
+        try:
+            os.rename(tmp, version)
+        except OSError:
+            # Another process built the same version first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        # 1. Publish: one atomic replace of the pointer
+        pointer = os.path.join(path, f'{CURRENT}.tmp-{os.getpid()}')
+        with open(pointer, 'w') as fh:
+            fh.write(signature)
+        os.replace(pointer, os.path.join(path, CURRENT))
+    except BaseException:
+        # Failed or interrupted: leave nothing half-built behind
+        shutil.rmtree(tmp, ignore_errors=True)
+        if os.path.exists(os.path.join(path, f'{CURRENT}.tmp-{os.getpid()}')):
+            os.remove(os.path.join(path, f'{CURRENT}.tmp-{os.getpid()}'))
+        raise
+
+    # 2. Keep only the version CURRENT names (a concurrent build may have published after us);
+    # other builds' temporaries only go once their process has
+    keep = {_current_version(path), CURRENT}
+    for name in os.listdir(path):
+        if name in keep or _building(name):
+            continue
+        target = os.path.join(path, name)
+        if os.path.isdir(target):
+            shutil.rmtree(target, ignore_errors=True)
+        else:
+            os.remove(target)
+    return version
+
+
+def _building(name):
+    # Whether `name` is the temporary of a build still running in another process
+    _, tmp, pid = name.rpartition('.tmp-')
+    if not tmp or not pid.isdigit() or int(pid) == os.getpid():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _current_version(path):
+    try:
+        with open(os.path.join(path, CURRENT)) as fh:
+            return fh.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _open_current(path):
+    # A version can be pruned between reading the pointer and opening it;
+    # the pointer then already names a newer one
+    while True:
+        version = _current_version(path)
+        try:
+            return IncidentArrays(os.path.join(path, version))
+        except FileNotFoundError:
+            if _current_version(path) == version:
+                raise
+
+
+@instrumented('load_arrays')
+def load_arrays(csv_path=CSV_PATH, store_path=STORE_PATH):
+    """
+    Memory-mapped IncidentArrays for the store, refreshing the store and
+    rebuilding the arrays first if the CSV has changed.
+    """
+    signature = _store_signature(refresh_store(csv_path, store_path))
+    path = os.path.join(store_path, ARRAYS_DIR)
+    if _current_version(path) != signature or not os.path.exists(os.path.join(path, signature, META)):
+        os.makedirs(path, exist_ok=True)
+        build_arrays(load_incidents(csv_path, store_path), path, signature)
+    return _open_current(path)
@@ -0,0 +1,184 @@
+import heapq
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+SMOOTHERS = ('mean', 'median', 'mad_mean', 'ewma')
+
+# Scale factor turning a MAD into a normal-consistent standard deviation
+MAD_SCALE = 1.4826
+
+
+def smooth(values, window, method='mean', clip=3.0, init=None):
+    """
+    Smooths a dense series (1-D) or time × group panel (2-D) down axis 0.
+    mean, median and mad_mean are centered windows with min_periods=1 (as
+    pandas rolling(window, center=True)); ewma is causal with span=window.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.shape[0] == 0 and method in SMOOTHERS:
+        # An empty scope has nothing to smooth; the window reductions cannot take zero rows
+        return np.empty(values.shape)
+    if method == 'mean':
+        return centered_mean(values, window)
+    if method == 'median':
+        return centered_median(values, window)
+    if method == 'mad_mean':
+        return centered_mad_mean(values, window, clip)
+    if method == 'ewma':
+        return ewma(values, window, init)
+    raise ValueError(f"Unknown smoother '{method}' (expected one of {', '.join(SMOOTHERS)}).")
+
+
+def centered_mean(values, window):
+    """
+    Centered rolling mean from cumulative sums: O(1) per row.
+    """
+    n = values.shape[0]
+    rows = np.arange(n)
+    hi = np.minimum(rows + (window - 1) // 2, n - 1)
+    lo = np.maximum(rows + (window - 1) // 2 - window + 1, 0)
+    csum = np.concatenate((np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0, dtype=float)))
+    return (csum[hi + 1] - csum[lo]) / (hi - lo + 1).reshape((-1,) + (1,) * (values.ndim - 1))
+
+
+def _centered_windows(values, window, reduce):
+    """
+    Applies reduce(windows, nan_aware) to every centered window. Interior rows
+    see full windows and use the plain reduction; only the few edge rows,
+    whose windows are NaN-padded, pay for the NaN-aware one.
+    """
+    n = values.shape[0]
+    lo_off = window - 1 - (window - 1) // 2
+    hi_off = (window - 1) // 2
+    pad = [(lo_off, hi_off)] + [(0, 0)] * (values.ndim - 1)
+    windows = sliding_window_view(np.pad(values, pad, constant_values=np.nan), window, axis=0)
+
+    out = np.empty(values.shape)
+    a, b = min(lo_off, n), max(n - hi_off, min(lo_off, n))
+    if b > a:
+        out[a:b] = reduce(windows[a:b], False)
+    edges = np.r_[0:a, b:n]
+    if len(edges):
+        out[edges] = reduce(windows[edges], True)
+    return out
+
+
+def centered_median(values, window):
+    """
+    Centered rolling median over all groups at once (vectorized partition per window).
+    """
+    return _centered_windows(values, window, lambda w, nan: (np.nanmedian if nan else np.median)(w, axis=-1))
+
+
+def centered_mad_mean(values, window, clip=3.0):
+    """
+    Centered rolling mean after clipping each window to median ± clip·MAD·1.4826,
+    so a single sentinel event (weight 81) cannot drag the trend.
+    """
+    def reduce(w, nan):
+        median = np.nanmedian if nan else np.median
+        mean = np.nanmean if nan else np.mean
+        center = median(w, axis=-1, keepdims=True)
+        spread = clip * MAD_SCALE * median(np.abs(w - center), axis=-1, keepdims=True)
+        return mean(np.clip(w, center - spread, center + spread), axis=-1)
+    return _centered_windows(values, window, reduce)
+
+
+def ewma(values, window, init=None):
+    """
+    Causal exponentially weighted mean (span=window, adjust=False) for every
+    column. `init` continues the recursion from a previous smoothed value.
+    """
+    frame = pd.DataFrame(values.reshape(values.shape[0], -1))
+    if init is not None:
+        frame = pd.concat([pd.DataFrame(np.reshape(init, (1, -1))), frame], ignore_index=True)
+    smoothed = frame.ewm(span=window, adjust=False).mean().to_numpy()
+    if init is not None:
+        smoothed = smoothed[1:]
+    return smoothed.reshape(values.shape)
+
+
+class RollingMedian:
+    """
+    Streaming median of a sliding window: two heaps with lazy deletion, so
+    add/remove/median are O(log w). KineticsState slides one over the days
+    an ingest touches to refresh a live feed's median trend.
+    """
+
+    def __init__(self):
+        self._low = []    # max-heap (negated) of the lower half
+        self._high = []   # min-heap of the upper half
+        self._delayed = {}
+        self._low_size = self._high_size = 0
+
+    def __len__(self):
+        return self._low_size + self._high_size
+
+    def add(self, x):
+        if not self._low or x <= -self._low[0]:
+            heapq.heappush(self._low, -x)
+            self._low_size += 1
+        else:
+            heapq.heappush(self._high, x)
+            self._high_size += 1
+        self._rebalance()
+
+    def remove(self, x):
+        self._delayed[x] = self._delayed.get(x, 0) + 1
+        if self._low and x <= -self._low[0]:
+            self._low_size -= 1
+            if x == -self._low[0]:
+                self._prune(self._low, -1)
+        else:
+            self._high_size -= 1
+            if self._high and x == self._high[0]:
+                self._prune(self._high, 1)
+        self._rebalance()
+
+    def median(self):
+        if len(self) == 0:
+            return np.nan
+        if self._low_size > self._high_size:
+            return float(-self._low[0])
+        return (-self._low[0] + self._high[0]) / 2.0
+
+    def _prune(self, heap, sign):
+        while heap:
+            x = sign * heap[0]
+            if self._delayed.get(x, 0) == 0:
+                break
+            self._delayed[x] -= 1
+            heapq.heappop(heap)
+
+    def _rebalance(self):
+        if self._low_size > self._high_size + 1:
+            heapq.heappush(self._high, -heapq.heappop(self._low))
+            self._low_size -= 1
+            self._high_size += 1
+            self._prune(self._low, -1)
+        elif self._low_size < self._high_size:
+            heapq.heappush(self._low, -heapq.heappop(self._high))
+            self._high_size -= 1
+            self._low_size += 1
+            self._prune(self._high, 1)
+
+
+def streaming_centered_median(values, window):
+    """
+    centered_median for one series computed by sliding a RollingMedian, as a
+    live feed would: each step is one add and at most one remove.
+    """
+    n = len(values)
+    hi_off = (window - 1) // 2
+    out = np.empty(n)
+    rolling = RollingMedian()
+    for i in range(n + hi_off):
+        if i < n:
+            rolling.add(values[i])
+        if i - window >= 0:
+            rolling.remove(values[i - window])
+        if i - hi_off >= 0:
+            out[i - hi_off] = rolling.median()
+    return out